@@ -0,0 +1,26 @@
+"""Add per-stage timing breakdown to chats
+
+Revision ID: 9b1f6c2d7e41
+Revises: 4e37a5e6f063
+Create Date: 2026-10-18 09:12:44.183512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1f6c2d7e41'
+down_revision: Union[str, None] = '4e37a5e6f063'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chats', sa.Column('stage_timings', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('chats', 'stage_timings')
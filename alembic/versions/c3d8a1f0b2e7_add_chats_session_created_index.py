@@ -0,0 +1,26 @@
+"""Add composite (session_id, created_at) index on chats for paginated history
+
+Revision ID: c3d8a1f0b2e7
+Revises: 9b1f6c2d7e41
+Create Date: 2026-10-18 11:03:27.519846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8a1f0b2e7'
+down_revision: Union[str, None] = '9b1f6c2d7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_chats_session_id_created_at', 'chats', ['session_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chats_session_id_created_at', table_name='chats')
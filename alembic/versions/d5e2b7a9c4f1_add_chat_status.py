@@ -0,0 +1,26 @@
+"""Add status column to chats for timed-out and cancelled turns
+
+Revision ID: d5e2b7a9c4f1
+Revises: c3d8a1f0b2e7
+Create Date: 2026-10-18 14:22:41.308117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e2b7a9c4f1'
+down_revision: Union[str, None] = 'c3d8a1f0b2e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chats', sa.Column('status', sa.String(length=20), server_default='completed', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('chats', 'status')
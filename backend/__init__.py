@@ -0,0 +1,10 @@
+"""
+Agentic Chatbot backend
+
+The .env file is loaded here, once, before any backend module reads its
+settings from the environment.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
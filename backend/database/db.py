@@ -1,20 +1,119 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-
-load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "false").lower() in ("1", "true", "yes") or bool(ASYNC_DATABASE_URL)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+
+def to_async_url(url):
+    if url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url[len("postgresql+psycopg2://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    return url
+
+
+def engine_options(url):
+    options = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE
+    }
+    if url.startswith("sqlite"):
+        # SQLite has a single writer; wait for the lock instead of failing fast.
+        options["connect_args"] = {"timeout": DB_POOL_TIMEOUT}
+        return options
 
-engine = create_engine(DATABASE_URL)
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT
+    )
+    if DB_STATEMENT_TIMEOUT_MS:
+        if "+asyncpg" in url:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC_ENABLED:
+    _async_url = ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db_session = get_async_db if DB_ASYNC_ENABLED else get_db
+
+async def run_db(db, fn, *args, **kwargs):
+    """Run a sync model/service call against either session type.
+
+    With an AsyncSession the call runs through ``run_sync`` on the async
+    connection, so the event loop is never blocked on database I/O.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+    return fn(db, *args, **kwargs)
+
+async def close_db(db):
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        db.close()
+
+def warm_pool(connections=None):
+    """Open ``connections`` pooled connections (default: the pool size) so the first requests skip connect time."""
+    connections = connections or getattr(engine.pool, "size", lambda: 1)()
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+async def awarm_pool(connections=None):
+    if async_engine is None:
+        return 0
+    connections = connections or getattr(async_engine.pool, "size", lambda: 1)()
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = await async_engine.connect()
+            opened.append(connection)
+            await connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in opened:
+            await connection.close()
+    return len(opened)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, Integer, Numeric
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, Integer, Numeric, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from backend.database.db import Base
@@ -17,6 +17,9 @@ class ChatSession(Base):
 
 class Chat(Base):
     __tablename__ = "chats"
+    __table_args__ = (
+        Index("ix_chats_session_id_created_at", "session_id", "created_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
@@ -29,4 +32,6 @@ class Chat(Base):
     ai_response = Column(Text, nullable=False)
     search_enabled = Column(Boolean, default=True, nullable=False)
     response_time_ms = Column(Integer, nullable=True)
+    stage_timings = Column(JSON, nullable=True)
+    status = Column(String(20), default='completed', nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
\ No newline at end of file
@@ -1,7 +1,13 @@
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from ..migrations.chat import Chat, ChatSession
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Sequence
+
+HISTORY_COLUMNS = (
+    "id", "session_id", "user_message", "ai_response", "model_name", "model_provider",
+    "role", "search_enabled", "response_time_ms", "stage_timings", "status", "created_at"
+)
 
 class ChatSessionModel:
     def create_session(db: Session, user_id: uuid.UUID, session_id: uuid.UUID, 
@@ -34,7 +40,8 @@ class ChatModel:
     def create_chat(db: Session, user_id: uuid.UUID, session_id: uuid.UUID, 
                    model_name: str, model_provider: str, user_message: str, 
                    ai_response: str, role: str = "default", search_enabled: bool = True,
-                   system_prompt: str = None, response_time_ms: int = None) -> Chat:
+                   system_prompt: str = None, response_time_ms: int = None,
+                   stage_timings: dict = None, status: str = "completed") -> Chat:
         chat = Chat(
             id=uuid.uuid4(),
             user_id=user_id,
@@ -46,14 +53,52 @@ class ChatModel:
             user_message=user_message,
             ai_response=ai_response,
             search_enabled=search_enabled,
-            response_time_ms=response_time_ms
+            response_time_ms=response_time_ms,
+            stage_timings=stage_timings,
+            status=status
         )
         db.add(chat)
         db.commit()
         db.refresh(chat)
         return chat
     
-    def get_chat_history(db: Session, session_id: uuid.UUID) -> List[Chat]:
-        return db.query(Chat).filter(
-            Chat.session_id == session_id
-        ).order_by(Chat.created_at.asc()).all()
+    def get_chat_history(db: Session, session_id: uuid.UUID, user_id: uuid.UUID = None,
+                         before: uuid.UUID = None, limit: int = None,
+                         columns: Sequence[str] = None, status: str = None) -> List[Chat]:
+        """Chats of a session in chronological order.
+
+        With ``limit`` only the newest ``limit`` chats older than the ``before``
+        chat are returned (keyset pagination over ``(created_at, id)``, served by
+        ``ix_chats_session_id_created_at``). With ``columns`` only those columns
+        are loaded and rows are returned instead of ``Chat`` instances. With
+        ``status`` only chats in that status are returned.
+        """
+        if columns:
+            query = db.query(*(getattr(Chat, column) for column in columns))
+        else:
+            query = db.query(Chat)
+        query = query.filter(Chat.session_id == session_id)
+        if user_id is not None:
+            query = query.filter(Chat.user_id == user_id)
+        if status is not None:
+            query = query.filter(Chat.status == status)
+
+        if before is not None:
+            cursor = db.query(Chat).filter(Chat.id == before, Chat.session_id == session_id)
+            query = query.filter(tuple_(Chat.created_at, Chat.id) < tuple_(
+                cursor.with_entities(Chat.created_at).scalar_subquery(),
+                cursor.with_entities(Chat.id).scalar_subquery()
+            ))
+
+        if limit is None:
+            return query.order_by(Chat.created_at.asc(), Chat.id.asc()).all()
+
+        chats = query.order_by(Chat.created_at.desc(), Chat.id.desc()).limit(limit).all()
+        chats.reverse()
+        return chats
+
+    def get_latest_chat_id(db: Session, session_id: uuid.UUID, status: str = None) -> Optional[uuid.UUID]:
+        query = db.query(Chat.id).filter(Chat.session_id == session_id)
+        if status is not None:
+            query = query.filter(Chat.status == status)
+        return query.order_by(Chat.created_at.desc(), Chat.id.desc()).limit(1).scalar()
@@ -21,3 +21,11 @@ class UserModel:
     
     def get_user_by_id(db: Session, user_id: uuid.UUID) -> Optional[User]:
         return db.query(User).filter(User.id == user_id).first()
+    
+    def set_user_active(db: Session, user_id: uuid.UUID, is_active: bool) -> Optional[User]:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user:
+            user.is_active = is_active
+            db.commit()
+            db.refresh(user)
+        return user
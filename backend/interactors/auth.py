@@ -1,26 +1,28 @@
 from sqlalchemy.orm import Session
+from backend.database.db import run_db
 from backend.database.models.user import UserModel
-from backend.schemas.auth import UserCreate, UserLogin, Token
+from backend.schemas.auth import UserCreate, UserLogin, UserResponse, Token
 from backend.services.auth import AuthService
+from backend.services.principal_cache import principal_cache
 from fastapi import HTTPException, status
 import uuid
 
 class AuthInteractor:
-    def register_user(db: Session, user_data: UserCreate):
-        existing_user = UserModel.get_user_by_username(db, user_data.username)
+    async def register_user(db: Session, user_data: UserCreate):
+        existing_user = await run_db(db, UserModel.get_user_by_username, user_data.username)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already registered"
             )
         
-        password_hash = AuthService.hash_password(user_data.password)
-        user = UserModel.create_user(db, user_data.username, user_data.email, password_hash)
+        password_hash = await AuthService.ahash_password(user_data.password)
+        user = await run_db(db, UserModel.create_user, user_data.username, user_data.email, password_hash)
         return user
     
-    def login_user(db: Session, user_data: UserLogin):
-        user = UserModel.get_user_by_username(db, user_data.username)
-        if not user or not AuthService.verify_password(user_data.password, user.password_hash):
+    async def login_user(db: Session, user_data: UserLogin):
+        user = await run_db(db, UserModel.get_user_by_username, user_data.username)
+        if not user or not await AuthService.averify_password(user_data.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password"
@@ -33,15 +35,27 @@ class AuthInteractor:
         try:
             payload = AuthService.verify_token(token)
             user_id = uuid.UUID(payload.get("sub"))
+            exp = payload.get("exp")
+            
+            principal = principal_cache.get(user_id, exp)
+            if principal is not None:
+                return principal
+            
             user = UserModel.get_user_by_id(db, user_id)
-            if not user:
+            if not user or not user.is_active:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid token"
                 )
-            return user
+            
+            principal = UserResponse.model_validate(user)
+            principal_cache.set(user_id, exp, principal)
+            return principal
         except Exception:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token"
             )
+    
+    async def aget_current_user(db: Session, token: str):
+        return await run_db(db, AuthInteractor.get_current_user, token)
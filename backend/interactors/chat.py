@@ -1,85 +1,345 @@
 from sqlalchemy.orm import Session
-from backend.database.models.chat import ChatModel
-from backend.schemas.chat import ChatRequest, AvailableModelsResponse, ModelInfo
-from backend.services.agent import AgentService
-from backend.services.session import SessionService
-from backend.services.gemini import GeminiService
-from backend.services.groq import GroqService
+from backend.database.db import run_db, close_db
+from backend.database.models.chat import ChatModel, HISTORY_COLUMNS
+from backend.schemas.chat import ChatRequest, ChatResponse, ChatHistoryItem, AvailableModelsResponse, ModelInfo, AgentRole
+from backend.services.container import service_container
+from backend.services.memory import conversation_memory
+from backend.services.chat_writer import chat_writer
+from backend.services.metrics import RequestTimer, metrics
+from backend.services.rate_limit import QuotaExceededError, user_quotas
+from backend.services.deadlines import (
+    COMPLETED, TIMEOUT, CANCELLED, DeadlineExceeded, PartialResponseCollector, RequestDeadline,
+    cut_off_response, iterate_with_deadline, resolve_timeout, run_with_deadline
+)
 from backend.services.roles import AgentRoles
+from backend.services.model_catalog import model_catalog
+from backend.services.routing import ENABLED_PROVIDERS, UnsupportedProviderError
 from fastapi import HTTPException, status
 from typing import List
+import asyncio
+import json
 import uuid
 
+# Served when the providers cannot be asked for their models.
+FALLBACK_MODELS = {
+    "gemini": ModelInfo(
+        provider="gemini",
+        models=["gemini-2.0-flash", "gemini-1.5-pro"],
+        current_model="gemini-2.0-flash",
+        temperature=0.7
+    ),
+    "groq": ModelInfo(
+        provider="groq",
+        models=["llama-3.3-70b-versatile"],
+        current_model="llama-3.3-70b-versatile",
+        temperature=0.7
+    )
+}
+
 class ChatInteractor:
-    async def process_chat(self, db: Session, token: str, chat_request: ChatRequest):
+    def __init__(self, agent_service=None, session_service=None):
+        self._agent_service = agent_service
+        self.session_service = session_service or service_container.session_service
+    
+    @property
+    def agent_service(self):
+        # Resolved lazily: the first access imports LangGraph and the providers.
+        return self._agent_service or service_container.agent_service
+    
+    async def process_chat(self, db: Session, token: str, chat_request: ChatRequest, is_disconnected=None):
+        quota_user = None
         try:
             from backend.interactors.auth import AuthInteractor
             
-            current_user = AuthInteractor.get_current_user(db, token)
+            timer = RequestTimer()
+            role = (chat_request.role or AgentRole.DEFAULT).value
             
-            session_service = SessionService()
-            session_id = session_service.get_or_create_session(
-                db=db,
-                user_id=current_user.id,
-                provided_session_id=chat_request.session_id
-            )
+            with timer.stage("auth"):
+                current_user = await run_db(db, AuthInteractor.get_current_user, token)
+                user_id = current_user.id
             
-            agent_service = AgentService()
-            ai_response = agent_service.get_response_from_ai_agent(
-                provider=chat_request.model_provider,
-                query=chat_request.message,
-                role=chat_request.role or "default",
-                allow_search=chat_request.search_enabled,
-                model=chat_request.model_name,
-                temperature=chat_request.temperature
-            )
+            deadline = self._request_deadline(chat_request, role)
+            quota_user = self._acquire_quota(user_id)
             
-            chat = ChatModel.create_chat(
-                db=db,
-                user_id=current_user.id,
-                session_id=session_id,
-                model_name=chat_request.model_name,
-                model_provider=chat_request.model_provider,
-                user_message=chat_request.message,
-                ai_response=ai_response,
-                role=chat_request.role or "default",
-                search_enabled=chat_request.search_enabled
+            with timer.stage("session"):
+                session_service = self.session_service
+                session_id = await run_db(
+                    db,
+                    session_service.get_or_create_session,
+                    user_id=user_id,
+                    provided_session_id=chat_request.session_id
+                )
+            
+            with timer.stage("history"):
+                messages = await run_db(db, conversation_memory.get_messages, session_id, chat_request.message)
+            
+            # Hand the pooled connection back while the agent runs so in-flight
+            # chats are not capped by the pool size.
+            await close_db(db)
+            
+            with timer.stage("agent"):
+                agent_service = self.agent_service
+                partial = PartialResponseCollector()
+                route = {}
+                chat_status, ai_response = await run_with_deadline(
+                    agent_service.aget_response_from_ai_agent(
+                        provider=chat_request.model_provider,
+                        query=messages,
+                        role=role,
+                        allow_search=chat_request.search_enabled,
+                        model=chat_request.model_name,
+                        temperature=chat_request.temperature,
+                        callbacks=[timer.callback(), partial],
+                        route=route
+                    ),
+                    deadline,
+                    is_disconnected
+                )
+                if chat_status != COMPLETED:
+                    ai_response = cut_off_response(chat_status, partial.text, deadline)
+            
+            return await self._persist_turn(db, timer, chat_request, role, user_id, session_id, ai_response, chat_status,
+                                            route)
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error processing chat: {str(e)}"
             )
+        finally:
+            if quota_user is not None:
+                user_quotas.release(quota_user)
+
+    async def stream_chat(self, db: Session, token: str, chat_request: ChatRequest):
+        quota_user = None
+        try:
+            from backend.interactors.auth import AuthInteractor
+            
+            timer = RequestTimer()
+            role = (chat_request.role or AgentRole.DEFAULT).value
             
-            return chat
+            with timer.stage("auth"):
+                current_user = await run_db(db, AuthInteractor.get_current_user, token)
+                user_id = current_user.id
             
+            deadline = self._request_deadline(chat_request, role)
+            quota_user = self._acquire_quota(user_id)
+            
+            with timer.stage("session"):
+                session_service = self.session_service
+                session_id = await run_db(
+                    db,
+                    session_service.get_or_create_session,
+                    user_id=user_id,
+                    provided_session_id=chat_request.session_id
+                )
+            
+            with timer.stage("history"):
+                messages = await run_db(db, conversation_memory.get_messages, session_id, chat_request.message)
+            
+            await close_db(db)
         except Exception as e:
+            if quota_user is not None:
+                user_quotas.release(quota_user)
+            if isinstance(e, HTTPException):
+                raise
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error processing chat: {str(e)}"
             )
+        
+        released = False
+        
+        async def release(close_session=True):
+            # Runs from the generator's finally and again as the response's
+            # background task, which also covers a stream that never started.
+            nonlocal released
+            if released:
+                return
+            released = True
+            user_quotas.release(quota_user)
+            if close_session:
+                await close_db(db)
+        
+        async def events():
+            streamed = []
+            route = {}
+            persisted = False
+            close_here = True
+            try:
+                yield self._format_event("session", {"session_id": str(session_id)})
+                
+                ai_response = None
+                chat_status = COMPLETED
+                try:
+                    with timer.stage("agent"):
+                        agent_service = self.agent_service
+                        async for event in iterate_with_deadline(agent_service.astream_response_from_ai_agent(
+                            provider=chat_request.model_provider,
+                            query=messages,
+                            role=role,
+                            allow_search=chat_request.search_enabled,
+                            model=chat_request.model_name,
+                            temperature=chat_request.temperature,
+                            callbacks=[timer.callback()],
+                            route=route
+                        ), deadline):
+                            if event["type"] == "final":
+                                ai_response = event["content"]
+                            else:
+                                if event["type"] == "token":
+                                    streamed.append(event["content"])
+                                    if "first_token" not in timer.stages:
+                                        timer.add("first_token", timer.total_ms())
+                                yield self._format_event(event["type"], event)
+                except DeadlineExceeded as e:
+                    chat_status = TIMEOUT
+                    ai_response = cut_off_response(TIMEOUT, "".join(streamed), deadline)
+                    yield self._format_event("timeout", {"type": "timeout", "content": str(e)})
+                
+                persisted = True
+                response = await self._persist_turn(
+                    db, timer, chat_request, role, user_id, session_id, ai_response, chat_status, route
+                )
+                yield self._format_event("done", response.model_dump(mode="json"))
+                
+            except (asyncio.CancelledError, GeneratorExit):
+                # Client went away: keep what was streamed, off the cancelled task.
+                if not persisted:
+                    persisted = True
+                    service_container.track(asyncio.ensure_future(self._persist_and_close(
+                        db, timer, chat_request, role, user_id, session_id,
+                        cut_off_response(CANCELLED, "".join(streamed), deadline), CANCELLED, route
+                    )))
+                    close_here = False
+                raise
+            except Exception as e:
+                yield self._format_event("error", {"type": "error", "content": f"Error processing chat: {str(e)}"})
+            finally:
+                await release(close_session=close_here)
+        
+        return events(), release
+    
+    def _request_deadline(self, chat_request: ChatRequest, role: str) -> RequestDeadline:
+        try:
+            provider_service = self.agent_service.get_provider_service(chat_request.model_provider.value)
+        except UnsupportedProviderError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return RequestDeadline(resolve_timeout(role, provider_service, chat_request.timeout_seconds))
+    
+    async def _persist_turn(self, db: Session, timer: RequestTimer, chat_request: ChatRequest, role: str,
+                            user_id: uuid.UUID, session_id: uuid.UUID, ai_response: str, chat_status: str,
+                            route: dict = None):
+        # Record the provider and model that answered, which differ from the
+        # requested ones after a failover; cached answers keep the requested ones.
+        provider = (route or {}).get("provider") or chat_request.model_provider.value
+        model_name = (route or {}).get("model") or chat_request.model_name
+        with timer.stage("db_insert"):
+            chat = await self._save_chat(
+                db,
+                user_id=user_id,
+                session_id=session_id,
+                model_name=model_name,
+                model_provider=provider,
+                user_message=chat_request.message,
+                ai_response=ai_response,
+                role=role,
+                search_enabled=chat_request.search_enabled,
+                response_time_ms=int(timer.total_ms()),
+                stage_timings=timer.as_dict(),
+                status=chat_status
+            )
+            # Give the connection back now rather than at dependency teardown,
+            # which only runs after the response has been sent.
+            await close_db(db)
+        if chat_status == COMPLETED:
+            chat_id = chat["id"] if isinstance(chat, dict) else chat.id
+            conversation_memory.append_turn(session_id, chat_request.message, ai_response, chat_id)
+        
+        known_models = self.agent_service.get_provider_service(provider).get_available_models()
+        metrics.observe_request(timer, provider, model_name, role, known_models)
+        metrics.observe(f"request.{chat_status}", timer.total_ms(), role=role)
+        
+        response = ChatResponse.model_validate(chat)
+        response.stage_timings = timer.as_dict()
+        return response
+    
+    async def _persist_and_close(self, db: Session, *args):
+        try:
+            await self._persist_turn(db, *args)
+        finally:
+            await close_db(db)
+    
+    def _acquire_quota(self, user_id: uuid.UUID):
+        try:
+            user_quotas.acquire(user_id)
+        except QuotaExceededError as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": str(max(1, round(e.retry_after)))}
+            )
+        return user_id
+    
+    async def _save_chat(self, db: Session, **fields):
+        if chat_writer is not None:
+            return await chat_writer.aadd_chat(**fields)
+        return await run_db(db, ChatModel.create_chat, **fields)
+    
+    def _format_event(self, event_type: str, data: dict) -> str:
+        return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
 
-    def get_chat_history(self, db: Session, token: str, session_id: uuid.UUID) -> List:
+    async def get_chat_history(self, db: Session, token: str, session_id: uuid.UUID,
+                               before: uuid.UUID = None, limit: int = None, fields: str = None) -> List:
         try:
             from backend.interactors.auth import AuthInteractor
             
-            current_user = AuthInteractor.get_current_user(db, token)
+            columns = None
+            if fields:
+                columns = [field.strip() for field in fields.split(",") if field.strip()]
+                unknown = set(columns) - set(HISTORY_COLUMNS)
+                if unknown:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Unknown history fields: {', '.join(sorted(unknown))}"
+                    )
+                if "id" not in columns:
+                    columns.insert(0, "id")
             
-            chats = ChatModel.get_chat_history(db, session_id)
+            current_user = await run_db(db, AuthInteractor.get_current_user, token)
             
-            user_chats = [chat for chat in chats if chat.user_id == current_user.id]
+            chats = await run_db(
+                db,
+                ChatModel.get_chat_history,
+                session_id,
+                user_id=current_user.id,
+                before=before,
+                limit=limit,
+                columns=columns
+            )
             
-            return user_chats
+            if columns:
+                return [ChatHistoryItem(**chat._asdict()) for chat in chats]
+            return [ChatHistoryItem.model_validate(chat) for chat in chats]
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error getting chat history: {str(e)}"
             )
 
-    def get_user_sessions(self, db: Session, token: str):
+    async def get_user_sessions(self, db: Session, token: str):
         try:
             from backend.interactors.auth import AuthInteractor
             
-            current_user = AuthInteractor.get_current_user(db, token)
+            current_user = await run_db(db, AuthInteractor.get_current_user, token)
             
-            session_service = SessionService()
-            sessions = session_service.get_user_sessions(db, current_user.id)
+            session_service = self.session_service
+            sessions = await run_db(db, session_service.get_user_sessions, current_user.id)
             return {
                 "sessions": [
                     {
@@ -98,15 +358,15 @@ class ChatInteractor:
                 detail=f"Error getting user sessions: {str(e)}"
             )
     
-    def create_new_session(self, db: Session, token: str):
+    async def create_new_session(self, db: Session, token: str):
         try:
             from backend.interactors.auth import AuthInteractor
     
-            current_user = AuthInteractor.get_current_user(db, token)
+            current_user = await run_db(db, AuthInteractor.get_current_user, token)
             
-            session_service = SessionService()
+            session_service = self.session_service
             session_service.clear_user_active_session(current_user.id)
-            session_id = session_service.get_or_create_session(db, current_user.id)
+            session_id = await run_db(db, session_service.get_or_create_session, current_user.id)
             return {"session_id": session_id, "message": "New session created"}
         except Exception as e:
             raise HTTPException(
@@ -114,47 +374,70 @@ class ChatInteractor:
                 detail=f"Error creating new session: {str(e)}"
             )
     
-    def get_available_models(self) -> AvailableModelsResponse:
+    async def delete_session(self, db: Session, token: str, session_id: uuid.UUID):
         try:
-            gemini_service = GeminiService()
-            groq_service = GroqService()
-            
-            gemini_info = gemini_service.get_model_info()
-            groq_info = groq_service.get_model_info()
-            
-            return AvailableModelsResponse(
-                gemini=ModelInfo(
-                    provider="gemini",
-                    models=gemini_info["available_models"],
-                    current_model=gemini_info["current_model"],
-                    temperature=gemini_info["temperature"]
-                ),
-                groq=ModelInfo(
-                    provider="groq", 
-                    models=groq_info["available_models"],
-                    current_model=groq_info["current_model"],
-                    temperature=groq_info["temperature"]
-                ),
-                roles=[
-                    {"id": role_id, "name": role_data["name"], "description": role_data["description"]}
-                    for role_id, role_data in AgentRoles().get_roles_summary().items()
-                ]
+            from backend.interactors.auth import AuthInteractor
+            
+            current_user = await run_db(db, AuthInteractor.get_current_user, token)
+            
+            session_service = self.session_service
+            deactivated = await run_db(db, session_service.deactivate_session, current_user.id, session_id)
+            if not deactivated:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Session not found"
+                )
+            conversation_memory.forget(session_id)
+            return {"session_id": session_id, "message": "Session deleted"}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error deleting session: {str(e)}"
             )
-        except Exception as e
-            return AvailableModelsResponse(
-                gemini=ModelInfo(
-                    provider="gemini",
-                    models=["gemini-2.0-flash", "gemini-1.5-pro"],
-                    current_model="gemini-2.0-flash",
-                    temperature=0.7
-                ),
-                groq=ModelInfo(
-                    provider="groq",
-                    models=["llama-3.3-70b-versatile"],
-                    current_model="llama-3.3-70b-versatile", 
-                    temperature=0.7
-                ),
-                roles=[
-                    {"id": "default", "name": "AI Assistant", "description": "Smart and friendly AI chatbot"}
-                ]
+    
+    def get_agent_cache_stats(self):
+        return self.agent_service.get_cache_stats()
+    
+    def get_models_catalog(self):
+        try:
+            return model_catalog.current(lambda: self.build_available_models().model_dump_json().encode("utf-8"))
+        except Exception:
+            # Served without an ETag and never cached, so the next request retries the providers.
+            return model_catalog.uncached(self.get_fallback_models().model_dump_json().encode("utf-8"))
+    
+    def get_available_models(self) -> AvailableModelsResponse:
+        try:
+            return self.build_available_models()
+        except Exception:
+            return self.get_fallback_models()
+    
+    def build_available_models(self) -> AvailableModelsResponse:
+        agent_service = self.agent_service
+        providers = {}
+        for provider in ENABLED_PROVIDERS:
+            if provider not in AvailableModelsResponse.model_fields:
+                continue
+            info = agent_service.get_provider_service(provider).get_model_info()
+            providers[provider] = ModelInfo(
+                provider=provider,
+                models=info["available_models"],
+                current_model=info["current_model"],
+                temperature=info["temperature"]
             )
+        return AvailableModelsResponse(
+            **providers,
+            roles=[
+                {"id": role_id, "name": role_data["name"], "description": role_data["description"]}
+                for role_id, role_data in AgentRoles().get_roles_summary().items()
+            ]
+        )
+    
+    def get_fallback_models(self) -> AvailableModelsResponse:
+        return AvailableModelsResponse(
+            **{provider: FALLBACK_MODELS[provider] for provider in ENABLED_PROVIDERS if provider in FALLBACK_MODELS},
+            roles=[
+                {"id": "default", "name": "AI Assistant", "description": "Smart and friendly AI chatbot"}
+            ]
+        )
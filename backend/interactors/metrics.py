@@ -0,0 +1,47 @@
+from backend.services.metrics import metrics
+from backend.services.memory import conversation_memory
+from backend.services.registry import agent_registry
+from backend.services.response_cache import response_cache
+from backend.services.principal_cache import principal_cache
+from backend.services.session_cache import session_cache
+from backend.services.auth import password_hash_pool
+from backend.services.chat_writer import chat_writer
+from backend.services.routing import provider_router
+from backend.services.rate_limit import provider_limits, user_quotas
+from backend.services.budget import agent_budget_stats
+from backend.services.roles import role_catalog
+from backend.services.model_catalog import model_catalog
+from backend.services.container import service_container
+
+class MetricsInteractor:
+    def get_metrics(self):
+        # Imported here so the metrics route does not load LangGraph at startup.
+        from backend.services import tool_node
+        from backend.services.compaction import tool_compactor
+        
+        return {
+            "latency": metrics.snapshot(),
+            "providers": provider_router.stats(),
+            "rate_limits": {
+                "providers": provider_limits.stats(),
+                "users": user_quotas.stats()
+            },
+            "roles": role_catalog.stats(),
+            "models_catalog": model_catalog.stats(),
+            "startup": service_container.stats(),
+            "agent_budgets": agent_budget_stats.stats(),
+            "tools": {
+                "max_parallel": tool_node.TOOL_MAX_PARALLEL,
+                "pre_search": dict(tool_node.pre_search_stats),
+                "compaction": tool_compactor.stats() if tool_compactor is not None else None
+            },
+            "password_hashing": password_hash_pool.stats(),
+            "chat_write_behind": chat_writer.stats() if chat_writer is not None else None,
+            "caches": {
+                **agent_registry.stats(),
+                "conversation_memory": conversation_memory.stats(),
+                "principals": principal_cache.stats(),
+                "sessions": session_cache.stats(),
+                "response_cache": response_cache.stats() if response_cache is not None else None
+            }
+        }
@@ -1,50 +1,99 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
-from backend.database.db import get_db
+from backend.database.db import get_db_session
 from backend.interactors.chat import ChatInteractor
-from backend.schemas.chat import ChatRequest, ChatResponse, AvailableModelsResponse
-from typing import List
+from backend.services.model_catalog import model_catalog
+from backend.schemas.chat import ChatRequest, ChatResponse, ChatHistoryItem, AvailableModelsResponse
+from typing import List, Optional
 import uuid
 
 router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
 security = HTTPBearer()
 
+def get_chat_interactor(request: Request) -> ChatInteractor:
+    interactor = getattr(request.app.state, "chat_interactor", None)
+    if interactor is None:
+        # The app was started without its lifespan, e.g. by an in-process test client.
+        interactor = request.app.state.chat_interactor = ChatInteractor()
+    return interactor
+
 @router.get("/models", response_model=AvailableModelsResponse)
-async def get_available_models():
-    chat_interactor = ChatInteractor()
-    return chat_interactor.get_available_models()
+async def get_available_models(request: Request, chat_interactor: ChatInteractor = Depends(get_chat_interactor)):
+    catalog = chat_interactor.get_models_catalog()
+    headers = model_catalog.headers(catalog)
+    if model_catalog.matches(catalog, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalog.body, media_type="application/json", headers=headers)
+
+@router.get("/cache/stats")
+async def get_agent_cache_stats(chat_interactor: ChatInteractor = Depends(get_chat_interactor)):
+    return chat_interactor.get_agent_cache_stats()
 
 @router.post("/", response_model=ChatResponse)
 async def send_message(
     chat_request: ChatRequest,
-    db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    request: Request,
+    db: Session = Depends(get_db_session),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    chat_interactor: ChatInteractor = Depends(get_chat_interactor)
+):
+    return await chat_interactor.process_chat(
+        db, credentials.credentials, chat_request, is_disconnected=request.is_disconnected
+    )
+
+@router.post("/stream")
+async def stream_message(
+    chat_request: ChatRequest,
+    db: Session = Depends(get_db_session),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    chat_interactor: ChatInteractor = Depends(get_chat_interactor)
 ):
-    chat_interactor = ChatInteractor()
-    return await chat_interactor.process_chat(db, credentials.credentials, chat_request)
+    events, release = await chat_interactor.stream_chat(db, credentials.credentials, chat_request)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release)
+    )
 
-@router.get("/history/{session_id}", response_model=List[ChatResponse])
+@router.get("/history/{session_id}", response_model=List[ChatHistoryItem], response_model_exclude_unset=True)
 async def get_chat_history(
     session_id: uuid.UUID,
-    db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    before: Optional[uuid.UUID] = Query(None, description="Return chats older than this chat id"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of chats to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,user_message,created_at"),
+    db: Session = Depends(get_db_session),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    chat_interactor: ChatInteractor = Depends(get_chat_interactor)
 ):
-    chat_interactor = ChatInteractor()
-    return chat_interactor.get_chat_history(db, credentials.credentials, session_id)
+    return await chat_interactor.get_chat_history(
+        db, credentials.credentials, session_id, before=before, limit=limit, fields=fields
+    )
 
 @router.get("/sessions")
 async def get_user_sessions(
-    db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    db: Session = Depends(get_db_session),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    chat_interactor: ChatInteractor = Depends(get_chat_interactor)
+):
+    return await chat_interactor.get_user_sessions(db, credentials.credentials)
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(
+    session_id: uuid.UUID,
+    db: Session = Depends(get_db_session),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    chat_interactor: ChatInteractor = Depends(get_chat_interactor)
 ):
-    chat_interactor = ChatInteractor()
-    return chat_interactor.get_user_sessions(db, credentials.credentials)
+    return await chat_interactor.delete_session(db, credentials.credentials, session_id)
 
 @router.post("/new-session")
 async def create_new_session(
-    db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    db: Session = Depends(get_db_session),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    chat_interactor: ChatInteractor = Depends(get_chat_interactor)
 ):
-    chat_interactor = ChatInteractor()
-    return chat_interactor.create_new_session(db, credentials.credentials)
\ No newline at end of file
+    return await chat_interactor.create_new_session(db, credentials.credentials)
\ No newline at end of file
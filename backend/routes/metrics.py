@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from backend.interactors.metrics import MetricsInteractor
+
+router = APIRouter(prefix="/api/v1", tags=["metrics"])
+
+@router.get("/metrics")
+async def get_metrics():
+    metrics_interactor = MetricsInteractor()
+    return metrics_interactor.get_metrics()
@@ -33,6 +33,7 @@ class ChatRequest(BaseModel):
     role: Optional[AgentRole] = Field(AgentRole.DEFAULT, description="Agent role to use")
     search_enabled: Optional[bool] = Field(True, description="Enable web search")
     temperature: Optional[float] = Field(0.7, ge=0.0, le=2.0, description="Model temperature")
+    timeout_seconds: Optional[float] = Field(None, gt=0, le=600, description="Request deadline in seconds (server default if not provided)")
 
 class ChatResponse(BaseModel):
     id: uuid.UUID
@@ -44,11 +45,30 @@ class ChatResponse(BaseModel):
     role: str
     search_enabled: bool
     response_time_ms: Optional[int]
+    stage_timings: Optional[dict] = None
+    status: Optional[str] = "completed"
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class ChatHistoryItem(BaseModel):
+    id: uuid.UUID
+    session_id: Optional[uuid.UUID] = None
+    user_message: Optional[str] = None
+    ai_response: Optional[str] = None
+    model_name: Optional[str] = None
+    model_provider: Optional[str] = None
+    role: Optional[str] = None
+    search_enabled: Optional[bool] = None
+    response_time_ms: Optional[int] = None
+    stage_timings: Optional[dict] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
 class ModelInfo(BaseModel):
     provider: str
     models: List[str]
@@ -56,6 +76,7 @@ class ModelInfo(BaseModel):
     temperature: float
 
 class AvailableModelsResponse(BaseModel):
-    gemini: ModelInfo
-    groq: ModelInfo
+    # None for a provider not enabled on this server (ENABLED_PROVIDERS)
+    gemini: Optional[ModelInfo] = None
+    groq: Optional[ModelInfo] = None
     roles: List[dict]
\ No newline at end of file
@@ -7,14 +7,74 @@ This package contains all third-party integrations and service classes:
 - TavilyService: Tavily web search integration
 - AgentService: Main agent orchestration with role-based prompts
 - AgentRoles: Role definitions and management
+- RoleCatalog: Precomputed role prompt artifacts, hot-reloadable from ROLES_FILE
 - SessionService: Automatic session management for chat conversations
+- AgentRegistry: Process-wide cache of LLM clients and compiled agents
+- ConversationMemory: Token-bounded multi-turn history per chat session
+- MetricsRegistry / RequestTimer: Per-stage request timing and latency histograms
+- ResponseCache: Optional exact/semantic cache of final agent answers
+- ChatWriteBehind: Optional batched, spool-backed persistence of chat turns
+- SessionCache: Local + shared cache of session ownership and active sessions
+- ProviderRouter: Provider failover, hedged requests and circuit breakers
+- RequestDeadline: Per-request deadlines that cancel the agent run when exceeded
+- RoleBudget: Per-role limits on agent steps, tool calls and tokens
+- GuardedTool: Tool budget, bounded fan-out and pre-search for search-mandatory roles
+- ToolResultCompactor: Dedup, truncation and optional summarization of search results
+- ModelCatalog: Pre-serialized /chat/models response with ETag-based revalidation
+- ServiceContainer: Process-wide services built and warmed up in the app lifespan
+
+Exports are resolved on first access, so importing one service (or the
+package) does not load every provider SDK and LangGraph with it.
 """
 
-from .gemini import GeminiService
-from .groq import GroqService
-from .tavily import TavilyService
-from .agent import AgentService
-from .roles import AgentRoles
-from .session import SessionService
+import importlib
+
+_EXPORTS = {
+    'GeminiService': 'gemini',
+    'GroqService': 'groq',
+    'TavilyService': 'tavily',
+    'AgentService': 'agent',
+    'AgentRoles': 'roles',
+    'RoleCatalog': 'roles',
+    'role_catalog': 'roles',
+    'SessionService': 'session',
+    'AgentRegistry': 'registry',
+    'agent_registry': 'registry',
+    'ConversationMemory': 'memory',
+    'conversation_memory': 'memory',
+    'MetricsRegistry': 'metrics',
+    'RequestTimer': 'metrics',
+    'metrics': 'metrics',
+    'ResponseCache': 'response_cache',
+    'response_cache': 'response_cache',
+    'ChatWriteBehind': 'chat_writer',
+    'chat_writer': 'chat_writer',
+    'SessionCache': 'session_cache',
+    'session_cache': 'session_cache',
+    'ProviderRouter': 'routing',
+    'provider_router': 'routing',
+    'RequestDeadline': 'deadlines',
+    'resolve_timeout': 'deadlines',
+    'RoleBudget': 'budget',
+    'agent_budget_stats': 'budget',
+    'GuardedTool': 'tool_node',
+    'ToolRun': 'tool_node',
+    'PreSearch': 'tool_node',
+    'ToolResultCompactor': 'compaction',
+    'tool_compactor': 'compaction',
+    'ModelCatalog': 'model_catalog',
+    'model_catalog': 'model_catalog',
+    'ServiceContainer': 'container',
+    'service_container': 'container',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ['GeminiService', 'GroqService', 'TavilyService', 'AgentService', 'AgentRoles', 'SessionService']
\ No newline at end of file
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
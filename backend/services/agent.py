@@ -1,61 +1,297 @@
-from dotenv import load_dotenv
+import os
+import time
 from langgraph.prebuilt import create_react_agent
 from langchain_core.messages.ai import AIMessage
-from langchain_core.messages import SystemMessage
 from .gemini import GeminiService
 from .groq import GroqService
 from .tavily import TavilyService
 from .roles import AgentRoles
+from .budget import agent_budget_stats, best_effort_answer, budget_prompt, run_outcome
+from .tool_node import GuardedTool, PreSearch, ToolRun, latest_user_text
+from .registry import agent_registry
+from .response_cache import response_cache as default_response_cache
+from .routing import ENABLED_PROVIDERS, ProviderUnavailableError, UnsupportedProviderError, provider_router
+from .rate_limit import ProviderBusyError, provider_limits
 
-load_dotenv()
+PRE_SEARCH_ENABLED = os.environ.get("PRE_SEARCH_ENABLED", "true").lower() in ("1", "true", "yes")
 
 class AgentService:
-    def __init__(self):
-        self.gemini_service = GeminiService()
-        self.groq_service = GroqService()
-        self.tavily_service = TavilyService()
+    def __init__(self, registry=None, response_cache=None, router=None, limits=None):
+        self.registry = registry or agent_registry
+        self.response_cache = response_cache if response_cache is not None else default_response_cache
+        self.router = router or provider_router
+        self.limits = limits or provider_limits
         self.agent_roles = AgentRoles()
     
+    @property
+    def gemini_service(self):
+        return self.registry.get_service("gemini", GeminiService)
+    
+    @property
+    def groq_service(self):
+        return self.registry.get_service("groq", GroqService)
+    
+    @property
+    def tavily_service(self):
+        return self.registry.get_service("tavily", TavilyService)
+    
     def get_search_tool(self, max_results=2):
-        return self.tavily_service.get_search_tool(max_results)
+        return self.registry.get_tool(
+            ("tavily", max_results),
+            lambda: self.tavily_service.get_search_tool(max_results)
+        )
     
-    def get_llm_by_provider(self, provider, model=None, temperature=None):
+    def get_provider_service(self, provider):
+        if provider.lower() in ("gemini", "groq") and provider.lower() not in ENABLED_PROVIDERS:
+            raise UnsupportedProviderError(f"Provider {provider} is not enabled on this server (ENABLED_PROVIDERS)")
         if provider.lower() == "gemini":
-            return self.gemini_service.get_llm(model, temperature)
+            return self.gemini_service
         elif provider.lower() == "groq":
-            return self.groq_service.get_llm(model, temperature)
+            return self.groq_service
         else:
-            raise ValueError(f"Unsupported provider: {provider}. Use 'Gemini' or 'Groq'")
+            raise UnsupportedProviderError(f"Unsupported provider: {provider}. Use 'Gemini' or 'Groq'")
+    
+    def get_llm_key(self, provider, model=None, temperature=None):
+        service = self.get_provider_service(provider)
+        return (
+            provider.lower(),
+            model or service.model,
+            float(temperature if temperature is not None else service.temperature)
+        )
+    
+    def get_llm_by_provider(self, provider, model=None, temperature=None):
+        service = self.get_provider_service(provider)
+        return self.registry.get_llm(
+            self.get_llm_key(provider, model, temperature),
+            lambda: service.get_llm(model, temperature)
+        )
+    
+    def get_provider_slot(self, provider, model=None):
+        return self.limits.slot(provider, model, self.get_provider_service(provider))
     
     def create_role_based_system_prompt(self, role):
         return self.agent_roles.get_role_prompt(role)
     
-    def get_response_from_ai_agent(self, provider, query, role="default", allow_search=True, model=None, temperature=None):
+    def build_agent(self, provider, role="default", allow_search=True, model=None, temperature=None):
+        artifact = self.agent_roles.get_role_artifact(role)
+        # The prompt hash retires agents compiled from an older role definition.
+        key = self.get_llm_key(provider, model, temperature) + (role.lower(), bool(allow_search), artifact.prompt_hash)
+        return self.registry.get_agent(
+            key,
+            lambda: self._compile_agent(provider, artifact, allow_search, model, temperature)
+        )
+    
+    def _compile_agent(self, provider, artifact, allow_search, model, temperature):
+        llm = self.get_llm_by_provider(provider, model, temperature)
+        
+        # Budget, fan-out and pre-search are applied per run by the ToolRun in the config.
+        tools = [GuardedTool.wrap(self.get_search_tool())] if allow_search else []
+        
+        budget = self.agent_roles.get_role_budget(artifact.role_id)
+        
+        return create_react_agent(
+            model=llm,
+            tools=tools,
+            prompt=budget_prompt(artifact.system_message, budget)
+        )
+    
+    def build_config(self, role, callbacks=None):
+        config = {"callbacks": callbacks or []}
+        recursion_limit = self.agent_roles.get_role_budget(role).recursion_limit
+        if recursion_limit:
+            config["recursion_limit"] = recursion_limit
+        return config
+    
+    def run_config(self, config, role, pre_search=None):
+        """``config`` for one agent run (one attempt), with its own tool budget."""
+        return ToolRun(self.agent_roles.get_role_budget(role), pre_search).config(config)
+    
+    def start_pre_search(self, query, role, allow_search, callbacks=None):
+        """Start searching for the user's message while the first LLM call runs."""
+        if not (PRE_SEARCH_ENABLED and allow_search and self.agent_roles.uses_pre_search(role)):
+            return None
+        text = latest_user_text(query)
+        return PreSearch.start(self.get_search_tool(), text, callbacks) if text else None
+    
+    def get_cache_stats(self):
+        return self.registry.stats()
+    
+    def build_state(self, query):
+        if isinstance(query, str):
+            return {"messages": [{"role": "user", "content": query}]}
+        return {"messages": query}
+    
+    def extract_response(self, response, role="default"):
+        messages = response.get("messages", [])
+        
+        usage, exhausted = run_outcome(self.agent_roles.get_role_budget(role), messages)
+        agent_budget_stats.record(role.lower(), usage, exhausted)
+        
+        return best_effort_answer(messages) or "I apologize, but I couldn't generate a response."
+    
+    def get_cacheable_query(self, query):
+        if isinstance(query, str):
+            return query
+        if len(query) != 1:
+            return None
+        message = query[0]
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+        return content if isinstance(content, str) else None
+    
+    def get_cache_key(self, provider, query, role, allow_search, model, temperature):
+        if self.response_cache is None:
+            return None
+        
+        text = self.get_cacheable_query(query)
+        if text is None:
+            return None
+        
+        provider_key, model_key, _ = self.get_llm_key(provider, model, temperature)
+        return (role.lower(), provider_key, model_key, bool(allow_search), text)
+    
+    def get_cached_response(self, provider, query, role, allow_search, model, temperature):
+        cache_key = self.get_cache_key(provider, query, role, allow_search, model, temperature)
+        if cache_key is None:
+            return None, None
+        return cache_key, self.response_cache.lookup(*cache_key)
+    
+    async def aget_cached_response(self, provider, query, role, allow_search, model, temperature):
+        cache_key = self.get_cache_key(provider, query, role, allow_search, model, temperature)
+        if cache_key is None:
+            return None, None
+        return cache_key, await self.response_cache.alookup(*cache_key)
+    
+    def record_route(self, route, provider_name, model_name):
+        # Which candidate answered, for callers that persist or report it.
+        if route is not None:
+            route["provider"] = provider_name
+            route["model"] = model_name or self.get_provider_service(provider_name).model
+    
+    def store_cached_response(self, cache_key, response):
+        if cache_key is not None:
+            self.response_cache.store(*cache_key, response)
+    
+    async def astore_cached_response(self, cache_key, response):
+        if cache_key is not None:
+            await self.response_cache.astore(*cache_key, response)
+    
+    def get_response_from_ai_agent(self, provider, query, role="default", allow_search=True, model=None, temperature=None,
+                                   callbacks=None, route=None):
         try:
-            llm = self.get_llm_by_provider(provider, model, temperature)
+            cache_key, cached = self.get_cached_response(provider, query, role, allow_search, model, temperature)
+            if cached is not None:
+                return cached
             
-            tools = [self.get_search_tool()] if allow_search else []
+            state = self.build_state(query)
             
-            system_prompt = self.create_role_based_system_prompt(role)
+            def invoke(provider_name, model_name):
+                agent = self.build_agent(provider_name, role, allow_search, model_name, temperature)
+                config = self.run_config(self.build_config(role, callbacks), role)
+                return self.extract_response(agent.invoke(state, config=config), role), provider_name, model_name
             
-            agent = create_react_agent(
-                model=llm,
-                tools=tools,
-                prompt=SystemMessage(content=system_prompt)
-            )
+            ai_response, provider_name, model_name = self.router.run_sync(provider, model, invoke)
+            self.record_route(route, provider_name, model_name)
+            self.store_cached_response(cache_key, ai_response)
+            return ai_response
             
-            if isinstance(query, str):
-                state = {"messages": [{"role": "user", "content": query}]}
-            else:
-                state = {"messages": query}
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    async def aget_response_from_ai_agent(self, provider, query, role="default", allow_search=True, model=None, temperature=None,
+                                          callbacks=None, route=None):
+        try:
+            cache_key, cached = await self.aget_cached_response(provider, query, role, allow_search, model, temperature)
+            if cached is not None:
+                return cached
             
-            response = agent.invoke(state)
-            messages = response.get("messages", [])
+            state = self.build_state(query)
+            pre_search = self.start_pre_search(query, role, allow_search, callbacks)
+            config = self.build_config(role, [*(callbacks or []), self.limits.callback])
             
-            ai_messages = [message.content for message in messages if isinstance(message, AIMessage)]
+            async def ainvoke(provider_name, model_name):
+                agent = self.build_agent(provider_name, role, allow_search, model_name, temperature)
+                run_config = self.run_config(config, role, pre_search)
+                return self.extract_response(await agent.ainvoke(state, config=run_config), role), provider_name, model_name
             
-            return ai_messages[-1] if ai_messages else "I apologize, but I couldn't generate a response."
+            try:
+                ai_response, provider_name, model_name = await self.router.run(provider, model, ainvoke,
+                                                                               slot=self.get_provider_slot)
+            finally:
+                if pre_search is not None:
+                    pre_search.cancel()
+            self.record_route(route, provider_name, model_name)
+            await self.astore_cached_response(cache_key, ai_response)
+            return ai_response
             
         except Exception as e:
             return f"Error: {str(e)}"
-    
\ No newline at end of file
+    
+    async def astream_response_from_ai_agent(self, provider, query, role="default", allow_search=True, model=None, temperature=None,
+                                             callbacks=None, route=None):
+        pre_search = None
+        try:
+            cache_key, cached = await self.aget_cached_response(provider, query, role, allow_search, model, temperature)
+            if cached is not None:
+                yield {"type": "token", "content": cached}
+                yield {"type": "final", "content": cached}
+                return
+            
+            pre_search = self.start_pre_search(query, role, allow_search, callbacks)
+            config = self.build_config(role, [*(callbacks or []), self.limits.callback])
+            
+            # Streams cannot be hedged; fail over only while nothing has been sent yet.
+            candidates = self.router.candidates(provider, model)
+            candidate = self.router.next_candidate(candidates)
+            while True:
+                if candidate is None:
+                    raise ProviderUnavailableError(f"No available provider for {provider} (circuit open)")
+                provider_name, model_name = candidate
+                emitted = False
+                started = None
+                try:
+                    final_response = None
+                    async with self.get_provider_slot(provider_name, model_name):
+                        self.router.counters["attempts"] += 1
+                        started = time.perf_counter()
+                        agent = self.build_agent(provider_name, role, allow_search, model_name, temperature)
+                        run_config = self.run_config(config, role, pre_search)
+                        tool_runs = set()
+                        async for event in agent.astream_events(self.build_state(query), config=run_config, version="v2"):
+                            kind = event["event"]
+                            if kind == "on_chat_model_stream":
+                                content = event["data"]["chunk"].content
+                                if content and isinstance(content, str):
+                                    emitted = True
+                                    yield {"type": "token", "content": content}
+                            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                                final_response = self.extract_response(event["data"].get("output") or {}, role)
+                            elif kind == "on_tool_start":
+                                # Tools called by a wrapper tool are part of the wrapper's call.
+                                if tool_runs.intersection(event.get("parent_ids") or ()):
+                                    continue
+                                tool_runs.add(event["run_id"])
+                                emitted = True
+                                yield {"type": "tool_start", "name": event["name"], "input": event["data"].get("input")}
+                            elif kind == "on_tool_end" and event["run_id"] in tool_runs:
+                                yield {"type": "tool_end", "name": event["name"]}
+                    self.router.record(provider_name, True, (time.perf_counter() - started) * 1000)
+                    self.record_route(route, provider_name, model_name)
+                    break
+                except Exception as e:
+                    if started is not None and not isinstance(e, ProviderBusyError):
+                        self.router.record(provider_name, False, (time.perf_counter() - started) * 1000)
+                    candidate = None if emitted else self.router.next_candidate(candidates)
+                    if candidate is None:
+                        raise
+                    self.router.counters["failovers"] += 1
+            
+            final_response = final_response or "I apologize, but I couldn't generate a response."
+            await self.astore_cached_response(cache_key, final_response)
+            yield {"type": "final", "content": final_response}
+            
+        except Exception as e:
+            yield {"type": "error", "content": str(e)}
+            yield {"type": "final", "content": f"Error: {str(e)}"}
+        finally:
+            if pre_search is not None:
+                pre_search.cancel()
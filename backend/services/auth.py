@@ -1,7 +1,11 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import metrics
+import asyncio
 import os
+import time
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -9,6 +13,59 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+class PasswordHashPool:
+    """Bounded thread pool for bcrypt work so logins never stall the event loop.
+
+    At most ``max_workers`` hashes run at once (bcrypt releases the GIL);
+    the rest queue up, which is what ``queue_depth`` reports.
+    """
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+
+    @property
+    def queue_depth(self):
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            return await loop.run_in_executor(self._executor, self._timed, fn, time.perf_counter(), args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def _timed(self, fn, submitted, args):
+        started = time.perf_counter()
+        metrics.observe("password_hash.wait", (started - submitted) * 1000)
+        try:
+            return fn(*args)
+        finally:
+            metrics.observe("password_hash.run", (time.perf_counter() - started) * 1000)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed
+        }
+
+
+password_hash_pool = PasswordHashPool(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+)
+
 class AuthService:
     def hash_password(password: str) -> str:
         return pwd_context.hash(password)
@@ -16,6 +73,12 @@ class AuthService:
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         return pwd_context.verify(plain_password, hashed_password)
     
+    async def ahash_password(password: str) -> str:
+        return await password_hash_pool.run(pwd_context.hash, password)
+    
+    async def averify_password(plain_password: str, hashed_password: str) -> bool:
+        return await password_hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+    
     def create_access_token(data: dict, expires_delta: timedelta = None):
         to_encode = data.copy()
         if expires_delta:
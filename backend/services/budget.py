@@ -0,0 +1,177 @@
+import threading
+from typing import List, Optional
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from .memory import estimate_tokens
+
+STEPS = "steps"
+TOOL_CALLS = "tool_calls"
+TOKENS = "tokens"
+
+# Returned by create_react_agent when it runs out of steps mid tool-call.
+OUT_OF_STEPS_MESSAGE = "Sorry, need more steps to process this request."
+
+# Returned in place of a tool result once the run's tool budget is spent.
+TOOL_BUDGET_MESSAGE = "Tool budget exhausted; answer with the information already gathered."
+
+ANSWER_NOW_PROMPT = (
+    "Your research budget for this request is used up. Do not call any more tools. "
+    "Answer now using only the information already gathered above, and say briefly "
+    "if anything could not be verified."
+)
+
+
+class RoleBudget:
+    """Per-role limits on one agent run.
+
+    ``max_steps`` counts model calls, ``max_tool_calls`` counts executed tool
+    calls and ``max_tokens`` the tokens used by model output and tool
+    results in this run. 0 disables a limit.
+    """
+
+    def __init__(self, max_steps=0, max_tool_calls=0, max_tokens=0):
+        self.max_steps = max_steps
+        self.max_tool_calls = max_tool_calls
+        self.max_tokens = max_tokens
+
+    @property
+    def recursion_limit(self) -> Optional[int]:
+        # One graph step per model call plus one per tool round in between.
+        return 2 * self.max_steps if self.max_steps else None
+
+    def as_dict(self):
+        return {"max_steps": self.max_steps, "max_tool_calls": self.max_tool_calls, "max_tokens": self.max_tokens}
+
+
+def current_turn(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Messages produced after the latest user message."""
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return messages[index + 1:]
+    return list(messages)
+
+
+def is_refused(message: BaseMessage) -> bool:
+    return isinstance(message, ToolMessage) and message.content == TOOL_BUDGET_MESSAGE
+
+
+def turn_usage(messages: List[BaseMessage]) -> dict:
+    steps = tool_calls = tokens = 0
+    for message in current_turn(messages):
+        if isinstance(message, AIMessage):
+            steps += 1
+            usage = message.usage_metadata
+            tokens += usage["output_tokens"] if usage else estimate_tokens(str(message.content))
+        elif isinstance(message, ToolMessage) and not is_refused(message):
+            tool_calls += 1
+            tokens += estimate_tokens(str(message.content))
+    return {STEPS: steps, TOOL_CALLS: tool_calls, TOKENS: tokens}
+
+
+def exhausted_limit(budget: RoleBudget, usage: dict, remaining_steps: Optional[int] = None) -> Optional[str]:
+    """Which limit, if any, leaves no room for another tool round."""
+    if remaining_steps is not None and remaining_steps <= 2:
+        return STEPS
+    if budget.max_steps and usage[STEPS] >= budget.max_steps - 1:
+        return STEPS
+    if budget.max_tool_calls and usage[TOOL_CALLS] >= budget.max_tool_calls:
+        return TOOL_CALLS
+    if budget.max_tokens and usage[TOKENS] >= budget.max_tokens:
+        return TOKENS
+    return None
+
+
+def budget_prompt(system_message: SystemMessage, budget: RoleBudget):
+    """create_react_agent prompt that tells the model to wrap up once the budget is spent."""
+
+    def prompt(state):
+        messages = [system_message] + list(state["messages"])
+        if exhausted_limit(budget, turn_usage(state["messages"]), state.get("remaining_steps")):
+            messages.append(SystemMessage(content=ANSWER_NOW_PROMPT))
+        return messages
+
+    return prompt
+
+
+def best_effort_answer(messages: List[BaseMessage]) -> Optional[str]:
+    """Final answer of a run, or the best available one if it ran out of steps.
+
+    Returns None when the run produced nothing usable.
+    """
+    turn = current_turn(messages)
+    ai_messages = [message for message in turn if isinstance(message, AIMessage)]
+    if ai_messages and ai_messages[-1].content and ai_messages[-1].content != OUT_OF_STEPS_MESSAGE \
+            and not ai_messages[-1].tool_calls:
+        return ai_messages[-1].content
+
+    drafts = [message.content for message in ai_messages
+              if isinstance(message.content, str) and message.content and message.content != OUT_OF_STEPS_MESSAGE]
+    findings = [str(message.content) for message in turn
+                if isinstance(message, ToolMessage) and not is_refused(message) and message.status != "error"]
+    if drafts:
+        return drafts[-1]
+    if findings:
+        excerpt = findings[-1][:1500]
+        return ("I ran out of research steps before I could finish a full answer. "
+                f"Here is the most relevant information I found:\n\n{excerpt}")
+    return None
+
+
+def run_outcome(budget: RoleBudget, messages: List[BaseMessage]):
+    """Usage of a finished run and the limit it ran into, if any."""
+    usage = turn_usage(messages)
+    turn = current_turn(messages)
+    exhausted = None
+    if any(isinstance(message, AIMessage) and message.content == OUT_OF_STEPS_MESSAGE for message in turn):
+        exhausted = STEPS
+    elif budget.max_tokens and usage[TOKENS] >= budget.max_tokens:
+        exhausted = TOKENS
+    elif any(is_refused(message) for message in turn) or (
+            budget.max_tool_calls and usage[TOOL_CALLS] >= budget.max_tool_calls):
+        exhausted = TOOL_CALLS
+    elif budget.max_steps and usage[STEPS] >= budget.max_steps:
+        exhausted = STEPS
+    return usage, exhausted
+
+
+class AgentBudgetStats:
+    """How many steps, tool calls and tokens each role's agent runs use."""
+
+    def __init__(self):
+        self._roles = {}
+        self._lock = threading.Lock()
+
+    def record(self, role: str, usage: dict, exhausted: Optional[str] = None):
+        with self._lock:
+            stats = self._roles.get(role)
+            if stats is None:
+                stats = self._roles[role] = {
+                    "runs": 0, STEPS: {}, TOOL_CALLS: 0, TOKENS: 0, "max_steps_used": 0,
+                    "exhausted": {STEPS: 0, TOOL_CALLS: 0, TOKENS: 0}
+                }
+            stats["runs"] += 1
+            stats[STEPS][usage[STEPS]] = stats[STEPS].get(usage[STEPS], 0) + 1
+            stats[TOOL_CALLS] += usage[TOOL_CALLS]
+            stats[TOKENS] += usage[TOKENS]
+            stats["max_steps_used"] = max(stats["max_steps_used"], usage[STEPS])
+            if exhausted:
+                stats["exhausted"][exhausted] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                role: {
+                    **stats,
+                    STEPS: dict(sorted(stats[STEPS].items())),
+                    "avg_steps": round(sum(k * v for k, v in stats[STEPS].items()) / stats["runs"], 2),
+                    "avg_tool_calls": round(stats[TOOL_CALLS] / stats["runs"], 2),
+                    "exhausted": dict(stats["exhausted"])
+                }
+                for role, stats in self._roles.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._roles.clear()
+
+
+agent_budget_stats = AgentBudgetStats()
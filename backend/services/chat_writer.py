@@ -0,0 +1,493 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from backend.database.db import SessionLocal
+from backend.database.migrations.chat import Chat, ChatSession
+from .metrics import metrics
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): a single process owns the spool.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying as is; anything else is a problem with the rows themselves.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+
+TABLES = {"chats": Chat, "chat_sessions": ChatSession}
+UUID_FIELDS = ("id", "user_id", "session_id")
+DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def _encode(row):
+    return {key: str(value) if isinstance(value, (uuid.UUID, datetime)) else value for key, value in row.items()}
+
+
+def _decode(row):
+    row = dict(row)
+    for key in UUID_FIELDS:
+        if row.get(key) is not None:
+            row[key] = uuid.UUID(row[key])
+    for key in DATETIME_FIELDS:
+        if row.get(key) is not None:
+            row[key] = datetime.fromisoformat(row[key])
+    return row
+
+
+def spool_slot_path(path, slot):
+    if slot == 0:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{slot}{ext}"
+
+
+def _try_lock(path):
+    lock = open(path + ".lock", "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+def claim_spool(path, max_slots=1024):
+    """First spool slot of ``path`` that no live process holds, and its lock.
+
+    Each worker process writes its own spool: slot 0 is ``path`` itself,
+    slot i is ``<stem>.<i><ext>``. The flock on ``<slot>.lock`` is dropped by
+    the OS when the process exits, so a recycled worker takes over (and
+    replays) the spool of the one it replaced.
+    """
+    if fcntl is None:
+        return path, None
+    for slot in range(max_slots):
+        slot_path = spool_slot_path(path, slot)
+        lock = _try_lock(slot_path)
+        if lock is not None:
+            return slot_path, lock
+    raise RuntimeError(f"No free chat spool slot for {path}")
+
+
+class ChatWriteBehind:
+    """Write-behind persistence for chat turns and new sessions.
+
+    Requests queue rows and wait until the spool thread has appended them to
+    a local spool file (one fsync per group when ``fsync`` is set), so a
+    turn the client has received survives a crash of the process; the
+    request path does no file I/O itself, and ``aadd_chat`` waits without
+    blocking the event loop. If the spool does not answer within
+    ``spool_timeout`` the request goes on and the row stays queued: only
+    rows still waiting in memory at that point are lost on a crash. The
+    spool thread hands the rows to the writer thread, which bulk-inserts
+    them in batches of ``batch_size`` or every ``flush_interval`` seconds,
+    whichever comes first. Once a batch is
+    stored, the spool prefix up to its last row is acknowledged: the file is
+    truncated when everything in it is stored, and rewritten from the
+    acknowledged offset once that prefix exceeds ``rotate_bytes``, so it
+    stays bounded under steady load.
+
+    Connection-level errors are retried up to ``max_retries`` times with
+    backoff; other errors (constraint violations, bad values) split the
+    batch until the offending rows are isolated. Rows that cannot be written
+    go to the dead-letter file, in the spool's line format plus the error,
+    so one bad row never blocks the rows behind it.
+
+    On start-up any spooled row that was never stored (and is not already in
+    the database) is replayed the same way; a replay that fails is logged
+    and dead-lettered rather than stopping the worker. With several worker
+    processes each claims its own spool slot (see ``claim_spool``) and also
+    replays slots left behind by workers that no longer run.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_size=100, flush_interval=0.5,
+                 spool_path="chat_spool.jsonl", fsync=False, max_retries=3, dead_letter_path=None,
+                 rotate_bytes=1 << 20, spool_timeout=5.0):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.base_spool_path = spool_path
+        self.spool_path = spool_path
+        self.fsync = fsync
+        self.max_retries = max_retries
+        stem, ext = os.path.splitext(spool_path)
+        self.dead_letter_path = dead_letter_path or f"{stem}.dead{ext}"
+        self.rotate_bytes = rotate_bytes
+        self.spool_timeout = spool_timeout
+        self.enqueued = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+        self.recovered = 0
+        self.rotations = 0
+        self.spool_timeouts = 0
+        self._queue = queue.Queue()
+        self._spooled = queue.Queue()
+        self._pending_sessions = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._spool = None
+        self._spool_lock = None
+        # Absolute spool offsets: bytes written, bytes stored, bytes already dropped from the file.
+        self._written = 0
+        self._acked = 0
+        self._base = 0
+        self._abandoned = False
+        self._thread = None
+        self._spool_thread = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self.spool_path, self._spool_lock = claim_spool(self.base_spool_path)
+            self._recover(self.spool_path)
+            self._recover_orphans()
+            self._spool = open(self.spool_path, "ab")
+            self._written = self._acked = self._base = 0
+            self._abandoned = False
+            self._spool_thread = threading.Thread(target=self._spool_loop, name="chat-spool", daemon=True)
+            self._thread = threading.Thread(target=self._run, name="chat-write-behind", daemon=True)
+            self._spool_thread.start()
+            self._thread.start()
+
+    def add_session(self, user_id: uuid.UUID, session_id: uuid.UUID, title: str = None) -> dict:
+        now = datetime.now(timezone.utc)
+        row = {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "session_id": session_id,
+            "title": title,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now
+        }
+        self._pending_sessions[session_id] = row
+        self._wait(self._enqueue("chat_sessions", row))
+        return row
+
+    def add_chat(self, **fields) -> dict:
+        row = {"id": uuid.uuid4(), "created_at": datetime.now(timezone.utc), **fields}
+        self._wait(self._enqueue("chats", row))
+        return row
+
+    async def aadd_chat(self, **fields) -> dict:
+        """``add_chat`` for the event loop: waits for the spool without blocking it."""
+        row = {"id": uuid.uuid4(), "created_at": datetime.now(timezone.utc), **fields}
+        spooled = self._enqueue("chats", row)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(spooled), self.spool_timeout)
+        except asyncio.TimeoutError:
+            self._spool_timed_out()
+        return row
+
+    def _wait(self, spooled: Future):
+        try:
+            spooled.result(self.spool_timeout)
+        except FutureTimeoutError:
+            self._spool_timed_out()
+
+    def _spool_timed_out(self):
+        self.spool_timeouts += 1
+        logger.warning("Chat spool did not answer within %ss; the row is queued but not yet durable",
+                       self.spool_timeout)
+
+    def pending_session(self, session_id: uuid.UUID):
+        return self._pending_sessions.get(session_id)
+
+    def _enqueue(self, table, row) -> Future:
+        """Queue ``row``; the returned future resolves once it is in the spool file."""
+        if self._thread is None:
+            self.start()
+        # No file I/O here: this runs on the request's event loop.
+        with self._lock:
+            self._pending += 1
+        self.enqueued += 1
+        spooled = Future()
+        self._queue.put({"table": table, "row": row, "spooled": spooled})
+        return spooled
+
+    def _spool_loop(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                records = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                records = []
+            while records and len(records) < self.batch_size:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if records:
+                self._append(records)
+            self._rotate()
+        self._spooled.put(None)
+
+    def _append(self, records):
+        offsets = []
+        try:
+            for record in records:
+                line = (json.dumps({"table": record["table"], "row": _encode(record["row"])}) + "\n").encode("utf-8")
+                self._spool.write(line)
+                self._written += len(line)
+                offsets.append(self._written)
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+        except OSError:
+            # Still hand the rows to the writer; they are just not crash-safe.
+            logger.error("Could not append %d chat row(s) to %s", len(records), self.spool_path, exc_info=True)
+            offsets += [self._written] * (len(records) - len(offsets))
+        for record, offset in zip(records, offsets):
+            self._spooled.put((record, offset))
+            record["spooled"].set_result(offset)
+
+    def _rotate(self):
+        """Drop the stored prefix of the spool. Runs on the spool thread, which owns the file."""
+        acked = self._acked
+        if acked <= self._base:
+            return
+        if acked == self._written:
+            self._spool.seek(0)
+            self._spool.truncate()
+        elif acked - self._base >= self.rotate_bytes:
+            with open(self.spool_path, "rb") as spool:
+                spool.seek(acked - self._base)
+                tail = spool.read()
+            rotated = self.spool_path + ".tmp"
+            with open(rotated, "wb") as spool:
+                spool.write(tail)
+                spool.flush()
+                if self.fsync:
+                    os.fsync(spool.fileno())
+            self._spool.close()
+            os.replace(rotated, self.spool_path)
+            self._spool = open(self.spool_path, "ab")
+        else:
+            return
+        self._base = acked
+        self.rotations += 1
+
+    def _run(self):
+        done = False
+        while not done:
+            batch, done = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _next_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._spooled.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _flush(self, batch):
+        if self._abandoned:
+            # A batch was left unstored at shutdown; later rows stay in the spool behind it.
+            return
+        started = time.perf_counter()
+        records = [record for record, _ in batch]
+        if not self._write(records):
+            self._abandoned = True
+            return
+
+        for record in records:
+            if record["table"] == "chat_sessions":
+                self._pending_sessions.pop(record["row"]["session_id"], None)
+        with self._lock:
+            self._pending -= len(batch)
+        self._acked = batch[-1][1]
+        self.flushed += len(batch)
+        self.batches += 1
+        metrics.observe("chat_write.flush", (time.perf_counter() - started) * 1000)
+
+    def _write(self, records):
+        """Insert ``records``, dead-lettering the ones that cannot be stored.
+
+        Returns False only if a transient error hit during shutdown, in which
+        case nothing was stored and the rows stay in the spool for replay.
+        """
+        # Sessions first, so splitting never puts a chat ahead of its session.
+        records = sorted(records, key=lambda record: record["table"] != "chat_sessions")
+        error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._insert(records)
+                return True
+            except TRANSIENT_ERRORS as e:
+                error = e
+                self.failed_batches += 1
+                if self._stopping.is_set():
+                    return False
+                if attempt < self.max_retries:
+                    time.sleep(self.flush_interval * 2 ** attempt)
+            except Exception as e:
+                error = e
+                self.failed_batches += 1
+                if len(records) > 1:
+                    middle = len(records) // 2
+                    return self._write(records[:middle]) and self._write(records[middle:])
+                break
+        self._dead_letter(records, error)
+        return True
+
+    def _insert(self, records):
+        rows = {table: [] for table in TABLES}
+        for record in records:
+            rows[record["table"]].append(record["row"])
+        db = self.session_factory()
+        try:
+            for table, model in TABLES.items():
+                if rows[table]:
+                    db.execute(insert(model), rows[table])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _dead_letter(self, records, error):
+        reason = f"{type(error).__name__}: {error}"[:500]
+        with open(self.dead_letter_path, "a", encoding="utf-8") as dead:
+            for record in records:
+                dead.write(json.dumps({"table": record["table"], "row": _encode(record["row"]),
+                                       "error": reason}) + "\n")
+        self.dead_lettered += len(records)
+        logger.warning("Moved %d chat row(s) to %s: %s", len(records), self.dead_letter_path, reason)
+
+    def _recover_orphans(self):
+        if fcntl is None:
+            return
+        stem, ext = os.path.splitext(self.base_spool_path)
+        slots = [path for path in glob.glob(f"{glob.escape(stem)}.*{ext}")
+                 if path[len(stem) + 1:len(path) - len(ext)].isdigit()]
+        for path in slots + [self.base_spool_path]:
+            if path == self.spool_path or not os.path.exists(path):
+                continue
+            lock = _try_lock(path)
+            if lock is None:
+                continue
+            try:
+                self._recover(path)
+            finally:
+                lock.close()
+
+    def _recover(self, spool_path):
+        if not os.path.exists(spool_path):
+            return
+        entries, acked = {}, set()
+        with open(spool_path, encoding="utf-8") as spool:
+            for line in spool:
+                try:
+                    entry = json.loads(line)
+                    if "ack" in entry:
+                        # Spools written before offset rotation.
+                        acked.update(entry["ack"])
+                    else:
+                        entries[entry["row"]["id"]] = {"table": entry["table"], "row": _decode(entry["row"])}
+                except (ValueError, KeyError, TypeError):
+                    # Torn final line from a crash mid-write.
+                    continue
+
+        records = [record for row_id, record in entries.items() if row_id not in acked]
+        if records:
+            try:
+                db = self.session_factory()
+                try:
+                    for table, model in TABLES.items():
+                        ids = [record["row"]["id"] for record in records if record["table"] == table]
+                        if ids:
+                            existing = {row_id for (row_id,) in db.query(model.id).filter(model.id.in_(ids))}
+                            records = [record for record in records
+                                       if record["table"] != table or record["row"]["id"] not in existing]
+                finally:
+                    db.close()
+                dead_before = self.dead_lettered
+                self._write(records)
+                self.recovered += len(records) - (self.dead_lettered - dead_before)
+            except Exception as e:
+                # Never fail start-up over the spool; keep the rows for a manual replay.
+                logger.warning("Could not replay chat spool %s", spool_path, exc_info=True)
+                self._dead_letter(records, e)
+
+        os.remove(spool_path)
+
+    def shutdown(self, timeout=None):
+        """Flush everything still queued and stop the writer threads."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._spool_thread.join(timeout)
+        self._thread.join(timeout)
+        with self._lock:
+            self._rotate()
+            self._spool.close()
+            if self._spool_lock is not None:
+                self._spool_lock.close()
+                self._spool_lock = None
+            self._thread = None
+            self._spool_thread = None
+
+    def stats(self):
+        return {
+            "spool_path": self.spool_path,
+            "spool_bytes": self._written - self._base,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "pending": self._pending,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "dead_lettered": self.dead_lettered,
+            "dead_letter_path": self.dead_letter_path,
+            "rotations": self.rotations,
+            "spool_timeouts": self.spool_timeouts,
+            "recovered": self.recovered
+        }
+
+
+def build_chat_writer():
+    # A turn is acknowledged to the client once it is in the spool file
+    # (fsynced with CHAT_WRITE_SPOOL_FSYNC); CHAT_WRITE_SPOOL_TIMEOUT caps
+    # that wait, after which the row is only queued in memory.
+    if os.environ.get("CHAT_WRITE_BEHIND", "false").lower() not in ("1", "true", "yes"):
+        return None
+
+    return ChatWriteBehind(
+        batch_size=int(os.environ.get("CHAT_WRITE_BATCH_SIZE", "100")),
+        flush_interval=float(os.environ.get("CHAT_WRITE_FLUSH_INTERVAL", "0.5")),
+        spool_path=os.environ.get("CHAT_WRITE_SPOOL_PATH", "chat_spool.jsonl"),
+        fsync=os.environ.get("CHAT_WRITE_SPOOL_FSYNC", "false").lower() in ("1", "true", "yes"),
+        max_retries=int(os.environ.get("CHAT_WRITE_MAX_RETRIES", "3")),
+        dead_letter_path=os.environ.get("CHAT_WRITE_DEAD_LETTER_PATH") or None,
+        rotate_bytes=int(os.environ.get("CHAT_WRITE_SPOOL_ROTATE_BYTES", str(1 << 20))),
+        spool_timeout=float(os.environ.get("CHAT_WRITE_SPOOL_TIMEOUT", "5"))
+    )
+
+
+chat_writer = build_chat_writer()
@@ -0,0 +1,171 @@
+import os
+import re
+import threading
+from typing import Any, List, Optional
+from langchain_core.callbacks.manager import adispatch_custom_event, dispatch_custom_event
+from langchain_core.tools import BaseTool
+from .memory import estimate_tokens
+from .metrics import metrics
+from .response_cache import normalize_query
+
+COMPACTION_EVENT = "tool_compaction"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+
+def result_tokens(results) -> int:
+    return estimate_tokens(str(results))
+
+
+class ToolResultCompactor:
+    """Shrinks search results before they are fed back to the LLM.
+
+    Results with a URL already seen are dropped, and so is any sentence
+    that already appeared in an earlier result. With ``summarize`` on,
+    each result keeps only its ``summary_sentences`` sentences that share
+    the most terms with the query, in their original order. Each result is
+    then cut to ``max_result_tokens`` and the whole list to ``max_tokens``.
+    """
+
+    def __init__(self, max_tokens=800, max_result_tokens=300, summarize=False, summary_sentences=3):
+        self.max_tokens = max_tokens
+        self.max_result_tokens = max_result_tokens
+        self.summarize = summarize
+        self.summary_sentences = summary_sentences
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self._lock = threading.Lock()
+
+    def _summarize(self, sentences: List[str], query_terms: set) -> List[str]:
+        if len(sentences) <= self.summary_sentences:
+            return sentences
+        scored = sorted(
+            range(len(sentences)),
+            key=lambda index: (-len(query_terms & set(normalize_query(sentences[index]).split())), index)
+        )
+        keep = set(scored[:self.summary_sentences])
+        return [sentence for index, sentence in enumerate(sentences) if index in keep]
+
+    def _truncate(self, sentences: List[str], budget: int) -> List[str]:
+        kept, used = [], 0
+        for sentence in sentences:
+            tokens = estimate_tokens(sentence)
+            if used + tokens > budget:
+                if not kept:
+                    # Keep a prefix of an overlong first sentence rather than nothing.
+                    kept.append(sentence[:budget * 4].rstrip() + "...")
+                break
+            kept.append(sentence)
+            used += tokens
+        return kept
+
+    def compact(self, results: Any, query: str = "") -> Any:
+        """Compacted copy of a list of search results; anything else is returned as is."""
+        if not isinstance(results, list) or not all(isinstance(result, dict) for result in results):
+            return results
+
+        query_terms = set(normalize_query(query).split())
+        seen_urls, seen_sentences = set(), set()
+        compacted, remaining = [], self.max_tokens
+        for result in results:
+            url = result.get("url")
+            if url and url in seen_urls:
+                continue
+            seen_urls.add(url)
+
+            sentences = []
+            for sentence in split_sentences(str(result.get("content", ""))):
+                key = normalize_query(sentence)
+                if key and key not in seen_sentences:
+                    seen_sentences.add(key)
+                    sentences.append(sentence)
+            if not sentences:
+                continue
+            if self.summarize:
+                sentences = self._summarize(sentences, query_terms)
+
+            sentences = self._truncate(sentences, min(self.max_result_tokens, remaining))
+            if not sentences:
+                break
+            content = " ".join(sentences)
+            remaining -= estimate_tokens(content)
+            compacted.append({**result, "content": content})
+            if remaining <= 0:
+                break
+
+        before, after = result_tokens(results), result_tokens(compacted)
+        with self._lock:
+            self.calls += 1
+            self.tokens_in += before
+            self.tokens_out += after
+        metrics.observe("tool.tokens_saved", before - after)
+        return compacted
+
+    def stats(self):
+        return {
+            "max_tokens": self.max_tokens,
+            "max_result_tokens": self.max_result_tokens,
+            "summarize": self.summarize,
+            "calls": self.calls,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_saved": self.tokens_in - self.tokens_out
+        }
+
+
+class CompactingSearchTool(BaseTool):
+    """Search tool wrapper that compacts results and reports the tokens saved.
+
+    The saving is sent as a ``tool_compaction`` custom callback event, which
+    the request's TimingCallbackHandler adds up per request.
+    """
+
+    search_tool: BaseTool
+    compactor: Any
+
+    def _compact(self, query, results):
+        compacted = self.compactor.compact(results, query)
+        saved = result_tokens(results) - result_tokens(compacted) if compacted is not results else 0
+        return compacted, {"tool": self.name, "tokens_saved": saved}
+
+    def _run(self, query: str, run_manager: Optional[Any] = None):
+        compacted, event = self._compact(query, self.search_tool.invoke({"query": query}))
+        if run_manager is not None:
+            dispatch_custom_event(COMPACTION_EVENT, event, config={"callbacks": run_manager.get_child()})
+        return compacted
+
+    async def _arun(self, query: str, run_manager: Optional[Any] = None):
+        compacted, event = self._compact(query, await self.search_tool.ainvoke({"query": query}))
+        if run_manager is not None:
+            await adispatch_custom_event(COMPACTION_EVENT, event, config={"callbacks": run_manager.get_child()})
+        return compacted
+
+    @classmethod
+    def wrap(cls, search_tool, compactor):
+        return cls(
+            name=search_tool.name,
+            description=search_tool.description,
+            args_schema=search_tool.args_schema,
+            search_tool=search_tool,
+            compactor=compactor
+        )
+
+
+def build_tool_compactor():
+    if os.environ.get("TOOL_COMPACTION", "true").lower() not in ("1", "true", "yes"):
+        return None
+
+    return ToolResultCompactor(
+        max_tokens=int(os.environ.get("TOOL_RESULT_MAX_TOKENS", "800")),
+        max_result_tokens=int(os.environ.get("TOOL_RESULT_ITEM_MAX_TOKENS", "300")),
+        summarize=os.environ.get("TOOL_COMPACTION_SUMMARIZE", "false").lower() in ("1", "true", "yes"),
+        summary_sentences=int(os.environ.get("TOOL_SUMMARY_SENTENCES", "3"))
+    )
+
+
+tool_compactor = build_tool_compactor()
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+from backend.database.db import awarm_pool, engine, async_engine, warm_pool
+from .auth import password_hash_pool, pwd_context
+from .chat_writer import chat_writer
+from .registry import agent_registry
+from .routing import ENABLED_PROVIDERS
+from .session import SessionService
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_PROVIDERS = [p.strip().lower() for p in os.environ.get("WARMUP_PROVIDERS", ",".join(ENABLED_PROVIDERS)).split(",")
+                    if p.strip()]
+WARMUP_ROLES = [r.strip().lower() for r in os.environ.get("WARMUP_ROLES", "default").split(",") if r.strip()]
+WARMUP_DB_CONNECTIONS = int(os.environ.get("WARMUP_DB_CONNECTIONS", "0"))
+SHUTDOWN_DRAIN_TIMEOUT = float(os.environ.get("SHUTDOWN_DRAIN_TIMEOUT", "10"))
+
+
+class ServiceContainer:
+    """Process-wide services, built once and warmed up in the app lifespan.
+
+    The agent stack (LangGraph and the provider SDKs) is imported on first
+    use of ``agent_service``, not with the app. ``startup`` starts the
+    background workers; ``warm_up`` then does that import, creates the
+    provider clients, compiles the agents for WARMUP_ROLES, loads the bcrypt
+    backend and opens the DB pool. ``ready`` turns true once warm-up has
+    finished, whether or not every stage succeeded; failed stages are kept
+    in ``errors`` and are simply paid for again by the first request.
+
+    Work that outlives its request (e.g. persisting a turn whose client
+    disconnected) is registered with ``track``; ``shutdown`` waits up to
+    SHUTDOWN_DRAIN_TIMEOUT seconds for it before flushing the write-behind.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry or agent_registry
+        self.session_service = SessionService()
+        self._agent_service = None
+        self._lock = threading.Lock()
+        self.ready = False
+        self.created_at = time.monotonic()
+        self.ready_after_ms = None
+        self.warmup_ms: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._background = set()
+
+    @property
+    def agent_service(self):
+        if self._agent_service is None:
+            with self._lock:
+                if self._agent_service is None:
+                    from .agent import AgentService
+                    self._agent_service = AgentService(registry=self.registry)
+        return self._agent_service
+
+    def startup(self, extra_warmups: Dict[str, Callable] = None):
+        """Start background workers and kick off warm-up without blocking the server."""
+        if chat_writer is not None:
+            chat_writer.start()
+        if WARMUP_ENABLED:
+            self._warmup_task = asyncio.ensure_future(self.warm_up(extra_warmups))
+        else:
+            self._mark_ready()
+
+    async def _stage(self, name, fn, *args):
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                await fn(*args)
+            else:
+                # Off the event loop, so /health and early requests are served meanwhile.
+                await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {e}"
+        self.warmup_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def warm_up(self, extra_warmups: Dict[str, Callable] = None):
+        await self._stage("import.agent", lambda: self.agent_service)
+        for provider in WARMUP_PROVIDERS:
+            await self._stage(f"llm.{provider}", self.agent_service.get_llm_by_provider, provider)
+            for role in WARMUP_ROLES:
+                for allow_search in (True, False):
+                    await self._stage(
+                        f"agent.{provider}.{role}{'' if allow_search else '.no_search'}",
+                        self.agent_service.build_agent, provider, role, allow_search
+                    )
+        # Loading the bcrypt backend happens on the first hash otherwise.
+        await self._stage("bcrypt", pwd_context.handler("bcrypt").get_backend)
+        await self._stage("db_pool", warm_pool, WARMUP_DB_CONNECTIONS or None)
+        if async_engine is not None:
+            await self._stage("async_db_pool", awarm_pool, WARMUP_DB_CONNECTIONS or None)
+        for name, fn in (extra_warmups or {}).items():
+            await self._stage(name, fn)
+        self._mark_ready()
+
+    def _mark_ready(self):
+        self.ready = True
+        self.ready_after_ms = round((time.monotonic() - self.created_at) * 1000, 1)
+
+    def track(self, task: asyncio.Future) -> asyncio.Future:
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def shutdown(self):
+        self.ready = False
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+            await asyncio.gather(self._warmup_task, return_exceptions=True)
+        if self._background:
+            await asyncio.wait(set(self._background), timeout=SHUTDOWN_DRAIN_TIMEOUT)
+        if chat_writer is not None:
+            chat_writer.shutdown()
+        password_hash_pool.shutdown()
+        engine.dispose()
+        if async_engine is not None:
+            await async_engine.dispose()
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "ready_after_ms": self.ready_after_ms,
+            "background_tasks": len(self._background),
+            "warmup_ms": dict(self.warmup_ms),
+            "errors": dict(self.errors)
+        }
+
+
+service_container = ServiceContainer()
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", "120"))
+REQUEST_MAX_TIMEOUT = float(os.environ.get("REQUEST_MAX_TIMEOUT", "600"))
+
+COMPLETED = "completed"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def _parse_timeouts(value):
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        key, _, seconds = item.partition("=")
+        timeouts[key.strip().lower()] = float(seconds)
+    return timeouts
+
+
+ROLE_TIMEOUTS = _parse_timeouts(os.environ.get("REQUEST_ROLE_TIMEOUTS", ""))
+
+
+def resolve_timeout(role: str, provider_service=None, override: Optional[float] = None) -> float:
+    """Seconds a chat request may run.
+
+    An explicit ``override`` (from ``ChatRequest.timeout_seconds``) wins, up to
+    REQUEST_MAX_TIMEOUT. Otherwise the tightest of the role's timeout, the
+    provider's ``request_timeout`` and REQUEST_TIMEOUT applies.
+    """
+    if override:
+        return min(float(override), REQUEST_MAX_TIMEOUT)
+    candidates = [REQUEST_TIMEOUT, ROLE_TIMEOUTS.get(role.lower())]
+    if provider_service is not None:
+        candidates.append(getattr(provider_service, "request_timeout", None))
+    return min(timeout for timeout in candidates if timeout)
+
+
+class RequestDeadline:
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class PartialResponseCollector(BaseCallbackHandler):
+    """Keeps whatever the LLM produced so far, for persisting cut-off turns."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.tokens = []
+        self.last_message = ""
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.tokens.append(token)
+
+    def on_llm_end(self, response, **kwargs):
+        generations = getattr(response, "generations", None) or [[]]
+        if generations[0]:
+            self.last_message = generations[0][-1].text or self.last_message
+        self.tokens = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self.tokens) or self.last_message
+
+
+def cut_off_response(status: str, partial: str, deadline: RequestDeadline) -> str:
+    """The ai_response stored for a turn that did not complete."""
+    reason = (f"the request deadline of {deadline.timeout:g}s was exceeded" if status == TIMEOUT
+              else "the client disconnected")
+    if partial:
+        return f"{partial}\n\n[Response incomplete: {reason}.]"
+    return f"Error: Response incomplete: {reason}."
+
+
+async def _cancel(task):
+    if not task.done():
+        task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def run_with_deadline(awaitable: Awaitable, deadline: RequestDeadline,
+                            is_disconnected: Callable[[], Awaitable[bool]] = None, poll_interval=0.5):
+    """Await ``awaitable`` until the deadline or a client disconnect.
+
+    Returns ``(status, result)``; on timeout or disconnect the underlying
+    task (and with it any in-flight LLM or tool call) is cancelled and the
+    result is None.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                return TIMEOUT, None
+            wait = min(remaining, poll_interval) if is_disconnected else remaining
+            done, _ = await asyncio.wait({task}, timeout=wait)
+            if done:
+                return COMPLETED, task.result()
+            if is_disconnected and await is_disconnected():
+                return CANCELLED, None
+    finally:
+        await _cancel(task)
+
+
+async def iterate_with_deadline(events: AsyncIterator, deadline: RequestDeadline) -> AsyncIterator:
+    """Re-yield ``events`` but raise DeadlineExceeded once the deadline passes.
+
+    The source is consumed by its own task so it can be cancelled mid-call;
+    closing this iterator (e.g. on client disconnect) cancels it too.
+    """
+    queue = asyncio.Queue(maxsize=1)
+    done = object()
+
+    async def produce():
+        try:
+            async for event in events:
+                await queue.put((event, None))
+            await queue.put((done, None))
+        except Exception as e:
+            await queue.put((done, e))
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            try:
+                event, error = await asyncio.wait_for(queue.get(), deadline.remaining())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"Request deadline of {deadline.timeout:g}s exceeded")
+            if error is not None:
+                raise error
+            if event is done:
+                return
+            yield event
+    finally:
+        await _cancel(producer)
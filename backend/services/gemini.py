@@ -1,19 +1,24 @@
 import os
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-load_dotenv()
+from .rate_limit import parse_model_limits
 
 class GeminiService:
     def __init__(self):
         self.api_key = os.environ.get("GEMINI_API_KEY")
         self.model = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
         self.temperature = float(os.environ.get("GEMINI_TEMPERATURE", "0.7"))
+        self.max_concurrency = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "0"))
+        self.requests_per_minute = int(os.environ.get("GEMINI_RPM", "0"))
+        self.burst = int(os.environ.get("GEMINI_BURST", "0"))
+        self.model_limits = parse_model_limits(os.environ.get("GEMINI_MODEL_LIMITS", ""))
+        self.request_timeout = float(os.environ.get("GEMINI_REQUEST_TIMEOUT", "0")) or None
         
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
     
     def get_llm(self, model=None, temperature=None):
+        # The Google SDK is the slowest import in the app; only load it once Gemini is used.
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        
         model_name = model or self.model
         temp = temperature if temperature is not None else self.temperature
         
@@ -23,6 +28,15 @@ class GeminiService:
             temperature=temp
         )
     
+    def get_rate_limits(self, model=None):
+        if model is not None:
+            return self.model_limits.get(model, {})
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+            "burst": self.burst or None
+        }
+    
     def get_available_models(self):
         return [
             "gemini-2.0-flash",
@@ -1,19 +1,23 @@
 import os
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-
-load_dotenv()
+from .rate_limit import parse_model_limits
 
 class GroqService:
     def __init__(self):
         self.api_key = os.environ.get("GROQ_API_KEY")
         self.model = os.environ.get("GROQ_MODEL", "llama-3.3-70b-versatile")
         self.temperature = float(os.environ.get("GROQ_TEMPERATURE", "0.7"))
+        self.max_concurrency = int(os.environ.get("GROQ_MAX_CONCURRENCY", "0"))
+        self.requests_per_minute = int(os.environ.get("GROQ_RPM", "0"))
+        self.burst = int(os.environ.get("GROQ_BURST", "0"))
+        self.model_limits = parse_model_limits(os.environ.get("GROQ_MODEL_LIMITS", ""))
+        self.request_timeout = float(os.environ.get("GROQ_REQUEST_TIMEOUT", "0")) or None
         
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables")
     
     def get_llm(self, model=None, temperature=None):
+        from langchain_groq import ChatGroq
+        
         model_name = model or self.model
         temp = temperature if temperature is not None else self.temperature
         
@@ -23,6 +27,15 @@ class GroqService:
             temperature=temp
         )
     
+    def get_rate_limits(self, model=None):
+        if model is not None:
+            return self.model_limits.get(model, {})
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+            "burst": self.burst or None
+        }
+    
     def get_available_models(self):
         return [
             "llama-3.3-70b-versatile",
@@ -0,0 +1,129 @@
+import os
+import threading
+import uuid
+from collections import deque
+from typing import List, Optional
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from sqlalchemy.orm import Session
+from backend.database.models.chat import ChatModel
+from .cache import LRUCache
+from .deadlines import COMPLETED
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 4
+
+
+class SessionHistory:
+    def __init__(self):
+        self.turns = deque()
+        self.tokens = 0
+        self.summary_lines = deque()
+        self.summary_tokens = 0
+        self.chat_ids = set()
+        self.lock = threading.Lock()
+
+
+class ConversationMemory:
+    """Per-session window of recent turns, trimmed to a token budget.
+
+    A session is loaded from the database once (its last ``load_turns``
+    completed chats); afterwards each new turn is appended in memory. Turns
+    that fall out of the window are folded into a short extractive summary,
+    so work per request only depends on the number of new and evicted turns.
+
+    Before a cached window is used, the session's latest completed chat id
+    is read from the database (one indexed lookup). If this process has not
+    seen that chat, another worker answered a turn in between and the window
+    is reloaded.
+    """
+
+    def __init__(self, max_tokens=2000, summary_max_tokens=300, max_sessions=1000, ttl=3600, load_turns=50):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.load_turns = load_turns
+        self.reloads = 0
+        self._sessions = LRUCache(maxsize=max_sessions, ttl=ttl)
+
+    def get_messages(self, db: Session, session_id: uuid.UUID, query: str) -> List[BaseMessage]:
+        history = self._get_history(db, session_id)
+
+        messages: List[BaseMessage] = []
+        with history.lock:
+            if history.summary_lines:
+                messages.append(HumanMessage(content="Summary of our earlier conversation:\n" + "\n".join(history.summary_lines)))
+                messages.append(AIMessage(content="Understood, I will keep that context in mind."))
+            for user_message, ai_response, _ in history.turns:
+                messages.append(HumanMessage(content=user_message))
+                messages.append(AIMessage(content=ai_response))
+
+        messages.append(HumanMessage(content=query))
+        return messages
+
+    def append_turn(self, session_id: uuid.UUID, user_message: str, ai_response: str, chat_id: uuid.UUID = None):
+        history = self._sessions.get(session_id)
+        if history is None:
+            return
+        self._add_turn(history, user_message, ai_response, chat_id)
+
+    def forget(self, session_id: uuid.UUID):
+        self._sessions.pop(session_id)
+
+    def stats(self):
+        return {**self._sessions.stats(), "stale_reloads": self.reloads}
+
+    def _get_history(self, db: Session, session_id: uuid.UUID) -> SessionHistory:
+        history = self._sessions.get(session_id)
+        if history is not None:
+            latest = ChatModel.get_latest_chat_id(db, session_id, status=COMPLETED)
+            with history.lock:
+                if latest is None or latest in history.chat_ids:
+                    return history
+            self.reloads += 1
+
+        history = SessionHistory()
+        chats = ChatModel.get_chat_history(
+            db, session_id, limit=self.load_turns, status=COMPLETED,
+            columns=("id", "user_message", "ai_response")
+        )
+        for chat in chats:
+            self._add_turn(history, chat.user_message, chat.ai_response, chat.id)
+        self._sessions.set(session_id, history)
+        return history
+
+    def _add_turn(self, history: SessionHistory, user_message: str, ai_response: Optional[str],
+                  chat_id: uuid.UUID = None):
+        if chat_id is not None:
+            with history.lock:
+                history.chat_ids.add(chat_id)
+        if not ai_response or ai_response.startswith("Error: "):
+            return
+
+        tokens = estimate_tokens(user_message) + estimate_tokens(ai_response)
+        with history.lock:
+            history.turns.append((user_message, ai_response, tokens))
+            history.tokens += tokens
+
+            while history.turns and history.tokens > self.max_tokens:
+                old_user, old_ai, old_tokens = history.turns.popleft()
+                history.tokens -= old_tokens
+                self._summarize(history, old_user, old_ai)
+
+    def _summarize(self, history: SessionHistory, user_message: str, ai_response: str):
+        answer = ai_response.strip().split("\n", 1)[0]
+        line = f"- User asked: {user_message.strip()[:200]} | Assistant answered: {answer[:200]}"
+
+        history.summary_lines.append(line)
+        history.summary_tokens += estimate_tokens(line)
+
+        while len(history.summary_lines) > 1 and history.summary_tokens > self.summary_max_tokens:
+            history.summary_tokens -= estimate_tokens(history.summary_lines.popleft())
+
+
+conversation_memory = ConversationMemory(
+    max_tokens=int(os.environ.get("MEMORY_MAX_TOKENS", "2000")),
+    summary_max_tokens=int(os.environ.get("MEMORY_SUMMARY_MAX_TOKENS", "300")),
+    max_sessions=int(os.environ.get("MEMORY_MAX_SESSIONS", "1000")),
+    ttl=int(os.environ.get("MEMORY_SESSION_TTL", "3600")),
+    load_turns=int(os.environ.get("MEMORY_LOAD_TURNS", "50"))
+)
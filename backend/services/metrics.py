@@ -0,0 +1,202 @@
+import threading
+import time
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value_ms
+        self.max = max(self.max, value_ms)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return float(self.buckets[i]) if i < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 2),
+            "avg_ms": round(self.sum / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max, 2),
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(self.buckets, self.counts)},
+                "le_inf": self.counts[-1]
+            }
+        }
+
+
+class MetricsRegistry:
+    """Process-wide latency histograms labelled by stage, provider, model and role."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value_ms, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(value_ms)
+
+    def observe_request(self, timer, provider, model, role, known_models=None):
+        # model_name is client-supplied: anything outside ``known_models`` shares one label.
+        if known_models is not None and model not in known_models:
+            model = "other"
+        labels = {"provider": str(provider), "model": str(model), "role": str(role)}
+        self.observe("request", timer.total_ms(), **labels)
+        for stage, value_ms in timer.stages.items():
+            self.observe(f"stage.{stage}", value_ms, **labels)
+        for value_ms in timer.llm_calls:
+            self.observe("llm_call", value_ms, **labels)
+        for call in timer.tool_calls:
+            self.observe("tool_call", call["ms"], tool=call["name"], **labels)
+        if timer.tool_calls:
+            self.observe("request.tool_tokens_saved", timer.tool_tokens_saved, **labels)
+        if timer.prompt_tokens:
+            self.observe("request.prompt_tokens", timer.prompt_tokens, **labels)
+            self.observe("request.cached_prompt_tokens", timer.cached_prompt_tokens, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self._histograms.items(), key=lambda item: item[0])
+            return [
+                {"name": name, "labels": dict(labels), **histogram.snapshot()}
+                for (name, labels), histogram in items
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+class TimingCallbackHandler(BaseCallbackHandler):
+    """Records the duration of every LLM call and tool call into a RequestTimer."""
+
+    run_inline = True
+
+    def __init__(self, timer):
+        self.timer = timer
+        self._started = {}
+        self._nested = set()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish_llm(run_id)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.timer.prompt_tokens += usage.get("input_tokens", 0)
+                    self.timer.cached_prompt_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish_llm(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id in self._started or parent_run_id in self._nested:
+            # A tool called by a wrapper tool; its time is part of the wrapper's call.
+            self._nested.add(run_id)
+            return
+        self._started[run_id] = (time.perf_counter(), (serialized or {}).get("name", "tool"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish_tool(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish_tool(run_id)
+
+    def on_custom_event(self, name, data, *, run_id, **kwargs):
+        if name == "tool_compaction":
+            self.timer.tool_tokens_saved += data.get("tokens_saved", 0)
+
+    def _finish_llm(self, run_id):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.timer.llm_calls.append(round((time.perf_counter() - started) * 1000, 2))
+
+    def _finish_tool(self, run_id):
+        self._nested.discard(run_id)
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            started_at, name = started
+            self.timer.tool_calls.append({"name": name, "ms": round((time.perf_counter() - started_at) * 1000, 2)})
+
+
+class RequestTimer:
+    """Per-request stage timings; the aggregate ends up in chats.response_time_ms."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.llm_calls = []
+        self.tool_calls = []
+        self.tool_tokens_saved = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name, value_ms):
+        self.stages[name] = round(self.stages.get(name, 0.0) + value_ms, 2)
+
+    def total_ms(self):
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+    def callback(self):
+        return TimingCallbackHandler(self)
+
+    def as_dict(self):
+        return {
+            "stages": dict(self.stages),
+            "llm_calls_ms": list(self.llm_calls),
+            "llm_ms": round(sum(self.llm_calls), 2),
+            "tool_calls": list(self.tool_calls),
+            "tool_ms": round(sum(call["ms"] for call in self.tool_calls), 2),
+            "tool_tokens_saved": self.tool_tokens_saved,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "total_ms": self.total_ms()
+        }
+
+
+metrics = MetricsRegistry()
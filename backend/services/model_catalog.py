@@ -0,0 +1,99 @@
+import hashlib
+import os
+import threading
+from typing import Callable, NamedTuple, Optional
+from .roles import role_catalog
+
+
+class CatalogBody(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    version: int
+
+
+class ModelCatalog:
+    """Pre-serialized /chat/models response with its ETag.
+
+    The body is built once and served as is until ``version()`` changes
+    (e.g. the role catalog was reloaded) or ``refresh()`` is called.
+    ``matches`` implements the If-None-Match check for 304 responses.
+    A ``build`` that raises caches nothing; ``uncached`` wraps a stand-in
+    body that is served without an ETag or caching headers.
+    """
+
+    def __init__(self, version: Callable[[], int] = lambda: 0, max_age=60):
+        self.version = version
+        self.max_age = max_age
+        self.builds = 0
+        self.hits = 0
+        self.not_modified = 0
+        self.fallbacks = 0
+        self._current: Optional[CatalogBody] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}" if self.max_age else "no-cache"
+
+    def current(self, build: Callable[[], bytes]) -> CatalogBody:
+        version = self.version()
+        current = self._current
+        if current is not None and current.version == version:
+            self.hits += 1
+            return current
+        with self._lock:
+            current = self._current
+            if current is None or current.version != version:
+                body = build()
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                current = self._current = CatalogBody(body, etag, version)
+                self.builds += 1
+        return current
+
+    def uncached(self, body: bytes) -> CatalogBody:
+        self.fallbacks += 1
+        return CatalogBody(body, None, -1)
+
+    def headers(self, catalog: CatalogBody) -> dict:
+        if catalog.etag is None:
+            return {"Cache-Control": "no-store"}
+        return {"ETag": catalog.etag, "Cache-Control": self.cache_control}
+
+    def matches(self, catalog: CatalogBody, if_none_match: Optional[str]) -> bool:
+        if not if_none_match or catalog.etag is None:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or catalog.etag in tags:
+            self.not_modified += 1
+            return True
+        return False
+
+    def refresh(self):
+        with self._lock:
+            self._current = None
+
+    def stats(self):
+        current = self._current
+        return {
+            "etag": current.etag if current else None,
+            "builds": self.builds,
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            "fallbacks": self.fallbacks,
+            "max_age": self.max_age
+        }
+
+
+def _roles_version() -> int:
+    role_catalog.maybe_reload()
+    return role_catalog.version
+
+
+def build_model_catalog():
+    return ModelCatalog(
+        version=_roles_version,
+        max_age=int(os.environ.get("MODELS_CACHE_MAX_AGE", "60"))
+    )
+
+
+model_catalog = build_model_catalog()
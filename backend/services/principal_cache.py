@@ -0,0 +1,49 @@
+import os
+import time
+import uuid
+from sqlalchemy import event, inspect
+from backend.database.migrations.user import User
+from .cache import LRUCache
+
+
+class PrincipalCache:
+    """Short-lived cache of authenticated users keyed by the token's (sub, exp).
+
+    Entries never outlive the token they were created for, and are dropped
+    as soon as the user is deactivated through the ORM in this process.
+    """
+
+    def __init__(self, ttl=60, maxsize=10000):
+        self.ttl = ttl
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id: uuid.UUID, exp):
+        return self._cache.get((user_id, exp))
+
+    def set(self, user_id: uuid.UUID, exp, principal):
+        ttl = self.ttl
+        if exp is not None:
+            ttl = min(ttl, float(exp) - time.time())
+        if ttl > 0:
+            self._cache.set((user_id, exp), principal, ttl)
+
+    def invalidate_user(self, user_id: uuid.UUID):
+        return self._cache.discard_where(lambda key: key[0] == user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+principal_cache = PrincipalCache(
+    ttl=int(os.environ.get("AUTH_CACHE_TTL", "60")),
+    maxsize=int(os.environ.get("AUTH_CACHE_SIZE", "10000"))
+)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_deactivation(mapper, connection, target):
+    if inspect(target).attrs.is_active.history.has_changes():
+        principal_cache.invalidate_user(target.id)
@@ -0,0 +1,338 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from langchain_core.callbacks import AsyncCallbackHandler
+from .cache import LRUCache
+from .metrics import metrics
+
+# Limiter state is per process. With N workers (set by run_backend.py) each
+# enforces 1/N of every provider limit, so the deployment as a whole stays
+# within it; a limit smaller than N still allows one per worker. Per-user
+# quotas are not split: keep-alive pins a client to one worker.
+LIMIT_WORKERS = max(1, int(os.environ.get("LIMIT_WORKERS", "1")))
+
+
+def worker_share(limits, workers=LIMIT_WORKERS):
+    """This worker's share of a {name: limit} dict; 0/None (unlimited) stays as is."""
+    return {name: max(1, value // workers) if value else value for name, value in limits.items()}
+
+
+class ProviderBusyError(Exception):
+    """A provider slot could not be obtained before the queueing deadline."""
+
+
+class QuotaExceededError(Exception):
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_model_limits(value):
+    """Parse "model=concurrency:rpm,..." into {model: rate limit kwargs}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        model, _, spec = item.partition("=")
+        concurrency, _, rpm = spec.partition(":")
+        limits[model.strip()] = {
+            "max_concurrency": int(concurrency or 0),
+            "requests_per_minute": int(rpm or 0)
+        }
+    return limits
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``capacity``.
+
+    ``reserve`` takes a token even if the bucket is empty and returns how
+    long the caller must wait for it, so waiters are served in arrival order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, max_wait=None):
+        """Take a token; return seconds to wait, or None if that exceeds ``max_wait``."""
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """FIFO async semaphore that is not bound to a particular event loop."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self._waiters = deque()
+
+    @property
+    def waiting(self):
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, timeout=None):
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on.
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class ProviderLimiter:
+    """Concurrency cap plus requests-per-minute bucket for one provider or model."""
+
+    def __init__(self, name, max_concurrency=0, requests_per_minute=0, burst=None):
+        self.name = name
+        self.concurrency = ConcurrencyLimiter(max_concurrency) if max_concurrency else None
+        self.bucket = None
+        if requests_per_minute:
+            self.bucket = TokenBucket(requests_per_minute / 60.0, burst or max(1, requests_per_minute // 6))
+        self.max_waiting = 0
+        self.rejected = 0
+
+    async def acquire(self, deadline):
+        if self.concurrency is not None:
+            self.max_waiting = max(self.max_waiting, self.concurrency.waiting + 1)
+            try:
+                await self.concurrency.acquire(max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise ProviderBusyError(f"{self.name} is at its concurrency limit")
+
+    async def take_token(self, max_wait):
+        """Charge one model call against the requests-per-minute bucket."""
+        if self.bucket is None:
+            return
+        wait = self.bucket.reserve(max_wait)
+        if wait is None:
+            self.rejected += 1
+            raise ProviderBusyError(f"{self.name} is at its request rate limit")
+        if wait:
+            await asyncio.sleep(wait)
+
+    def release_slot(self):
+        if self.concurrency is not None:
+            self.concurrency.release()
+
+    def stats(self):
+        return {
+            "max_concurrency": self.concurrency.limit if self.concurrency else None,
+            "in_flight": self.concurrency.active if self.concurrency else None,
+            "queue_depth": self.concurrency.waiting if self.concurrency else 0,
+            "max_queue_depth": self.max_waiting,
+            "requests_per_minute": round(self.bucket.rate * 60) if self.bucket else None,
+            "rejected": self.rejected
+        }
+
+
+_active_limiters = contextvars.ContextVar("active_limiters", default=None)
+
+
+class RateLimitCallbackHandler(AsyncCallbackHandler):
+    """Takes a requests-per-minute token before every model call of an agent run."""
+
+    run_inline = True
+    raise_error = True
+
+    def __init__(self, limits):
+        self.limits = limits
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs):
+        await self.limits.charge_call()
+
+    async def on_llm_start(self, serialized, prompts, **kwargs):
+        await self.limits.charge_call()
+
+
+class ProviderLimits:
+    """Per-provider and per-model limiters, built from each service's settings.
+
+    A request holds its provider slot and its model slot (the concurrency
+    limits) for the whole agent run, and waits in line for up to
+    ``queue_timeout`` seconds before failing with ``ProviderBusyError``
+    (which lets the router fail over). Requests-per-minute are charged per
+    model call instead, through ``callback`` in the run's callbacks, since
+    one run can call the model many times. Per-model limiters exist only for
+    the provider's known or configured models; any other name shares the
+    default model's. Configured limits are split across ``workers``
+    processes (see ``worker_share``).
+    """
+
+    def __init__(self, queue_timeout=30, workers=1):
+        self.queue_timeout = queue_timeout
+        self.workers = workers
+        self.callback = RateLimitCallbackHandler(self)
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key, factory):
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = factory()
+            return limiter
+
+    @staticmethod
+    def model_key(model, service):
+        if model and (model in service.get_available_models() or service.get_rate_limits(model)):
+            return model
+        return service.model
+
+    def limiters_for(self, provider, model, service):
+        provider = provider.lower()
+        model = self.model_key(model, service)
+        return [
+            self._get(provider, lambda: ProviderLimiter(
+                provider, **worker_share(service.get_rate_limits(), self.workers))),
+            self._get(f"{provider}:{model}", lambda: ProviderLimiter(
+                f"{provider}:{model}", **worker_share(service.get_rate_limits(model), self.workers)))
+        ]
+
+    @asynccontextmanager
+    async def slot(self, provider, model, service, timeout=None):
+        deadline = time.monotonic() + (timeout if timeout is not None else self.queue_timeout)
+        limiters = self.limiters_for(provider, model, service)
+        acquired = []
+        started = time.perf_counter()
+        try:
+            for limiter in limiters:
+                await limiter.acquire(deadline)
+                acquired.append(limiter)
+        except BaseException:
+            for limiter in acquired:
+                limiter.release_slot()
+            raise
+        metrics.observe("provider.queue_wait", (time.perf_counter() - started) * 1000, provider=provider.lower())
+        previous = _active_limiters.get()
+        _active_limiters.set(acquired)
+        try:
+            yield
+        finally:
+            _active_limiters.set(previous)
+            for limiter in acquired:
+                limiter.release_slot()
+
+    async def charge_call(self):
+        limiters = _active_limiters.get()
+        if not limiters:
+            return
+        started = time.perf_counter()
+        for limiter in limiters:
+            await limiter.take_token(self.queue_timeout)
+        metrics.observe("provider.rate_wait", (time.perf_counter() - started) * 1000, provider=limiters[0].name)
+
+    def clear(self):
+        with self._lock:
+            self._limiters.clear()
+
+    def stats(self):
+        return {key: limiter.stats() for key, limiter in self._limiters.items()}
+
+
+class UserQuotas:
+    """Per-user request rate and concurrency quotas, checked before the agent runs.
+
+    Requests over quota are rejected immediately rather than queued, so one
+    user's burst never holds provider slots other users are waiting for.
+    Quotas are per worker process and not divided between workers: a client's
+    keep-alive connection stays on one worker, so its requests are rarely
+    spread over them.
+    """
+
+    def __init__(self, requests_per_minute=0, burst=None, max_concurrent=0, maxsize=100000):
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst or max(1, requests_per_minute // 6)
+        self.max_concurrent = max_concurrent
+        self._buckets = LRUCache(maxsize=maxsize, ttl=3600)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def enabled(self):
+        return bool(self.requests_per_minute or self.max_concurrent)
+
+    def acquire(self, user_id: uuid.UUID):
+        if self.requests_per_minute:
+            bucket = self._buckets.get_or_create(
+                user_id, lambda: TokenBucket(self.requests_per_minute / 60.0, self.burst)
+            )
+            retry_after = bucket.try_acquire()
+            if retry_after:
+                self.rejected += 1
+                raise QuotaExceededError("Request rate limit exceeded", retry_after)
+
+        with self._lock:
+            in_flight = self._in_flight.get(user_id, 0)
+            if self.max_concurrent and in_flight >= self.max_concurrent:
+                self.rejected += 1
+                raise QuotaExceededError("Too many concurrent requests", 1.0)
+            self._in_flight[user_id] = in_flight + 1
+
+    def release(self, user_id: uuid.UUID):
+        with self._lock:
+            in_flight = self._in_flight.get(user_id, 0) - 1
+            if in_flight > 0:
+                self._in_flight[user_id] = in_flight
+            else:
+                self._in_flight.pop(user_id, None)
+
+    def stats(self):
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "max_concurrent": self.max_concurrent,
+            "users_in_flight": len(self._in_flight),
+            "rejected": self.rejected
+        }
+
+
+provider_limits = ProviderLimits(
+    queue_timeout=float(os.environ.get("PROVIDER_QUEUE_TIMEOUT", "30")),
+    workers=LIMIT_WORKERS
+)
+
+user_quotas = UserQuotas(
+    requests_per_minute=int(os.environ.get("USER_RPM", "0")),
+    burst=int(os.environ.get("USER_BURST", "0")) or None,
+    max_concurrent=int(os.environ.get("USER_MAX_CONCURRENT", "0"))
+)
@@ -0,0 +1,63 @@
+import os
+import threading
+from .cache import LRUCache
+
+
+class AgentRegistry:
+    """Process-wide cache of provider services, LLM clients and compiled agents.
+
+    LLM clients are keyed by (provider, model, temperature) so requests that
+    share a configuration reuse the same HTTP connection pool. Compiled agents
+    are keyed by (provider, model, temperature, role, search).
+    """
+
+    def __init__(self, max_llms=32, max_agents=64):
+        self.llms = LRUCache(maxsize=max_llms)
+        self.agents = LRUCache(maxsize=max_agents)
+        self.tools = LRUCache(maxsize=8)
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def get_service(self, name, factory):
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    service = factory()
+                    self._services[name] = service
+        return service
+
+    def get_llm(self, key, factory):
+        return self.llms.get_or_create(key, factory)
+
+    def get_agent(self, key, factory):
+        return self.agents.get_or_create(key, factory)
+
+    def get_tool(self, key, factory):
+        return self.tools.get_or_create(key, factory)
+
+    def clear(self):
+        self.llms.clear()
+        self.agents.clear()
+        self.tools.clear()
+        from .search_cache import search_cache
+        search_cache.clear()
+        with self._lock:
+            self._services.clear()
+
+    def stats(self):
+        # search_cache pulls in langchain_core.tools; keep it off the startup path.
+        from .search_cache import search_cache
+        return {
+            "llms": self.llms.stats(),
+            "agents": self.agents.stats(),
+            "tools": self.tools.stats(),
+            "search": search_cache.stats()
+        }
+
+
+agent_registry = AgentRegistry(
+    max_llms=int(os.environ.get("LLM_CACHE_SIZE", "32")),
+    max_agents=int(os.environ.get("AGENT_CACHE_SIZE", "64"))
+)
@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import json
+import math
+import operator
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+DEFAULT_ROLE_TTLS = {
+    "crypto_trend_teller": 120,
+    "news_analyst": 300,
+    "financial_advisor": 600,
+    "default": 86400
+}
+DEFAULT_TTL = 3600
+
+
+def normalize_query(text: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class HashingEmbedder:
+    """Local bag-of-words embedder using the hashing trick.
+
+    Needs no network or model download, so it is also the embedder to use in
+    tests. Any LangChain ``Embeddings`` object can be used instead.
+    """
+
+    def __init__(self, dimensions=256):
+        self.dimensions = dimensions
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in normalize_query(text).split():
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] % 2 == 0 else -1.0
+        return vector
+
+
+def unit_vector(vector: List[float]) -> List[float]:
+    """``vector`` scaled to length 1, so cosine similarity is a plain dot product."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def dot(a: List[float], b: List[float]) -> float:
+    return sum(map(operator.mul, a, b))
+
+
+class InMemoryResponseCacheBackend:
+    blocking = False
+
+    def __init__(self, max_entries=1000, max_per_namespace=200):
+        self.max_entries = max_entries
+        self.max_per_namespace = max_per_namespace
+        self._entries = OrderedDict()
+        # namespace -> keys in that namespace, least recently used first
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            self._namespaces[entry["namespace"]].move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            keys = self._namespaces.setdefault(entry["namespace"], OrderedDict())
+            keys[key] = None
+            while len(keys) > self.max_per_namespace:
+                self._remove(next(iter(keys)))
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._namespaces[entry["namespace"]]
+        del keys[key]
+        if not keys:
+            del self._namespaces[entry["namespace"]]
+
+    def candidates(self, namespace):
+        """(key, unit embedding) of the live entries in ``namespace``."""
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for key in self._namespaces.get(namespace, ()):
+                entry = self._entries[key]
+                if entry["expires_at"] > now and entry.get("embedding"):
+                    candidates.append((key, entry["embedding"]))
+            return candidates
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class DiskResponseCacheBackend:
+    """SQLite-file backend, shared by every worker on the same host.
+
+    Embeddings are decoded once per process and kept in memory per
+    namespace; a semantic lookup only reads the namespace's keys to pick up
+    entries added or evicted by other workers.
+    """
+
+    blocking = True
+
+    def __init__(self, path, max_entries=10000, max_per_namespace=200):
+        self.max_entries = max_entries
+        self.max_per_namespace = max_per_namespace
+        self._lock = threading.Lock()
+        # namespace -> {key: unit embedding}
+        self._vectors = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY, namespace TEXT NOT NULL, response TEXT NOT NULL,"
+            " embedding TEXT, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_namespace ON response_cache (namespace)")
+
+    def _row_to_entry(self, row):
+        namespace, response, embedding, expires_at = row
+        return {
+            "namespace": namespace,
+            "response": response,
+            "embedding": json.loads(embedding) if embedding else None,
+            "expires_at": expires_at
+        }
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT namespace, response, embedding, expires_at FROM response_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE response_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            return self._row_to_entry(row)
+
+    def set(self, key, entry):
+        now = time.time()
+        embedding = json.dumps(entry["embedding"]) if entry.get("embedding") else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, namespace, response, embedding, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, entry["namespace"], entry["response"], embedding, entry["expires_at"], now)
+            )
+            if entry.get("embedding"):
+                self._vectors.setdefault(entry["namespace"], {})[key] = entry["embedding"]
+            self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                " SELECT key FROM response_cache WHERE namespace = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (entry["namespace"], self.max_per_namespace)
+            )
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                " SELECT key FROM response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def candidates(self, namespace):
+        """(key, unit embedding) of the live entries in ``namespace``."""
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute(
+                "SELECT key FROM response_cache WHERE namespace = ? AND expires_at > ? AND embedding IS NOT NULL",
+                (namespace, time.time())
+            )]
+            cached = self._vectors.get(namespace, {})
+            vectors = {key: cached[key] for key in keys if key in cached}
+            missing = [key for key in keys if key not in vectors]
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, embedding FROM response_cache WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                )
+                for key, embedding in rows:
+                    vectors[key] = json.loads(embedding)
+            if vectors:
+                self._vectors[namespace] = vectors
+            else:
+                self._vectors.pop(namespace, None)
+            return list(vectors.items())
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._vectors.clear()
+
+    def size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Cache of final agent answers keyed by (role, provider, model, search, query).
+
+    In ``exact`` mode only identical normalized queries hit. In ``semantic``
+    mode a miss on the exact key falls back to the most similar cached query
+    in the same namespace, if it clears ``similarity_threshold``; namespaces
+    are capped at the backend's ``max_per_namespace`` entries to bound that
+    scan. Async callers use ``alookup``/``astore``.
+    """
+
+    def __init__(self, backend, mode="exact", embedder=None, similarity_threshold=0.92,
+                 role_ttls=None, default_ttl=DEFAULT_TTL):
+        self.backend = backend
+        self.mode = mode
+        self.embedder = embedder or HashingEmbedder()
+        self.similarity_threshold = similarity_threshold
+        self.role_ttls = {**DEFAULT_ROLE_TTLS, **(role_ttls or {})}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _namespace(self, role, provider, model, allow_search):
+        return f"{role}|{provider}|{model}|{int(bool(allow_search))}"
+
+    def _key(self, namespace, normalized):
+        return hashlib.sha256(f"{namespace}|{normalized}".encode("utf-8")).hexdigest()
+
+    def ttl_for_role(self, role):
+        return self.role_ttls.get(role, self.default_ttl)
+
+    def lookup(self, role, provider, model, allow_search, query) -> Optional[str]:
+        namespace = self._namespace(role, provider, model, allow_search)
+        normalized = normalize_query(query)
+
+        entry = self.backend.get(self._key(namespace, normalized))
+        if entry is not None:
+            self.hits += 1
+            return entry["response"]
+
+        if self.mode == "semantic":
+            embedding = unit_vector(self.embedder.embed_query(normalized))
+            best_key, best_score = None, 0.0
+            for key, candidate in self.backend.candidates(namespace):
+                score = dot(embedding, candidate)
+                if score > best_score:
+                    best_key, best_score = key, score
+            if best_key is not None and best_score >= self.similarity_threshold:
+                entry = self.backend.get(best_key)
+                if entry is not None:
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    return entry["response"]
+
+        self.misses += 1
+        return None
+
+    def store(self, role, provider, model, allow_search, query, response):
+        if not response or response.startswith("Error: "):
+            return
+        namespace = self._namespace(role, provider, model, allow_search)
+        normalized = normalize_query(query)
+        self.backend.set(self._key(namespace, normalized), {
+            "namespace": namespace,
+            "response": response,
+            "embedding": unit_vector(self.embedder.embed_query(normalized)) if self.mode == "semantic" else None,
+            "expires_at": time.time() + self.ttl_for_role(role)
+        })
+
+    @property
+    def blocking(self):
+        # Disk reads and embedding calls (possibly remote) stay off the event loop.
+        return self.backend.blocking or self.mode == "semantic"
+
+    async def alookup(self, role, provider, model, allow_search, query) -> Optional[str]:
+        if self.blocking:
+            return await asyncio.to_thread(self.lookup, role, provider, model, allow_search, query)
+        return self.lookup(role, provider, model, allow_search, query)
+
+    async def astore(self, role, provider, model, allow_search, query, response):
+        if self.blocking:
+            await asyncio.to_thread(self.store, role, provider, model, allow_search, query, response)
+        else:
+            self.store(role, provider, model, allow_search, query, response)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "size": self.backend.size(),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def _parse_role_ttls(value):
+    ttls = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        role, _, seconds = item.partition("=")
+        ttls[role.strip()] = int(seconds)
+    return ttls
+
+
+def build_response_cache():
+    if os.environ.get("RESPONSE_CACHE_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return None
+
+    max_entries = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    max_per_namespace = int(os.environ.get("RESPONSE_CACHE_MAX_PER_NAMESPACE", "200"))
+    if os.environ.get("RESPONSE_CACHE_BACKEND", "memory") == "disk":
+        backend = DiskResponseCacheBackend(os.environ.get("RESPONSE_CACHE_PATH", "response_cache.db"), max_entries,
+                                           max_per_namespace)
+    else:
+        backend = InMemoryResponseCacheBackend(max_entries, max_per_namespace)
+
+    return ResponseCache(
+        backend,
+        mode=os.environ.get("RESPONSE_CACHE_MODE", "exact"),
+        similarity_threshold=float(os.environ.get("RESPONSE_CACHE_SIMILARITY", "0.92")),
+        role_ttls=_parse_role_ttls(os.environ.get("RESPONSE_CACHE_ROLE_TTLS", ""))
+    )
+
+
+response_cache = build_response_cache()
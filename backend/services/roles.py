@@ -1,3 +1,13 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+from langchain_core.messages import SystemMessage
+from .budget import RoleBudget
+from .memory import estimate_tokens
+
 
 class AgentRoles:
     ROLES = {
@@ -12,7 +22,9 @@ IMPORTANT: You have access to web search tools. Always use the search tool to ge
 
 If asked about non-crypto topics, respond with: "I'm a Crypto Trend Teller and I can only help with cryptocurrency-related questions. Please ask me about crypto prices, market trends, trading opportunities, or blockchain technology."
 
-Provide clear, actionable insights while being mindful of market volatility and risks."""
+Provide clear, actionable insights while being mindful of market volatility and risks.""",
+            "pre_search": True,
+            "limits": {"max_steps": 4, "max_tool_calls": 3, "max_tokens": 12000}
         },
         
         "financial_advisor": {
@@ -26,7 +38,9 @@ IMPORTANT: You have access to web search tools. Always use the search tool to ge
 
 If asked about non-financial topics, respond with: "I'm a Financial Advisor and I can only help with financial and investment-related questions. Please ask me about investment strategies, financial planning, budgeting, or market analysis."
 
-Always remind users that this is educational information and not personalized financial advice."""
+Always remind users that this is educational information and not personalized financial advice.""",
+            "pre_search": True,
+            "limits": {"max_steps": 4, "max_tool_calls": 3, "max_tokens": 12000}
         },
         
         "tech_expert": {
@@ -38,7 +52,8 @@ ROLE RESTRICTION: You ONLY answer questions related to technology, software deve
 
 If asked about non-tech topics, respond with: "I'm a Technology Expert and I can only help with technology-related questions. Please ask me about software development, AI, programming, tech trends, or technical problems."
 
-Use web search to provide up-to-date information on technology topics and help solve technical problems."""
+Use web search to provide up-to-date information on technology topics and help solve technical problems.""",
+            "limits": {"max_steps": 3, "max_tool_calls": 2, "max_tokens": 8000}
         },
         
         "news_analyst": {
@@ -52,7 +67,9 @@ IMPORTANT: You have access to web search tools. Always use the search tool to ga
 
 If asked about non-news topics, respond with: "I'm a News Analyst and I can only help with news and current events-related questions. Please ask me about breaking news, political developments, world affairs, or trending topics."
 
-Provide balanced, factual analysis of news stories."""
+Provide balanced, factual analysis of news stories.""",
+            "pre_search": True,
+            "limits": {"max_steps": 5, "max_tool_calls": 4, "max_tokens": 16000}
         },
         
         "travel_guide": {
@@ -64,7 +81,8 @@ ROLE RESTRICTION: You ONLY answer questions related to travel, tourism, destinat
 
 If asked about non-travel topics, respond with: "I'm a Travel Guide and I can only help with travel-related questions. Please ask me about destinations, accommodations, travel planning, local attractions, or travel tips."
 
-Use web search to get current travel information, weather updates, and local insights."""
+Use web search to get current travel information, weather updates, and local insights.""",
+            "limits": {"max_steps": 3, "max_tool_calls": 2, "max_tokens": 8000}
         },
         
         "health_wellness_coach": {
@@ -76,7 +94,8 @@ ROLE RESTRICTION: You ONLY answer questions related to health, wellness, fitness
 
 If asked about non-health topics, respond with: "I'm a Health & Wellness Coach and I can only help with health and wellness-related questions. Please ask me about fitness, nutrition, exercise routines, or healthy lifestyle tips."
 
-Use web search for the latest health research and trends. Always remind users to consult healthcare professionals for medical advice."""
+Use web search for the latest health research and trends. Always remind users to consult healthcare professionals for medical advice.""",
+            "limits": {"max_steps": 3, "max_tool_calls": 2, "max_tokens": 8000}
         },
         
         "business_consultant": {
@@ -88,7 +107,8 @@ ROLE RESTRICTION: You ONLY answer questions related to business, entrepreneurshi
 
 If asked about non-business topics, respond with: "I'm a Business Consultant and I can only help with business-related questions. Please ask me about business strategy, market analysis, entrepreneurship, or management advice."
 
-Use web search to get current market trends and business news to provide relevant insights."""
+Use web search to get current market trends and business news to provide relevant insights.""",
+            "limits": {"max_steps": 3, "max_tool_calls": 2, "max_tokens": 8000}
         },
         
         "default": {
@@ -96,19 +116,147 @@ Use web search to get current market trends and business news to provide relevan
             "description": "Smart and friendly AI chatbot that can assist with a wide variety of topics",
             "prompt": """Act as an AI Assistant. You are smart, friendly, helpful, and knowledgeable. You can assist with a wide variety of topics including general questions, explanations, problem-solving, and information requests.
 
-Unlike specialized role-based agents, you can answer questions on any topic. Use web search when you need current information to provide accurate and up-to-date responses."""
+Unlike specialized role-based agents, you can answer questions on any topic. Use web search when you need current information to provide accurate and up-to-date responses.""",
+            "limits": {"max_steps": 3, "max_tool_calls": 2, "max_tokens": 8000}
         }
     }
     
+    def get_role_artifact(self, role) -> "RoleArtifact":
+        return role_catalog.get(role)
+    
     def get_role_prompt(self, role):
-        role_key = role.lower()
-        return self.ROLES.get(role_key, self.ROLES["default"])["prompt"]
+        return self.get_role_artifact(role).prompt
+    
+    def get_role_budget(self, role):
+        return self.get_role_artifact(role).budget
+    
+    def uses_pre_search(self, role):
+        return self.get_role_artifact(role).pre_search
     
     def get_roles_summary(self):
         return {
             role_id: {
-                "name": role_data["name"],
-                "description": role_data["description"]
+                "name": artifact.name,
+                "description": artifact.description
+            }
+            for role_id, artifact in role_catalog.all().items()
+        }
+
+
+class RoleArtifact(NamedTuple):
+    """Everything derived from a role definition, built once per (re)load."""
+
+    role_id: str
+    name: str
+    description: str
+    prompt: str
+    system_message: SystemMessage
+    token_count: int
+    prompt_hash: str
+    budget: RoleBudget
+    pre_search: bool
+
+
+def build_role_artifact(role_id: str, role_data: dict) -> RoleArtifact:
+    prompt = role_data["prompt"]
+    limits = role_data.get("limits", {})
+    digest = hashlib.sha256(
+        json.dumps({"prompt": prompt, "limits": limits}, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+    return RoleArtifact(
+        role_id=role_id,
+        name=role_data["name"],
+        description=role_data["description"],
+        prompt=prompt,
+        system_message=SystemMessage(content=prompt),
+        token_count=estimate_tokens(prompt),
+        prompt_hash=digest,
+        budget=RoleBudget(**limits),
+        pre_search=bool(role_data.get("pre_search", False))
+    )
+
+
+class RoleCatalog:
+    """Precomputed role artifacts, optionally overridden from a JSON file.
+
+    ``path`` holds ``{role_id: {name, description, prompt, limits,
+    pre_search}}`` entries that replace or extend the built-in roles. The
+    file's mtime is checked at most every ``reload_interval`` seconds and a
+    changed file is reloaded in place, so every worker picks up edits
+    without a restart. A file that fails to load leaves the current roles
+    in use.
+    """
+
+    def __init__(self, roles: dict, path: Optional[str] = None, reload_interval=5.0):
+        self.builtin = roles
+        self.path = path
+        self.reload_interval = reload_interval
+        self.version = 0
+        self.reloads = 0
+        self.last_error = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._artifacts = self._build(roles)
+        if path:
+            self.maybe_reload(force=True)
+
+    def _build(self, roles: dict) -> Dict[str, RoleArtifact]:
+        return {role_id.lower(): build_role_artifact(role_id.lower(), data) for role_id, data in roles.items()}
+
+    def maybe_reload(self, force=False):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            try:
+                overrides = {}
+                if mtime is not None:
+                    with open(self.path, encoding="utf-8") as roles_file:
+                        overrides = json.load(roles_file)
+                artifacts = self._build({**self.builtin, **overrides})
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return
+            self._artifacts = artifacts
+            self.version += 1
+            self.reloads += 1
+            self.last_error = None
+
+    def get(self, role: str) -> RoleArtifact:
+        self.maybe_reload()
+        artifacts = self._artifacts
+        return artifacts.get(role.lower()) or artifacts["default"]
+
+    def all(self) -> Dict[str, RoleArtifact]:
+        self.maybe_reload()
+        return dict(self._artifacts)
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "version": self.version,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+            "roles": {
+                role_id: {"prompt_hash": artifact.prompt_hash, "prompt_tokens": artifact.token_count}
+                for role_id, artifact in self._artifacts.items()
             }
-            for role_id, role_data in self.ROLES.items()
-        }
\ No newline at end of file
+        }
+
+
+role_catalog = RoleCatalog(
+    AgentRoles.ROLES,
+    path=os.environ.get("ROLES_FILE") or None,
+    reload_interval=float(os.environ.get("ROLES_RELOAD_INTERVAL", "5"))
+)
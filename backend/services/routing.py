@@ -0,0 +1,255 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .metrics import metrics
+from .rate_limit import ProviderBusyError
+
+# Providers this deployment serves; the others are never imported or routed to.
+ENABLED_PROVIDERS = [
+    provider.strip().lower() for provider in os.environ.get("ENABLED_PROVIDERS", "gemini,groq").split(",")
+    if provider.strip()
+]
+
+
+class ProviderUnavailableError(Exception):
+    pass
+
+
+class UnsupportedProviderError(ValueError):
+    """The requested provider is unknown or not enabled on this server."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one provider.
+
+    After ``failure_threshold`` failures in a row the circuit opens and the
+    provider is skipped for ``reset_timeout`` seconds. Then a single trial
+    request is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            # At most one trial per reset_timeout while the circuit is not closed.
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state == "closed":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.times_opened}
+
+
+class ProviderRouter:
+    """Runs an agent call against a provider with failover and optional hedging.
+
+    ``fallbacks`` maps a provider to the ordered (provider, model) pairs to
+    try when it errors, times out (``timeout`` seconds per attempt) or has
+    an open circuit. With ``hedge_after`` set, the next candidate is started
+    once the current one has been running that long, and whichever answers
+    first wins; the other is cancelled.
+    """
+
+    def __init__(self, fallbacks: Dict[str, List[Tuple[str, Optional[str]]]] = None, timeout=None,
+                 hedge_after=None, failure_threshold=5, reset_timeout=30):
+        self.fallbacks = fallbacks or {}
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.counters = {"attempts": 0, "failures": 0, "timeouts": 0, "failovers": 0,
+                         "hedges": 0, "hedges_won": 0, "short_circuited": 0}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        provider = provider.lower()
+        with self._lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[provider]
+
+    def candidates(self, provider: str, model: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+        """Ordered (provider, model) pairs to try: the requested one, then its fallbacks.
+
+        A fallback to another model of the same provider is kept; only a
+        repeat of a pair already in the list is dropped.
+        """
+        candidates = [(provider.lower(), model)]
+        for pair in self.fallbacks.get(provider.lower(), []):
+            if pair not in candidates:
+                candidates.append(pair)
+        return candidates
+
+    def next_candidate(self, candidates: List[Tuple[str, Optional[str]]]) -> Optional[Tuple[str, Optional[str]]]:
+        """Pop the next candidate whose circuit lets a request through."""
+        while candidates:
+            provider, model = candidates.pop(0)
+            if self.breaker(provider).allow():
+                return provider, model
+            self.counters["short_circuited"] += 1
+        return None
+
+    def record(self, provider: str, ok: bool, elapsed_ms: float = None):
+        if ok:
+            self.breaker(provider).record_success()
+        else:
+            self.counters["failures"] += 1
+            self.breaker(provider).record_failure()
+        if elapsed_ms is not None:
+            metrics.observe("provider.call", elapsed_ms, provider=provider.lower(), outcome="ok" if ok else "error")
+
+    async def _attempt(self, provider, model, call, slot=None):
+        async with slot(provider, model) if slot else nullcontext():
+            self.counters["attempts"] += 1
+            started = time.perf_counter()
+            try:
+                if self.timeout:
+                    result = await asyncio.wait_for(call(provider, model), self.timeout)
+                else:
+                    result = await call(provider, model)
+            except asyncio.TimeoutError:
+                self.counters["timeouts"] += 1
+                self.record(provider, False, (time.perf_counter() - started) * 1000)
+                raise TimeoutError(f"{provider} did not answer within {self.timeout}s")
+            except (asyncio.CancelledError, ProviderBusyError):
+                # A rate-limited model call says nothing about the provider's health.
+                raise
+            except Exception:
+                self.record(provider, False, (time.perf_counter() - started) * 1000)
+                raise
+            self.record(provider, True, (time.perf_counter() - started) * 1000)
+            return result
+
+    async def run(self, provider: str, model: Optional[str], call: Callable[[str, Optional[str]], Awaitable],
+                  slot: Callable = None):
+        """Return the first successful ``call(provider, model)``.
+
+        ``slot(provider, model)``, if given, is an async context manager held
+        around each attempt (e.g. a rate-limit slot); time spent waiting for
+        it does not count towards ``timeout`` or the circuit breaker.
+        """
+        candidates = self.candidates(provider, model)
+        pending = {}
+        last_error = ProviderUnavailableError(f"No available provider for {provider} (circuit open)")
+
+        def launch(hedged=False):
+            candidate = self.next_candidate(candidates)
+            if candidate is None:
+                return False
+            pending[asyncio.ensure_future(self._attempt(*candidate, call, slot))] = hedged
+            return True
+
+        launch()
+        try:
+            while pending:
+                hedge = self.hedge_after if candidates and len(pending) == 1 else None
+                done, _ = await asyncio.wait(pending, timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch(hedged=True):
+                        self.counters["hedges"] += 1
+                    continue
+
+                for task in done:
+                    hedged = pending.pop(task)
+                    if task.exception() is None:
+                        if hedged:
+                            self.counters["hedges_won"] += 1
+                        return task.result()
+                    last_error = task.exception()
+
+                if not pending and launch():
+                    self.counters["failovers"] += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+    def run_sync(self, provider: str, model: Optional[str], call: Callable):
+        candidates = self.candidates(provider, model)
+        last_error = ProviderUnavailableError(f"No available provider for {provider} (circuit open)")
+        attempted = 0
+        while True:
+            candidate = self.next_candidate(candidates)
+            if candidate is None:
+                raise last_error
+            if attempted:
+                self.counters["failovers"] += 1
+            attempted += 1
+            self.counters["attempts"] += 1
+            started = time.perf_counter()
+            try:
+                result = call(*candidate)
+            except Exception as e:
+                self.record(candidate[0], False, (time.perf_counter() - started) * 1000)
+                last_error = e
+                continue
+            self.record(candidate[0], True, (time.perf_counter() - started) * 1000)
+            return result
+
+    def stats(self):
+        return {
+            **self.counters,
+            "breakers": {provider: breaker.stats() for provider, breaker in self.breakers.items()}
+        }
+
+
+def _parse_fallbacks(value):
+    fallbacks = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        provider, _, targets = item.partition("=")
+        for target in filter(None, (part.strip() for part in targets.split("|"))):
+            target_provider, _, target_model = target.partition(":")
+            fallbacks.setdefault(provider.strip().lower(), []).append(
+                (target_provider.strip().lower(), target_model.strip() or None)
+            )
+    return fallbacks
+
+
+def build_provider_router():
+    timeout = float(os.environ.get("PROVIDER_TIMEOUT", "0"))
+    hedge_after_ms = float(os.environ.get("PROVIDER_HEDGE_AFTER_MS", "0"))
+    fallbacks = {
+        provider: [target for target in targets if target[0] in ENABLED_PROVIDERS]
+        for provider, targets in _parse_fallbacks(os.environ.get("PROVIDER_FALLBACKS", "")).items()
+    }
+    return ProviderRouter(
+        fallbacks=fallbacks,
+        timeout=timeout or None,
+        hedge_after=hedge_after_ms / 1000 if hedge_after_ms else None,
+        failure_threshold=int(os.environ.get("PROVIDER_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.environ.get("PROVIDER_BREAKER_RESET", "30"))
+    )
+
+
+provider_router = build_provider_router()
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Optional
+from langchain_core.tools import BaseTool
+from .cache import LRUCache
+from .response_cache import normalize_query
+
+
+class SearchCache:
+    """TTL cache of search results that also coalesces identical in-flight searches.
+
+    Concurrent callers asking the same (normalized query, max_results) while a
+    search is running wait for that one upstream call instead of issuing
+    their own. Only successful results (lists) are cached.
+    """
+
+    def __init__(self, ttl=300, maxsize=512):
+        self.results = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.requests = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self._inflight_async = {}
+        self._inflight_sync = {}
+        self._lock = threading.Lock()
+
+    def key(self, query, max_results):
+        return (normalize_query(query), max_results)
+
+    def _store(self, key, result):
+        if isinstance(result, list):
+            self.results.set(key, result)
+
+    def get_or_fetch(self, key, fetch):
+        self.requests += 1
+        missing = object()
+        cached = self.results.get(key, missing)
+        if cached is not missing:
+            return cached
+
+        with self._lock:
+            future = self._inflight_sync.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._inflight_sync[key] = Future()
+
+        if not is_leader:
+            # Share the leader's result or error, as the async path does.
+            self.coalesced += 1
+            return future.result()
+
+        try:
+            self.upstream_calls += 1
+            result = fetch()
+            self._store(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight_sync.pop(key, None)
+
+    async def aget_or_fetch(self, key, fetch, retry=False):
+        if not retry:
+            self.requests += 1
+        missing = object()
+        cached = self.results.get(key, missing)
+        if cached is not missing:
+            return cached
+
+        future = self._inflight_async.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    return await self.aget_or_fetch(key, fetch, retry=True)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_async[key] = future
+        try:
+            self.upstream_calls += 1
+            result = await fetch()
+            self._store(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight_async.pop(key, None)
+
+    def clear(self):
+        self.results.clear()
+
+    def stats(self):
+        return {
+            **self.results.stats(),
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "upstream_calls_saved": self.requests - self.upstream_calls
+        }
+
+
+class CachedSearchTool(BaseTool):
+    """Search tool wrapper that serves repeated queries from a SearchCache."""
+
+    search_tool: BaseTool
+    cache: Any
+    max_results: int = 2
+
+    def _run(self, query: str, run_manager: Optional[Any] = None):
+        return self.cache.get_or_fetch(
+            self.cache.key(query, self.max_results),
+            lambda: self.search_tool.invoke({"query": query})
+        )
+
+    async def _arun(self, query: str, run_manager: Optional[Any] = None):
+        return await self.cache.aget_or_fetch(
+            self.cache.key(query, self.max_results),
+            lambda: self.search_tool.ainvoke({"query": query})
+        )
+
+    @classmethod
+    def wrap(cls, search_tool, cache, max_results=2):
+        return cls(
+            name=search_tool.name,
+            description=search_tool.description,
+            args_schema=search_tool.args_schema,
+            search_tool=search_tool,
+            cache=cache,
+            max_results=max_results
+        )
+
+
+search_cache = SearchCache(
+    ttl=int(os.environ.get("SEARCH_CACHE_TTL", "300")),
+    maxsize=int(os.environ.get("SEARCH_CACHE_SIZE", "512"))
+)
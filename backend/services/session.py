@@ -1,32 +1,39 @@
 import uuid
-from typing import Optional, Dict
+from typing import Optional
 from sqlalchemy.orm import Session
 from backend.database.migrations.chat import ChatSession
+from .chat_writer import chat_writer
+from .session_cache import session_cache
 
 
 class SessionService:
-    def __init__(self):
-        self._active_sessions: Dict[uuid.UUID, uuid.UUID] = {}
+    def __init__(self, cache=session_cache):
+        self.cache = cache
 
     def get_or_create_session(self, db: Session, user_id: uuid.UUID, 
                             provided_session_id: Optional[uuid.UUID] = None) -> uuid.UUID:
         if provided_session_id:
             if self._verify_session_ownership(db, user_id, provided_session_id):
-                self._active_sessions[user_id] = provided_session_id
+                if self.cache.get_active(user_id) != provided_session_id:
+                    self.cache.set_active(user_id, provided_session_id)
                 return provided_session_id
             else:
                 return self._create_new_session(db, user_id)
         
-        if user_id in self._active_sessions:
-            session_id = self._active_sessions[user_id]
-            if self._verify_session_exists(db, session_id):
-                return session_id
+        session_id = self.cache.get_active(user_id)
+        if session_id is not None and self._verify_session_ownership(db, user_id, session_id):
+            return session_id
         
         return self._create_new_session(db, user_id)
     
     def _create_new_session(self, db: Session, user_id: uuid.UUID) -> uuid.UUID:
         session_id = uuid.uuid4()
         
+        if chat_writer is not None:
+            chat_writer.add_session(user_id, session_id)
+            self._remember(user_id, session_id)
+            return session_id
+        
         chat_session = ChatSession(
             id=uuid.uuid4(),
             user_id=user_id,
@@ -39,27 +46,35 @@ class SessionService:
         db.commit()
         db.refresh(chat_session)
         
-        self._active_sessions[user_id] = session_id
+        self._remember(user_id, session_id)
         
         return session_id
     
-    def _verify_session_exists(self, db: Session, session_id: uuid.UUID) -> bool:
-        session = db.query(ChatSession).filter(
-            ChatSession.session_id == session_id,
-            ChatSession.is_active == True
-        ).first()
-        
-        return session is not None
+    def _remember(self, user_id: uuid.UUID, session_id: uuid.UUID):
+        self.cache.set_owner(session_id, user_id)
+        self.cache.set_active(user_id, session_id)
     
     def _verify_session_ownership(self, db: Session, user_id: uuid.UUID, 
                                 session_id: uuid.UUID) -> bool:
+        owner = self.cache.get_owner(session_id)
+        if owner is not None:
+            return owner == user_id
+        
+        if chat_writer is not None:
+            pending = chat_writer.pending_session(session_id)
+            if pending:
+                return pending["user_id"] == user_id
+        
         session = db.query(ChatSession).filter(
             ChatSession.session_id == session_id,
             ChatSession.user_id == user_id,
             ChatSession.is_active == True
         ).first()
         
-        return session is not None
+        if session is None:
+            return False
+        self.cache.set_owner(session_id, user_id)
+        return True
     
     def get_user_sessions(self, db: Session, user_id: uuid.UUID) -> list:
         sessions = db.query(ChatSession).filter(
@@ -69,6 +84,20 @@ class SessionService:
         
         return sessions
     
+    def deactivate_session(self, db: Session, user_id: uuid.UUID, session_id: uuid.UUID) -> bool:
+        session = db.query(ChatSession).filter(
+            ChatSession.session_id == session_id,
+            ChatSession.user_id == user_id,
+            ChatSession.is_active == True
+        ).first()
+        
+        if session is None:
+            return False
+        
+        # Goes through the ORM so the session cache listener invalidates it.
+        session.is_active = False
+        db.commit()
+        return True
+    
     def clear_user_active_session(self, user_id: uuid.UUID):
-        if user_id in self._active_sessions:
-            del self._active_sessions[user_id]
+        self.cache.clear_active(user_id)
@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+from sqlalchemy import event, inspect
+from backend.database.migrations.chat import ChatSession
+from .cache import LRUCache
+
+
+class InMemorySessionCacheBackend:
+    """Process-local stand-in for a shared key/value store such as Redis.
+
+    Any object with the same ``get``/``set``/``delete`` methods can be used
+    as the shared backend. This one shares nothing between worker
+    processes, so it is only correct with a single worker (or in tests):
+    a session deactivated on one worker stays cached on the others for the
+    full ``SESSION_CACHE_TTL``.
+    """
+
+    def __init__(self, maxsize=100000):
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str, ttl: float):
+        self._cache.set(key, value, ttl)
+
+    def delete(self, key: str):
+        self._cache.pop(key)
+
+
+class DiskSessionCacheBackend:
+    """SQLite-file backend, shared by every worker on the same host."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM session_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM session_cache WHERE key = ?", (key,))
+
+
+class SessionCache:
+    """Two-level cache of session ownership and each user's active session.
+
+    ``owner:<session_id>`` maps an active session to its user and
+    ``active:<user_id>`` maps a user to the session new chats go to. The
+    process-local LRU answers the steady state; the optional shared backend
+    lets other workers skip the database too. Deactivating a session
+    through the ORM drops it from this process and from the shared backend;
+    other workers' local copies expire after ``local_ttl``, which bounds how
+    long they may still accept a deactivated session. Without a shared
+    backend the local level is the only one, its invalidation is exact
+    within the process, and entries live for the full ``ttl``; run several
+    workers with a shared store (``disk`` on one host, or a Redis-style
+    backend) so deactivations reach all of them.
+    """
+
+    def __init__(self, shared=None, ttl=3600, local_ttl=5, maxsize=10000):
+        self.shared = shared
+        self.ttl = ttl
+        self.local_ttl = local_ttl if shared is not None else ttl
+        self._local = LRUCache(maxsize=maxsize, ttl=self.local_ttl)
+        self.shared_hits = 0
+        self.invalidations = 0
+
+    def _get(self, key):
+        value = self._local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                self._local.set(key, value)
+        return value
+
+    def _set(self, key, value):
+        self._local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, self.ttl)
+
+    def _delete(self, key):
+        self._local.pop(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def get_owner(self, session_id: uuid.UUID) -> Optional[uuid.UUID]:
+        owner = self._get(f"owner:{session_id}")
+        return uuid.UUID(owner) if owner else None
+
+    def set_owner(self, session_id: uuid.UUID, user_id: uuid.UUID):
+        self._set(f"owner:{session_id}", str(user_id))
+
+    def get_active(self, user_id: uuid.UUID) -> Optional[uuid.UUID]:
+        session_id = self._get(f"active:{user_id}")
+        return uuid.UUID(session_id) if session_id else None
+
+    def set_active(self, user_id: uuid.UUID, session_id: uuid.UUID):
+        self._set(f"active:{user_id}", str(session_id))
+
+    def clear_active(self, user_id: uuid.UUID):
+        self._delete(f"active:{user_id}")
+
+    def invalidate_session(self, session_id: uuid.UUID, user_id: uuid.UUID = None):
+        self.invalidations += 1
+        self._delete(f"owner:{session_id}")
+        if user_id is not None and self.get_active(user_id) == session_id:
+            self.clear_active(user_id)
+
+    def clear(self):
+        self._local.clear()
+
+    def stats(self):
+        return {
+            **self._local.stats(),
+            "backend": type(self.shared).__name__ if self.shared is not None else None,
+            "shared_hits": self.shared_hits,
+            "invalidations": self.invalidations
+        }
+
+
+def build_session_cache():
+    # No shared level unless one is configured; "memory" is single-worker only.
+    # SESSION_CACHE_LOCAL_TTL applies only with a shared level.
+    backend = os.environ.get("SESSION_CACHE_BACKEND", "none")
+    if backend == "disk":
+        shared = DiskSessionCacheBackend(os.environ.get("SESSION_CACHE_PATH", "session_cache.db"))
+    elif backend == "memory":
+        shared = InMemorySessionCacheBackend()
+    else:
+        shared = None
+
+    return SessionCache(
+        shared=shared,
+        ttl=int(os.environ.get("SESSION_CACHE_TTL", "3600")),
+        local_ttl=int(os.environ.get("SESSION_CACHE_LOCAL_TTL", "5")),
+        maxsize=int(os.environ.get("SESSION_CACHE_SIZE", "10000"))
+    )
+
+
+session_cache = build_session_cache()
+
+
+@event.listens_for(ChatSession, "after_update")
+def _invalidate_on_deactivation(mapper, connection, target):
+    if inspect(target).attrs.is_active.history.has_changes() and not target.is_active:
+        session_cache.invalidate_session(target.session_id, target.user_id)
@@ -1,27 +1,38 @@
 import os
-from dotenv import load_dotenv
-from langchain_community.tools.tavily_search import TavilySearchResults
-
-load_dotenv()
+from .search_cache import CachedSearchTool, search_cache
+from .compaction import CompactingSearchTool, tool_compactor
 
 class TavilyService:
     def __init__(self):
         self.api_key = os.environ.get("TAVILY_API_KEY")
+        self.cache_enabled = os.environ.get("SEARCH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
         
         if not self.api_key:
             raise ValueError("TAVILY_API_KEY not found in environment variables")
     
-    def get_search_tool(self, max_results=2):
+    def create_search_tool(self, max_results=2):
+        from langchain_community.tools.tavily_search import TavilySearchResults
+        
         return TavilySearchResults(
             max_results=max_results,
             tavily_api_key=self.api_key
         )
     
+    def get_search_tool(self, max_results=2):
+        search_tool = self.create_search_tool(max_results)
+        if self.cache_enabled:
+            search_tool = CachedSearchTool.wrap(search_tool, search_cache, max_results)
+        if tool_compactor is not None:
+            search_tool = CompactingSearchTool.wrap(search_tool, tool_compactor)
+        return search_tool
+    
     def get_service_info(self):
         return {
             "api_key_configured": bool(self.api_key),
             "service_name": "Tavily Search",
-            "description": "Web search and information retrieval service"
+            "description": "Web search and information retrieval service",
+            "cache_enabled": self.cache_enabled,
+            "compaction_enabled": tool_compactor is not None
         }
     
     def is_configured(self):
@@ -0,0 +1,224 @@
+import asyncio
+import os
+import re
+import threading
+from typing import Any, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from .budget import TOOL_BUDGET_MESSAGE, RoleBudget
+from .memory import estimate_tokens
+from .metrics import metrics
+from .response_cache import normalize_query
+
+TOOL_MAX_PARALLEL = int(os.environ.get("TOOL_MAX_PARALLEL", "4"))
+PRE_SEARCH_MIN_OVERLAP = float(os.environ.get("PRE_SEARCH_MIN_OVERLAP", "0.5"))
+PRE_SEARCH_MIN_TERMS = int(os.environ.get("PRE_SEARCH_MIN_TERMS", "3"))
+PRE_SEARCH_MAX_CHARS = int(os.environ.get("PRE_SEARCH_MAX_CHARS", "300"))
+
+# Turns made only of these words never need a search ("thanks", "ok great").
+SMALL_TALK = frozenset(
+    "hi hello hey thanks thank you thx ok okay k cool great nice awesome perfect yes yeah yep no nope "
+    "sure bye goodbye got it understood please".split()
+)
+
+pre_search_stats = {"started": 0, "skipped": 0, "used": 0, "unused": 0}
+
+
+def pre_search_query(text: str) -> Optional[str]:
+    """Search query for a turn's pre-search, or None when the turn does not need one.
+
+    Small talk and very short turns are skipped. Long messages are cut to
+    PRE_SEARCH_MAX_CHARS, preferring the last question they ask, since
+    search APIs bill per query and truncate long ones anyway.
+    """
+    text = " ".join(text.split())
+    terms = normalize_query(text).split()
+    if len(terms) < PRE_SEARCH_MIN_TERMS or all(term in SMALL_TALK for term in terms):
+        return None
+    if len(text) <= PRE_SEARCH_MAX_CHARS:
+        return text
+    questions = [q.strip() for q in re.findall(r"[^.?!]*\?", text) if len(q.strip()) <= PRE_SEARCH_MAX_CHARS]
+    if questions:
+        return questions[-1]
+    return text[:PRE_SEARCH_MAX_CHARS].rsplit(" ", 1)[0]
+
+
+class PreSearch:
+    """A search for the user's message started alongside the first LLM call.
+
+    The first search the model asks for in that turn is answered from it
+    when the two queries share enough terms, so the search round trip
+    overlaps the model's thinking time instead of following it.
+    """
+
+    def __init__(self, query: str, task: asyncio.Future):
+        self.query = query
+        self.task = task
+        self.terms = set(normalize_query(query).split())
+        self.claimed = False
+
+    @classmethod
+    def start(cls, search_tool, text: str, callbacks=None) -> Optional["PreSearch"]:
+        query = pre_search_query(text)
+        if query is None:
+            pre_search_stats["skipped"] += 1
+            return None
+        pre_search_stats["started"] += 1
+        task = asyncio.ensure_future(search_tool.ainvoke({"query": query}, config={"callbacks": callbacks or []}))
+        return cls(query, task)
+
+    def matches(self, query: str) -> bool:
+        terms = set(normalize_query(query).split())
+        return bool(terms) and len(terms & self.terms) / len(terms) >= PRE_SEARCH_MIN_OVERLAP
+
+    def claim(self, query: str) -> bool:
+        if self.claimed or not self.matches(query):
+            return False
+        self.claimed = True
+        pre_search_stats["used"] += 1
+        return True
+
+    async def result(self):
+        started = asyncio.get_running_loop().time()
+        result = await asyncio.shield(self.task)
+        metrics.observe("tool.pre_search_wait", (asyncio.get_running_loop().time() - started) * 1000, outcome="ok")
+        return result
+
+    def cancel(self):
+        if not self.claimed:
+            pre_search_stats["unused"] += 1
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled():
+            self.task.exception()
+
+
+class ToolRun(BaseCallbackHandler):
+    """Tool budget, fan-out limit and pre-search of one agent run.
+
+    Passed to the run as ``config["configurable"]["tool_run"]`` and as one
+    of its callbacks, which is how it counts the tokens of model output.
+    Tools wrapped in ``GuardedTool`` consult it before every call.
+    """
+
+    run_inline = True
+
+    def __init__(self, budget: RoleBudget = None, pre_search: PreSearch = None, max_parallel=None):
+        self.budget = budget or RoleBudget()
+        self.pre_search = pre_search
+        self.max_parallel = TOOL_MAX_PARALLEL if max_parallel is None else max_parallel
+        self.tool_calls = 0
+        self.refused = 0
+        self.tokens = 0
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def config(self, config: RunnableConfig) -> RunnableConfig:
+        """``config`` with this run attached."""
+        return {
+            **config,
+            "callbacks": [*(config.get("callbacks") or []), self],
+            "configurable": {**(config.get("configurable") or {}), "tool_run": self}
+        }
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                self.add_tokens(usage["output_tokens"] if usage else estimate_tokens(generation.text))
+
+    def add_tokens(self, tokens: int):
+        with self._lock:
+            self.tokens += tokens
+
+    def take_call(self) -> bool:
+        """Count a tool call against the budget; False if it must be refused."""
+        with self._lock:
+            if (self.budget.max_tokens and self.tokens >= self.budget.max_tokens) or \
+                    (self.budget.max_tool_calls and self.tool_calls >= self.budget.max_tool_calls):
+                self.refused += 1
+                return False
+            self.tool_calls += 1
+            return True
+
+    @property
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        # Created on first use, inside the run's event loop.
+        if self._semaphore is None and self.max_parallel:
+            self._semaphore = asyncio.Semaphore(self.max_parallel)
+        return self._semaphore
+
+
+def get_tool_run(config) -> Optional[ToolRun]:
+    return ((config or {}).get("configurable") or {}).get("tool_run")
+
+
+class GuardedTool(BaseTool):
+    """Tool wrapper that applies the run's ``ToolRun`` before calling the tool.
+
+    Calls beyond the role's tool-call or token budget are answered with
+    TOOL_BUDGET_MESSAGE instead of running, so the loop converges instead of
+    erroring; at most ``max_parallel`` calls of a run execute at once; and
+    the first matching search of a turn is served from its ``PreSearch``.
+    Only the public tool API is used, so the stock LangGraph ToolNode runs it.
+    """
+
+    tool: BaseTool
+
+    def _run(self, query: str, config: RunnableConfig, run_manager: Optional[Any] = None):
+        run = get_tool_run(config)
+        if run is not None and not run.take_call():
+            return TOOL_BUDGET_MESSAGE
+        result = self.tool.invoke({"query": query}, config={"callbacks": run_manager.get_child() if run_manager else None})
+        if run is not None:
+            run.add_tokens(estimate_tokens(str(result)))
+        return result
+
+    async def _arun(self, query: str, config: RunnableConfig, run_manager: Optional[Any] = None):
+        run = get_tool_run(config)
+        if run is None:
+            return await self._call(query, run_manager)
+        if not run.take_call():
+            return TOOL_BUDGET_MESSAGE
+        result = None
+        if run.pre_search is not None and run.pre_search.claim(query):
+            try:
+                result = await run.pre_search.result()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Let the tool run for real and surface its own error handling.
+                metrics.observe("tool.pre_search_wait", 0, outcome="error")
+        if result is None:
+            if run.semaphore is None:
+                result = await self._call(query, run_manager)
+            else:
+                async with run.semaphore:
+                    result = await self._call(query, run_manager)
+        run.add_tokens(estimate_tokens(str(result)))
+        return result
+
+    async def _call(self, query, run_manager):
+        return await self.tool.ainvoke({"query": query}, config={"callbacks": run_manager.get_child() if run_manager else None})
+
+    @classmethod
+    def wrap(cls, tool):
+        return cls(name=tool.name, description=tool.description, args_schema=tool.args_schema, tool=tool)
+
+
+def latest_user_text(query) -> Optional[str]:
+    """Text of the latest user message in an agent query, if it has one."""
+    if isinstance(query, str):
+        return query
+    for message in reversed(query):
+        if isinstance(message, dict):
+            if message.get("role") == "user" and isinstance(message.get("content"), str):
+                return message["content"]
+        elif isinstance(message, HumanMessage) and isinstance(message.content, str):
+            return message.content
+        elif isinstance(message, AIMessage):
+            return None
+    return None
@@ -0,0 +1,9 @@
+"""
+Offline benchmarks for the Agentic Chatbot backend.
+
+Every benchmark runs the real backend in-process against stubbed LLM and
+search backends, so no API keys or network access are required. They use
+their own database, BENCH_DATABASE_URL (a temporary SQLite file by default),
+and recreate its tables on every run. ``mixed_traffic`` is the general load
+test; the others each isolate one optimization.
+"""
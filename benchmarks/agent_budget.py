@@ -0,0 +1,71 @@
+"""
+Per-role agent budgets against a fake model that keeps asking for searches.
+
+The model requests ``--rounds`` searches per turn before answering. Each
+role is run without limits and with the limits from AgentRoles.ROLES:
+
+    python -m benchmarks.agent_budget --requests 20 --rounds 8
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .harness import FakeChatModel, FakeSearchTool, build_app, chat_payload, percentile
+
+from backend.services.budget import RoleBudget, agent_budget_stats
+from backend.services.roles import AgentRoles
+
+ROLES = ("default", "crypto_trend_teller", "news_analyst")
+
+
+async def run(role, total, rounds, latency, limited):
+    agent_budget_stats.reset()
+    llm = FakeChatModel(latency=latency, tool_rounds=rounds)
+    search_tool = FakeSearchTool(latency=latency)
+    app, token = build_app(llm, search_tool=search_tool)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+
+    original = AgentRoles.get_role_budget
+    if not limited:
+        AgentRoles.get_role_budget = lambda self, role: RoleBudget()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     timeout=120) as client:
+            async def one(index):
+                started = time.perf_counter()
+                payload = {**chat_payload(f"question {index}"), "role": role, "search_enabled": True}
+                response = await client.post("/api/v1/chat/", json=payload, headers=headers)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+            await asyncio.gather(*(one(index) for index in range(total)))
+    finally:
+        AgentRoles.get_role_budget = original
+
+    return latencies, llm.calls / total, search_tool.calls / total, agent_budget_stats.stats().get(role, {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'role':<20} {'limits':<8} {'p50 ms':>8} {'llm/req':>8} {'tools/req':>9} {'exhausted':>9}")
+    for role in ROLES:
+        for limited in (False, True):
+            latencies, llm_calls, tool_calls, stats = asyncio.run(
+                run(role, args.requests, args.rounds, args.latency, limited)
+            )
+            exhausted = sum(stats.get("exhausted", {}).values())
+            print(f"{role:<20} {'on' if limited else 'off':<8} {percentile(latencies, 0.50):>8.1f} "
+                  f"{llm_calls:>8.1f} {tool_calls:>9.1f} {exhausted:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Cold start to first response, with and without startup warm-up.
+
+Each run launches a fresh uvicorn process (real provider client classes,
+dummy API keys, SQLite) and measures from process spawn until /health
+answers and until /ready reports ready, then the latency of the first
+requests a client makes: register, login and /chat/models. The warm-up
+stage timings show what moved off the first /chat request:
+
+    python -m benchmarks.cold_start --runs 3
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from .harness import build_app, FakeChatModel
+
+from backend.database.db import DATABASE_URL
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(client, path, deadline, ok=(200,)):
+    while time.perf_counter() < deadline:
+        try:
+            response = client.get(path)
+            if response.status_code in ok:
+                return response
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{path} did not answer in time")
+
+
+def timed(call):
+    started = time.perf_counter()
+    response = call()
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def run(warmup):
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": DATABASE_URL, "WARMUP_ENABLED": "true" if warmup else "false",
+           "CHAT_WRITE_BEHIND": "false"}
+    spawned = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            deadline = spawned + 60
+            wait_for(client, "/health", deadline)
+            result = {"health": (time.perf_counter() - spawned) * 1000}
+            ready = wait_for(client, "/ready", deadline)
+            result["ready"] = (time.perf_counter() - spawned) * 1000
+            result["warmup_ms"] = ready.json()["warmup_ms"]
+
+            name = f"cold-{uuid.uuid4().hex[:8]}"
+            user = {"username": name, "email": f"{name}@example.com", "password": "cold-start-pw"}
+            result["register"] = timed(lambda: client.post("/api/v1/auth/register", json=user))
+            result["login"] = timed(lambda: client.post(
+                "/api/v1/auth/login", json={"username": user["username"], "password": user["password"]}))
+            result["models"] = timed(lambda: client.get("/api/v1/chat/models"))
+            return result
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # Create the schema once; the servers share the SQLite file.
+    build_app(FakeChatModel())
+
+    columns = ("health", "ready", "register", "login", "models")
+    print(f"{'warm-up':<8} " + " ".join(f"{column + ' ms':>12}" for column in columns))
+    for warmup in (False, True):
+        results = [run(warmup) for _ in range(args.runs)]
+        averages = {column: sum(result[column] for result in results) / len(results) for column in columns}
+        print(f"{'on' if warmup else 'off':<8} " + " ".join(f"{averages[column]:>12.1f}" for column in columns))
+        if warmup:
+            stages = results[-1]["warmup_ms"]
+            print("\nwarm-up stages (ms): " + ", ".join(f"{name}={ms}" for name, ms in stages.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Prompt size with and without search-result compaction.
+
+The fake model runs two search rounds per turn; each search returns five
+overlapping news-style snippets. Reports the prompt characters the model
+received per request and the tokens compaction removed:
+
+    python -m benchmarks.compaction --requests 20
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .harness import FakeChatModel, FakeSearchTool, build_app, chat_payload, percentile
+
+from backend.services import tavily as tavily_module
+from backend.services.compaction import ToolResultCompactor
+
+ARTICLE = (
+    "Bitcoin rose 4 percent on Tuesday to trade above 67,000 dollars. "
+    "Analysts attributed the move to renewed inflows into spot exchange-traded funds. "
+    "The funds took in more than 500 million dollars over the past week, according to fund flow data. "
+    "Ether followed with a 3 percent gain while smaller tokens were mixed. "
+    "Trading volumes remained below their March peak despite the rally. "
+    "Some traders warned that leverage in futures markets has climbed to a three-month high. "
+    "Funding rates on perpetual swaps turned positive across major exchanges. "
+    "Regulators in several jurisdictions are still reviewing rules for stablecoin issuers. "
+    "Market participants are watching the upcoming inflation report for signs of rate cuts. "
+    "A softer reading could support risk assets including cryptocurrencies. "
+    "Long-term holders have been moving coins off exchanges, on-chain data shows. "
+    "Mining difficulty reached a record after the latest adjustment. "
+    "Miners' revenue per unit of hash rate remains close to historic lows. "
+    "Options markets price a 60 percent chance of Bitcoin ending the month higher. "
+    "Analysts caution that volatility could return ahead of macroeconomic data releases."
+)
+
+MODES = {
+    "off": None,
+    "dedup+truncate": dict(max_tokens=800, max_result_tokens=120),
+    "+summarize": dict(max_tokens=800, max_result_tokens=120, summarize=True, summary_sentences=3),
+}
+
+
+async def run(mode, total, latency):
+    settings = MODES[mode]
+    compactor = ToolResultCompactor(**settings) if settings else None
+    tavily_module.tool_compactor = compactor
+    llm = FakeChatModel(latency=latency, tool_rounds=2)
+    search_tool = FakeSearchTool(latency=latency, max_results=5, content=ARTICLE)
+    app, token = build_app(llm, search_tool=search_tool)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies, saved = [], []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                 timeout=120) as client:
+        async def one(index):
+            started = time.perf_counter()
+            payload = {**chat_payload(f"bitcoin price news {index}"), "role": "news_analyst",
+                       "search_enabled": True}
+            response = await client.post("/api/v1/chat/", json=payload, headers=headers)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+            saved.append(response.json()["stage_timings"]["tool_tokens_saved"])
+
+        await asyncio.gather(*(one(index) for index in range(total)))
+
+    return latencies, llm.prompt_chars / total, sum(saved) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'compaction':<15} {'p50 ms':>8} {'prompt chars/req':>16} {'tokens saved/req':>16}")
+    for mode in MODES:
+        latencies, prompt_chars, saved = asyncio.run(run(mode, args.requests, args.latency))
+        print(f"{mode:<15} {percentile(latencies, 0.50):>8.1f} {prompt_chars:>16.0f} {saved:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Concurrent POST /api/v1/chat/ throughput against a stubbed LLM.
+
+Compares the async-native agent path with the same path run as a blocking
+call inside the async handler, i.e. what a synchronous agent call costs
+the event loop:
+
+    python -m benchmarks.concurrent_chat --requests 50 --concurrency 50 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from .harness import FakeChatModel, build_app, chat_payload
+
+from backend.services.agent import AgentService
+
+_async_path = AgentService.aget_response_from_ai_agent
+
+
+async def _blocking_path(self, *args, **kwargs):
+    # The real async path, driven to completion on another thread while this
+    # event loop waits: nothing else is served until the agent returns.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _async_path(self, *args, **kwargs)).result()
+
+
+async def run(mode, total, concurrency, latency):
+    AgentService.aget_response_from_ai_agent = _blocking_path if mode == "blocking" else _async_path
+    app, token = build_app(FakeChatModel(latency=latency), pool_size=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.post("/api/v1/chat/", json=chat_payload(), headers=headers)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stubbed LLM latency in seconds")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'requests':>8} {'seconds':>8} {'req/s':>8}")
+    for mode in ("blocking", "async"):
+        elapsed = asyncio.run(run(mode, args.requests, args.concurrency, args.latency))
+        print(f"{mode:<10} {args.requests:>8} {elapsed:>8.2f} {args.requests / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Request deadlines against a fake model that is slower than the deadline.
+
+Sends blocking and streaming chats with ``timeout_seconds`` below the
+model latency and reports how long callers waited, how many LLM calls were
+still running afterwards, and the status stored for each turn:
+
+    python -m benchmarks.deadlines --requests 40 --concurrency 10 --timeout 0.5
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+from .harness import FakeChatModel, build_app, chat_payload, percentile
+
+from backend.database.migrations.chat import Chat
+
+
+async def run(endpoint, total, concurrency, timeout, latency):
+    llm = FakeChatModel(latency=latency, response="word " * 40)
+    app, token = build_app(llm, pool_size=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                 timeout=latency * 4) as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(endpoint, json={**chat_payload(), "timeout_seconds": timeout},
+                                             headers=headers)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(one() for _ in range(total)))
+
+    await asyncio.sleep(0.1)
+    db = app.state.bench_sessionmaker()
+    try:
+        statuses = Counter(status for (status,) in db.query(Chat.status))
+    finally:
+        db.close()
+    return latencies, llm.in_flight, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<22} {'p50 ms':>8} {'max ms':>8} {'in flight':>9}  statuses")
+    for endpoint in ("/api/v1/chat/", "/api/v1/chat/stream"):
+        latencies, in_flight, statuses = asyncio.run(
+            run(endpoint, args.requests, args.concurrency, args.timeout, args.latency)
+        )
+        print(f"{endpoint:<22} {percentile(latencies, 0.50):>8.1f} {max(latencies):>8.1f} "
+              f"{in_flight:>9}  {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
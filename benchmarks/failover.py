@@ -0,0 +1,80 @@
+"""
+Provider failover and hedging against fake Gemini/Groq models.
+
+Gemini is the requested provider and misbehaves per scenario; Groq is the
+configured backup. Each scenario runs with no routing, failover only, and
+failover plus hedging:
+
+    python -m benchmarks.failover --requests 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from .harness import FakeChatModel, build_app, chat_payload, percentile
+
+from backend.services.container import service_container
+from backend.services.routing import ProviderRouter
+
+SCENARIOS = {
+    "flaky": dict(latency=0.1, failure_rate=0.3),
+    "slow-tail": dict(latency=0.1, slow_rate=0.1, slow_latency=2.0),
+    "outage": dict(latency=0.05, failure_rate=1.0),
+}
+
+MODES = {
+    "single": dict(),
+    "failover": dict(fallbacks={"gemini": [("groq", None)]}, timeout=5.0),
+    "hedged": dict(fallbacks={"gemini": [("groq", None)]}, timeout=5.0, hedge_after=0.3),
+}
+
+
+async def run(scenario, mode, total, concurrency):
+    random.seed(7)
+    router = ProviderRouter(**MODES[mode])
+    # The agent service is built once per process; swap its router in place.
+    service_container.agent_service.router = router
+    llms = {"gemini": FakeChatModel(**SCENARIOS[scenario]), "groq": FakeChatModel(latency=0.15)}
+    app, token = build_app(llms, pool_size=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/v1/chat/", json=chat_payload(), headers=headers)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.json()["ai_response"].startswith("Error: "):
+                    errors += 1
+
+        await asyncio.gather(*(one() for _ in range(total)))
+
+    return latencies, errors, router.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<10} {'mode':<9} {'errors':>6} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'failover':>8} {'hedges':>6} {'won':>4} {'skipped':>7}")
+    for scenario in SCENARIOS:
+        for mode in MODES:
+            latencies, errors, stats = asyncio.run(run(scenario, mode, args.requests, args.concurrency))
+            print(f"{scenario:<10} {mode:<9} {errors:>6} {percentile(latencies, 0.50):>8.1f} "
+                  f"{percentile(latencies, 0.99):>8.1f} {stats['failovers']:>8} {stats['hedges']:>6} "
+                  f"{stats['hedges_won']:>4} {stats['short_circuited']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Stubbed LLM backends used by the benchmarks
+"""
+
+import asyncio
+import json
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers with a fixed response after a fixed latency.
+
+    The sync path sleeps with ``time.sleep`` and the async path with
+    ``asyncio.sleep``, which mirrors how the real provider clients behave.
+    ``slow_rate`` of calls take ``slow_latency`` instead, and ``failure_rate``
+    of calls raise after the latency, like a rate-limited provider. With
+    ``max_concurrency`` set, calls beyond that many in flight raise a 429.
+    With ``tool_rounds`` set, the model asks for ``tools_per_round`` searches
+    that many times per turn before answering, like a search-happy agent.
+    With ``response_tokens`` set, answers are that many words long instead of
+    ``response``. Every reply reports ``usage_metadata`` (about four prompt
+    characters per input token, one word per output token).
+    """
+
+    latency: float = 0.0
+    response: str = "This is a stubbed response."
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    failure_rate: float = 0.0
+    error: str = "429 Too Many Requests"
+    max_concurrency: int = 0
+    tool_rounds: int = 0
+    tools_per_round: int = 1
+    response_tokens: int = 0
+    in_flight: int = 0
+    calls: int = 0
+    failures: int = 0
+    prompt_chars: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _call_latency(self, messages: List[BaseMessage] = ()) -> float:
+        self.calls += 1
+        self.prompt_chars += sum(len(str(message.content)) for message in messages)
+        return self.slow_latency if random.random() < self.slow_rate else self.latency
+
+    def _maybe_fail(self):
+        if random.random() < self.failure_rate:
+            self.failures += 1
+            raise RuntimeError(self.error)
+
+    def _tool_calls(self, messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+        rounds = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage) and message.tool_calls:
+                rounds += 1
+        if rounds >= self.tool_rounds:
+            return []
+        query = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        return [
+            {"name": "tavily_search_results_json", "args": {"query": f"{query} ({rounds}.{index})"},
+             "id": f"call_{rounds}_{index}", "type": "tool_call"}
+            for index in range(self.tools_per_round)
+        ]
+
+    def _text(self) -> str:
+        if self.response_tokens:
+            words = self.response.split(" ")
+            return " ".join(words[index % len(words)] for index in range(self.response_tokens))
+        return self.response
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], output: str) -> Dict[str, int]:
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = len(output.split()) if output else 0
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def _result(self, messages: List[BaseMessage] = ()) -> ChatResult:
+        tool_calls = self._tool_calls(messages)
+        content = "" if tool_calls else self._text()
+        message = AIMessage(content=content, tool_calls=tool_calls, usage_metadata=self._usage(messages, content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._call_latency(messages))
+        self._maybe_fail()
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.in_flight += 1
+        try:
+            if self.max_concurrency and self.in_flight > self.max_concurrency:
+                self.failures += 1
+                raise RuntimeError("429 Too Many Requests: concurrency quota exceeded")
+            await asyncio.sleep(self._call_latency(messages))
+            self._maybe_fail()
+            return self._result(messages)
+        finally:
+            self.in_flight -= 1
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tool_calls = self._tool_calls(messages)
+        if tool_calls:
+            await asyncio.sleep(self._call_latency(messages))
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+                for index, call in enumerate(tool_calls)
+            ]))
+            return
+        text = self._text()
+        words = text.split(" ")
+        latency = self._call_latency(messages)
+        for index, word in enumerate(words):
+            await asyncio.sleep(latency / len(words))
+            if index == 0:
+                self._maybe_fail()
+            last = index == len(words) - 1
+            token = word if last else word + " "
+            usage = self._usage(messages, text) if last else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeSearchTool(BaseTool):
+    """Local stand-in for TavilySearchResults that counts upstream calls.
+
+    With ``content`` set, each result carries ``snippet_sentences`` of its
+    sentences, and consecutive results overlap by half, like news sites
+    quoting the same wire story.
+    """
+
+    name: str = "tavily_search_results_json"
+    description: str = "A search engine. Input should be a search query."
+    latency: float = 0.0
+    max_results: int = 2
+    content: str = ""
+    snippet_sentences: int = 6
+    calls: int = 0
+
+    def _results(self, query: str) -> List[Dict[str, str]]:
+        self.calls += 1
+        sentences = [sentence.strip() + "." for sentence in self.content.split(".") if sentence.strip()]
+        step = max(1, self.snippet_sentences // 2)
+        return [
+            {"url": f"https://example.com/{index}",
+             "content": " ".join([f"Result {index} for {query}."] +
+                                 sentences[index * step:index * step + self.snippet_sentences])}
+            for index in range(self.max_results)
+        ]
+
+    def _run(self, query: str, run_manager: Any = None) -> List[Dict[str, str]]:
+        time.sleep(self.latency)
+        return self._results(query)
+
+    async def _arun(self, query: str, run_manager: Any = None) -> List[Dict[str, str]]:
+        await asyncio.sleep(self.latency)
+        return self._results(query)
+
@@ -0,0 +1,122 @@
+"""
+In-process harness: a real FastAPI app backed by SQLite and stubbed LLMs
+
+The app is pointed at BENCH_DATABASE_URL (a SQLite file in the temp
+directory by default, or e.g. a local Postgres scratch database), never at
+DATABASE_URL: ``build_app`` drops and recreates every table.
+"""
+
+import os
+import tempfile
+import uuid
+
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL") or \
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'agentic_chatbot_bench.db')}"
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+# Empty rather than unset, so a .env file cannot point the async engine elsewhere.
+os.environ["ASYNC_DATABASE_URL"] = ""
+
+_BENCH_ENV = {
+    "GEMINI_API_KEY": "bench",
+    "GEMINI_MODEL": "gemini-2.0-flash",
+    "GEMINI_TEMPERATURE": "0.7",
+    "GROQ_API_KEY": "bench",
+    "GROQ_MODEL": "llama-3.3-70b-versatile",
+    "GROQ_TEMPERATURE": "0.7",
+    "TAVILY_API_KEY": "bench",
+}
+for _key, _value in _BENCH_ENV.items():
+    if not os.environ.get(_key):
+        os.environ[_key] = _value
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.db import Base, DATABASE_URL, get_db
+from backend.database.migrations import chat as _chat_tables, user as _user_tables
+from backend.database.models.user import UserModel
+from backend.services.agent import AgentService
+from backend.services.auth import AuthService
+from backend.services.registry import agent_registry
+from backend.services.tavily import TavilyService
+from main import app
+
+from .fakes import FakeChatModel, FakeSearchTool
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+def build_app(llm, pool_size=5, search_tool=None):
+    """Point the app at a fresh bench database, a stubbed LLM and a fake search tool.
+
+    ``llm`` is either one model for every provider or a {provider: model}
+    dict. Returns the app and a bearer token for a freshly registered user.
+    """
+    connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+    engine = create_engine(DATABASE_URL, pool_size=pool_size, connect_args=connect_args)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def get_bench_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_bench_db
+    app.state.bench_sessionmaker = SessionLocal
+    agent_registry.clear()
+    llms = llm if isinstance(llm, dict) else None
+    AgentService.get_llm_by_provider = (
+        lambda self, provider, model=None, temperature=None: llms[provider.lower()] if llms else llm
+    )
+    search_tool = search_tool or FakeSearchTool()
+    TavilyService.create_search_tool = lambda self, max_results=2: search_tool
+
+    db = SessionLocal()
+    try:
+        user = UserModel.create_user(db, f"bench-{uuid.uuid4().hex[:8]}", "bench@example.com", "not-a-real-hash")
+        token = AuthService.create_access_token({"sub": str(user.id)})
+    finally:
+        db.close()
+
+    return app, token
+
+
+def create_user(app, username, password):
+    """Register a user with a real bcrypt hash, bypassing the HTTP layer."""
+    sessions = app.dependency_overrides[get_db]()
+    db = next(sessions)
+    try:
+        UserModel.create_user(db, username, f"{username}@example.com", AuthService.hash_password(password))
+    finally:
+        sessions.close()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+    return ordered[index]
+
+
+def chat_payload(message="What is the price of BTC today?"):
+    return {
+        "message": message,
+        "model_name": "gemini-2.0-flash",
+        "model_provider": "gemini",
+        "role": "default",
+        "search_enabled": False,
+        "temperature": 0.7,
+    }
+
+
+__all__ = ["build_app", "create_user", "percentile", "chat_payload", "FakeChatModel", "FakeSearchTool"]
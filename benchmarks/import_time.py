@@ -0,0 +1,81 @@
+"""
+Import cost of ``main:app``, from ``python -X importtime``.
+
+Each run imports the app in a fresh interpreter (what a new worker or a
+``--reload`` restart pays). Reports the wall time of the import, the
+self time per top-level package and the cumulative time of the slowest
+backend modules:
+
+    python -m benchmarks.import_time --runs 5 --top 15
+"""
+
+import argparse
+import collections
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+_ENV = {
+    "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.gettempdir(), 'agentic_chatbot_bench.db')}",
+    "GEMINI_API_KEY": "bench",
+    "GROQ_API_KEY": "bench",
+    "TAVILY_API_KEY": "bench",
+}
+
+_TIMED_IMPORT = "import time; started = time.perf_counter(); import main; print((time.perf_counter() - started) * 1000)"
+
+
+def import_once(extra_env=None):
+    env = {**_ENV, **os.environ, **(extra_env or {}), "PYTHONWARNINGS": "ignore"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _TIMED_IMPORT],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append((int(match[1]), int(match[2]), match[4]))
+    return float(result.stdout.strip().splitlines()[-1]), rows
+
+
+def summarize(rows, top):
+    packages = collections.Counter()
+    for self_us, _, name in rows:
+        packages[name.split(".")[0]] += self_us
+    backend = sorted(((cumulative, name) for _, cumulative, name in rows if name.split(".")[0] in ("backend", "main")),
+                     reverse=True)
+    return packages.most_common(top), backend[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    walls, rows = [], None
+    for _ in range(args.runs):
+        wall, rows = import_once()
+        walls.append(wall)
+    walls.sort()
+
+    print(f"import main: median {walls[len(walls) // 2]:.0f} ms, min {walls[0]:.0f} ms over {args.runs} runs")
+    print(f"modules imported: {len(rows)}")
+    packages, backend = summarize(rows, args.top)
+    print(f"\n{'package':<28} {'self ms':>8}")
+    for name, self_us in packages:
+        print(f"{name:<28} {self_us / 1000:>8.1f}")
+    print(f"\n{'backend module':<40} {'cumulative ms':>13}")
+    for cumulative, name in backend:
+        print(f"{name:<40} {cumulative / 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
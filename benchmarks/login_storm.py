@@ -0,0 +1,72 @@
+"""
+Chat latency during a login storm.
+
+Runs steady chat traffic against a stubbed LLM while a burst of logins hits
+POST /api/v1/auth/login, once with bcrypt verified inline on the event loop
+and once through the bounded password-hash pool:
+
+    python -m benchmarks.login_storm --logins 40 --chat-clients 10 --chats-per-client 10
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .harness import FakeChatModel, build_app, chat_payload, create_user, percentile
+
+from backend.services.auth import AuthService, pwd_context
+
+_pooled_verify = AuthService.averify_password
+
+
+async def _inline_verify(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def run(mode, logins, chat_clients, chats_per_client, latency):
+    AuthService.averify_password = _inline_verify if mode == "inline" else _pooled_verify
+    app, token = build_app(FakeChatModel(latency=latency), pool_size=chat_clients + logins)
+    create_user(app, "storm", "storm-password")
+    headers = {"Authorization": f"Bearer {token}"}
+    chat_latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def chat_client():
+            for _ in range(chats_per_client):
+                started = time.perf_counter()
+                response = await client.post("/api/v1/chat/", json=chat_payload(), headers=headers)
+                response.raise_for_status()
+                chat_latencies.append((time.perf_counter() - started) * 1000)
+
+        async def login():
+            response = await client.post("/api/v1/auth/login", json={"username": "storm", "password": "storm-password"})
+            response.raise_for_status()
+
+        async def login_storm():
+            await asyncio.sleep(latency)
+            await asyncio.gather(*(login() for _ in range(logins)))
+
+        await asyncio.gather(login_storm(), *(chat_client() for _ in range(chat_clients)))
+
+    return chat_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--chat-clients", type=int, default=10)
+    parser.add_argument("--chats-per-client", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.1, help="Stubbed LLM latency in seconds")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'chats':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ("inline", "pool"):
+        latencies = asyncio.run(run(mode, args.logins, args.chat_clients, args.chats_per_client, args.latency))
+        print(f"{mode:<8} {len(latencies):>6} {percentile(latencies, 0.50):>8.1f} "
+              f"{percentile(latencies, 0.99):>8.1f} {max(latencies):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Mixed API traffic against stubbed LLM and search backends.
+
+Each client is its own user: it logs in once, then for ``--duration``
+seconds picks requests from the weighted ``--mix`` of POST /chat/,
+GET /chat/history/{session_id}, GET /chat/sessions and POST /auth/login
+(a real bcrypt check). Chats reuse the client's session so history grows
+as the run goes on, and ``--search-rate`` of them have search enabled and
+call the fake Tavily tool ``--tool-rounds`` times. The app runs with its
+lifespan (service container, warm-up), in-process, on BENCH_DATABASE_URL
+(SQLite by default, or a local Postgres scratch database).
+
+Reports throughput and p50/p95/p99 per endpoint, then the per-stage
+breakdown the server returned in ``stage_timings`` for every chat:
+
+    python -m benchmarks.mixed_traffic --clients 20 --duration 10 --latency 0.2
+    python -m benchmarks.mixed_traffic --mix chat=1,history=4,sessions=4,login=1 --tool-rounds 2
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from .harness import FakeChatModel, FakeSearchTool, build_app, chat_payload, create_user, percentile
+
+from backend.services.container import service_container
+
+ENDPOINTS = ("chat", "history", "sessions", "login")
+
+
+def parse_mix(value):
+    weights = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}, expected one of {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class Client:
+    """One simulated user with its own token and chat session."""
+
+    def __init__(self, http, index, mix, search_rate, seed):
+        self.http = http
+        self.username = f"load-{index}"
+        self.password = f"load-password-{index}"
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.search_rate = search_rate
+        self.random = random.Random(seed + index)
+        self.headers = {}
+        self.session_id = None
+        self.turn = 0
+
+    async def login(self):
+        response = await self.http.post("/api/v1/auth/login",
+                                        json={"username": self.username, "password": self.password})
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    async def chat(self):
+        self.turn += 1
+        payload = chat_payload(f"Question {self.turn}: what moved the crypto market today?")
+        payload["search_enabled"] = self.random.random() < self.search_rate
+        if self.session_id:
+            payload["session_id"] = self.session_id
+        response = await self.http.post("/api/v1/chat/", json=payload, headers=self.headers)
+        if response.status_code == 200:
+            self.session_id = response.json()["session_id"]
+        return response
+
+    async def history(self):
+        if not self.session_id:
+            return await self.chat()
+        return await self.http.get(f"/api/v1/chat/history/{self.session_id}", headers=self.headers)
+
+    async def sessions(self):
+        return await self.http.get("/api/v1/chat/sessions", headers=self.headers)
+
+    def pick(self):
+        return self.random.choices(self.names, self.weights)[0]
+
+
+async def run(args):
+    llm = FakeChatModel(latency=args.latency, response_tokens=args.response_tokens,
+                        tool_rounds=args.tool_rounds, tools_per_round=args.tools_per_round)
+    search = FakeSearchTool(latency=args.search_latency, content="Bitcoin rose. Ether followed. Volumes were thin. " * 4)
+    app, _ = build_app(llm, pool_size=args.clients, search_tool=search)
+    for index in range(args.clients):
+        create_user(app, f"load-{index}", f"load-password-{index}")
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    stages = defaultdict(list)
+
+    async with app.router.lifespan_context(app):
+        while not service_container.ready:
+            await asyncio.sleep(0.01)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     timeout=None) as http:
+            clients = [Client(http, index, args.mix, args.search_rate, args.seed) for index in range(args.clients)]
+            await asyncio.gather(*(client.login() for client in clients))
+
+            async def drive(client, deadline):
+                while time.perf_counter() < deadline:
+                    name = client.pick()
+                    started = time.perf_counter()
+                    response = await getattr(client, name)()
+                    latencies[name].append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 200:
+                        errors[name] += 1
+                    elif name == "chat":
+                        timings = response.json().get("stage_timings") or {}
+                        for stage, ms in (timings.get("stages") or {}).items():
+                            stages[stage].append(ms)
+                        for key in ("llm_ms", "tool_ms", "total_ms"):
+                            if key in timings:
+                                stages[key].append(timings[key])
+                        stages["prompt_tokens"].append(timings.get("prompt_tokens", 0))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(drive(client, started + args.duration) for client in clients))
+            elapsed = time.perf_counter() - started
+
+    return latencies, errors, stages, elapsed, llm, search
+
+
+def report(latencies, errors, stages, elapsed, llm, search):
+    total = sum(len(values) for values in latencies.values())
+    print(f"{'endpoint':<10} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in ENDPOINTS:
+        values = latencies.get(name)
+        if not values:
+            continue
+        print(f"{name:<10} {len(values):>8} {errors[name]:>7} {len(values) / elapsed:>8.1f} "
+              f"{percentile(values, 0.50):>8.1f} {percentile(values, 0.95):>8.1f} {percentile(values, 0.99):>8.1f}")
+    combined = [value for values in latencies.values() for value in values]
+    print(f"{'all':<10} {total:>8} {sum(errors.values()):>7} {total / elapsed:>8.1f} "
+          f"{percentile(combined, 0.50):>8.1f} {percentile(combined, 0.95):>8.1f} {percentile(combined, 0.99):>8.1f}")
+
+    if stages:
+        print(f"\n{'chat stage':<16} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for name, values in stages.items():
+            print(f"{name:<16} {sum(values) / len(values):>8.1f} {percentile(values, 0.50):>8.1f} "
+                  f"{percentile(values, 0.95):>8.1f} {percentile(values, 0.99):>8.1f}")
+    print(f"\nLLM calls: {llm.calls}, search calls: {search.calls}, elapsed: {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of traffic")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("chat=4,history=3,sessions=2,login=1"),
+                        help="Weighted endpoint mix, e.g. chat=4,history=3,sessions=2,login=1")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stubbed LLM latency in seconds")
+    parser.add_argument("--response-tokens", type=int, default=60, help="Words per stubbed answer")
+    parser.add_argument("--search-rate", type=float, default=0.3, help="Fraction of chats with search enabled")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="Search rounds per chat with search enabled")
+    parser.add_argument("--tools-per-round", type=int, default=1)
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Fake Tavily latency in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report(*asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+/api/v1/chat/models served by rebuilding the catalog, from the cached body, and as a 304.
+
+Many concurrent clients poll the endpoint; reports the cost of producing
+the body, then p50/p99 per mode over HTTP and how often the catalog was
+built:
+
+    python -m benchmarks.models_catalog --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .harness import FakeChatModel, build_app, percentile
+
+from backend.interactors.chat import ChatInteractor
+from backend.services.gemini import GeminiService
+from backend.services.groq import GroqService
+from backend.services.model_catalog import model_catalog
+
+
+def handler_cost(calls=2000):
+    """Microseconds per call for building the body the old way vs taking the cached one."""
+    interactor = ChatInteractor()
+
+    def legacy():
+        # What every request used to do: fresh provider services, a new
+        # response model and its serialization.
+        GeminiService(), GroqService()
+        return interactor.get_available_models().model_dump_json()
+
+    results = {}
+    for name, call in (("legacy", legacy), ("cached", interactor.get_models_catalog)):
+        started = time.perf_counter()
+        for _ in range(calls):
+            call()
+        results[name] = (time.perf_counter() - started) / calls * 1e6
+    return results
+
+
+async def run(mode, total, concurrency):
+    app, _ = build_app(FakeChatModel())
+    model_catalog.refresh()
+    builds_before = model_catalog.builds
+    if mode == "rebuild":
+        # Old behaviour: build the catalog on every request.
+        version = model_catalog.version
+        model_catalog.version = lambda counter=iter(range(10 ** 9)): next(counter)
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        first = await client.get("/api/v1/chat/models")
+        first.raise_for_status()
+        headers = {"If-None-Match": first.headers["etag"]} if mode == "304" else {}
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/api/v1/chat/models", headers=headers)
+                assert response.status_code == (304 if mode == "304" else 200), response.status_code
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    if mode == "rebuild":
+        model_catalog.version = version
+    return latencies, total / elapsed, model_catalog.builds - builds_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    for name, micros in handler_cost().items():
+        print(f"{name} body: {micros:.1f} us/call")
+    print()
+    print(f"{'mode':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'builds':>7}")
+    for mode in ("rebuild", "cached", "304"):
+        latencies, throughput, builds = asyncio.run(run(mode, args.requests, args.concurrency))
+        print(f"{mode:<10} {throughput:>8.0f} {percentile(latencies, 0.5):>8.2f} "
+              f"{percentile(latencies, 0.99):>8.2f} {builds:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Tool fan-out and pre-search for search-heavy turns.
+
+The fake model asks for ``--searches`` searches in its first step and then
+answers; every search and every LLM call takes ``--latency`` seconds.
+Runs the crypto_trend_teller role with tool calls serialized
+(TOOL_MAX_PARALLEL=1), with bounded fan-out, and with fan-out plus
+pre-search:
+
+    python -m benchmarks.parallel_tools --requests 20 --searches 3
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .harness import FakeChatModel, FakeSearchTool, build_app, chat_payload, percentile
+
+from backend.services import agent as agent_module, tool_node
+from backend.services.search_cache import search_cache
+
+MODES = {
+    "serial": dict(max_parallel=1, pre_search=False),
+    "parallel": dict(max_parallel=4, pre_search=False),
+    "pre-search": dict(max_parallel=4, pre_search=True),
+}
+
+
+async def run(mode, total, searches, latency):
+    tool_node.TOOL_MAX_PARALLEL = MODES[mode]["max_parallel"]
+    agent_module.PRE_SEARCH_ENABLED = MODES[mode]["pre_search"]
+    llm = FakeChatModel(latency=latency, tool_rounds=1, tools_per_round=searches)
+    search_tool = FakeSearchTool(latency=latency)
+    app, token = build_app(llm, search_tool=search_tool)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                 timeout=120) as client:
+        async def one(index):
+            started = time.perf_counter()
+            payload = {**chat_payload(f"price of coin {index} today"), "role": "crypto_trend_teller",
+                       "search_enabled": True}
+            response = await client.post("/api/v1/chat/", json=payload, headers=headers)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(one(index) for index in range(total)))
+
+    return latencies, search_tool.calls / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--searches", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(f"{'mode':<11} {'p50 ms':>8} {'p99 ms':>8} {'searches/req':>12}")
+    for mode in MODES:
+        search_cache.clear()
+        latencies, searches = asyncio.run(run(mode, args.requests, args.searches, args.latency))
+        print(f"{mode:<11} {percentile(latencies, 0.50):>8.1f} {percentile(latencies, 0.99):>8.1f} {searches:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Bursts against a provider that enforces its own concurrency quota.
+
+The fake Gemini model answers 429 when more than ``--quota`` calls are in
+flight. Without local limits a burst turns into errors; with a matching
+concurrency cap the excess waits in line instead. A second run shows a
+per-user quota keeping one user's burst from delaying another user:
+
+    python -m benchmarks.rate_limits --burst 60 --quota 4
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .harness import FakeChatModel, build_app, chat_payload, create_user, percentile
+
+from backend.services import agent as agent_module
+from backend.services.rate_limit import ProviderLimits, UserQuotas
+from backend.interactors import chat as chat_interactor_module
+from backend.services.container import service_container
+from backend.services.routing import ProviderRouter
+
+
+def _configure(max_concurrency, user_quotas):
+    # The agent service is built once per process; swap its router and limits in place.
+    service_container.agent_service.router = ProviderRouter()
+    service_container.agent_service.limits = ProviderLimits(queue_timeout=30)
+    chat_interactor_module.user_quotas = user_quotas
+    limits = {"max_concurrency": max_concurrency, "requests_per_minute": 0, "burst": None}
+    agent_module.GeminiService.get_rate_limits = lambda self, model=None: {} if model else limits
+
+
+async def provider_burst(limited, burst, quota, latency):
+    _configure(quota if limited else 0, UserQuotas())
+    llm = FakeChatModel(latency=latency, max_concurrency=quota)
+    app, token = build_app(llm, pool_size=burst)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies, errors = [], 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            nonlocal errors
+            started = time.perf_counter()
+            response = await client.post("/api/v1/chat/", json=chat_payload(), headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200 or response.json()["ai_response"].startswith("Error: "):
+                errors += 1
+
+        await asyncio.gather(*(one() for _ in range(burst)))
+
+    return latencies, errors
+
+
+async def user_burst(quota_enabled, burst, quota, latency):
+    _configure(quota, UserQuotas(max_concurrent=2) if quota_enabled else UserQuotas())
+    app, token = build_app(FakeChatModel(latency=latency), pool_size=burst + 10)
+    create_user(app, "quiet", "quiet-password")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        login = await client.post("/api/v1/auth/login", json={"username": "quiet", "password": "quiet-password"})
+        quiet_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        noisy_headers = {"Authorization": f"Bearer {token}"}
+        quiet_latencies, rejected = [], 0
+
+        async def noisy():
+            nonlocal rejected
+            response = await client.post("/api/v1/chat/", json=chat_payload(), headers=noisy_headers)
+            rejected += response.status_code == 429
+
+        async def quiet():
+            await asyncio.sleep(latency / 2)
+            for _ in range(5):
+                started = time.perf_counter()
+                response = await client.post("/api/v1/chat/", json=chat_payload(), headers=quiet_headers)
+                response.raise_for_status()
+                quiet_latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(quiet(), *(noisy() for _ in range(burst)))
+
+    return quiet_latencies, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=60)
+    parser.add_argument("--quota", type=int, default=4, help="Concurrent calls the fake provider accepts")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stubbed LLM latency in seconds")
+    args = parser.parse_args()
+
+    print(f"{'provider limit':<15} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'max ms':>8}")
+    for limited in (False, True):
+        latencies, errors = asyncio.run(provider_burst(limited, args.burst, args.quota, args.latency))
+        print(f"{'on' if limited else 'off':<15} {args.burst:>8} {errors:>6} "
+              f"{percentile(latencies, 0.50):>8.1f} {max(latencies):>8.1f}")
+
+    print()
+    print(f"{'user quota':<15} {'noisy 429s':>10} {'quiet p50 ms':>12} {'quiet max ms':>12}")
+    for quota_enabled in (False, True):
+        latencies, rejected = asyncio.run(user_burst(quota_enabled, args.burst, args.quota, args.latency))
+        print(f"{'on' if quota_enabled else 'off':<15} {rejected:>10} "
+              f"{percentile(latencies, 0.50):>12.1f} {max(latencies):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Chat throughput with per-turn commits vs. batched write-behind persistence.
+
+The LLM stub answers instantly so the database insert dominates. Write-behind
+mode is drained (flushed on shutdown) before the row count is checked:
+
+    python -m benchmarks.write_behind --requests 300 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from .harness import FakeChatModel, build_app, chat_payload
+
+from backend.database.migrations.chat import Chat
+from backend.interactors import chat as chat_interactor_module
+from backend.services import session as session_service_module
+from backend.services.chat_writer import ChatWriteBehind
+
+
+def _use_writer(writer):
+    chat_interactor_module.chat_writer = writer
+    session_service_module.chat_writer = writer
+
+
+async def run(mode, total, concurrency, batch_size, flush_interval):
+    app, token = build_app(FakeChatModel(latency=0.0), pool_size=concurrency)
+    writer = None
+    if mode == "write-behind":
+        spool_path = os.path.join(tempfile.gettempdir(), "agentic_chatbot_bench_spool.jsonl")
+        writer = ChatWriteBehind(app.state.bench_sessionmaker, batch_size, flush_interval, spool_path)
+        writer.start()
+    _use_writer(writer)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.post("/api/v1/chat/", json=chat_payload(), headers=headers)
+        response.raise_for_status()
+        session_id = response.json()["session_id"]
+
+        async def one():
+            async with semaphore:
+                payload = {**chat_payload(), "session_id": session_id}
+                response = await client.post("/api/v1/chat/", json=payload, headers=headers)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    drain_started = time.perf_counter()
+    if writer is not None:
+        writer.shutdown()
+    drain = time.perf_counter() - drain_started
+    _use_writer(None)
+
+    db = app.state.bench_sessionmaker()
+    try:
+        rows = db.query(Chat).count()
+    finally:
+        db.close()
+    return elapsed, drain, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--flush-interval", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'mode':<13} {'requests':>8} {'seconds':>8} {'req/s':>8} {'drain s':>8} {'rows':>6}")
+    for mode in ("per-turn", "write-behind"):
+        elapsed, drain, rows = asyncio.run(run(mode, args.requests, args.concurrency, args.batch_size, args.flush_interval))
+        print(f"{mode:<13} {args.requests:>8} {elapsed:>8.2f} {args.requests / elapsed:>8.1f} {drain:>8.2f} {rows:>6}")
+
+
+if __name__ == "__main__":
+    main()
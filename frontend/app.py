@@ -143,6 +143,34 @@ def send_message(message, model_name, model_provider, role, search_enabled, temp
         return None
 
 
+def stream_message(message, model_name, model_provider, role, search_enabled, temperature, auth_token):
+    """Stream a message to the chatbot, yielding (event, data) pairs as they arrive"""
+    headers = {"Authorization": f"Bearer {auth_token}", "Accept": "text/event-stream"}
+    payload = {
+        "session_id": st.session_state.session_id,
+        "message": message,
+        "model_name": model_name,
+        "model_provider": model_provider,
+        "role": role,
+        "search_enabled": search_enabled,
+        "temperature": temperature
+    }
+    
+    try:
+        with requests.post(f"{API_BASE_URL}/chat/stream", json=payload, headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                st.error(f"Error: {response.json().get('detail', 'Unknown error')}")
+                return
+            
+            event_type = "message"
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event_type = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event_type, json.loads(line[len("data:"):].strip())
+                    event_type = "message"
+    except Exception as e:
+        st.error(f"Connection error: {str(e)}")
 
 # Main App
 def main():
@@ -172,7 +200,8 @@ def main():
         st.markdown("### 🤖 Model Settings")
         
         # Provider selection
-        providers = ["gemini", "groq"]
+        # Providers the server has disabled come back as null
+        providers = [p for p in ("gemini", "groq") if st.session_state.available_models.get(p)]
         selected_provider = st.selectbox(
             "Select Provider:",
             providers,
@@ -180,12 +209,8 @@ def main():
         )
         
         # Model selection based on provider
-        if selected_provider == "gemini":
-            available_models = st.session_state.available_models["gemini"]["models"]
-            default_temp = st.session_state.available_models["gemini"]["temperature"]
-        else:
-            available_models = st.session_state.available_models["groq"]["models"]
-            default_temp = st.session_state.available_models["groq"]["temperature"]
+        available_models = st.session_state.available_models[selected_provider]["models"]
+        default_temp = st.session_state.available_models[selected_provider]["temperature"]
         
         selected_model = st.selectbox("Select Model:", available_models)
         
@@ -218,6 +243,12 @@ def main():
             help="Allow the agent to search the web for current information"
         )
         
+        stream_enabled = st.checkbox(
+            "⚡ Stream Responses",
+            value=True,
+            help="Show the answer token by token as the agent writes it"
+        )
+        
         # Session management
         st.markdown("### 💬 Session")
         if st.button("🔄 New Session"):
@@ -285,10 +316,13 @@ def main():
                 "timestamp": datetime.now()
             })
             
-            # Show loading spinner
-            with st.spinner("🤔 AI is thinking..."):
-                # Send message to backend
-                response = send_message(
+            if stream_enabled:
+                placeholder = st.empty()
+                placeholder.markdown("🤔 AI is thinking...")
+                streamed_text = ""
+                response = None
+                
+                for event_type, data in stream_message(
                     user_input,
                     selected_model,
                     selected_provider,
@@ -296,10 +330,27 @@ def main():
                     search_enabled,
                     temperature,
                     st.session_state.auth_token
-                )
+                ):
+                    if event_type == "token":
+                        streamed_text += data["content"]
+                        placeholder.markdown(f"""
+                        <div class="chat-message ai-message">
+                            <strong>🤖 {selected_role}:</strong><br>
+                            {streamed_text}▌
+                        </div>
+                        """, unsafe_allow_html=True)
+                    elif event_type == "tool_start":
+                        placeholder.markdown(f"🔍 Searching the web ({data.get('name', 'search')})...")
+                    elif event_type == "session":
+                        # The server may start a new session; keep its id for the next turn.
+                        st.session_state.session_id = data["session_id"]
+                    elif event_type == "error":
+                        st.error(data.get("content", "Unknown error"))
+                    elif event_type == "done":
+                        response = data
                 
                 if response:
-                    # Add AI response to chat
+                    st.session_state.session_id = str(response["session_id"])
                     st.session_state.messages.append({
                         "role": "assistant",
                         "content": response["ai_response"],
@@ -309,6 +360,32 @@ def main():
                         "search_used": response.get("search_enabled", False),
                         "timestamp": datetime.now()
                     })
+            else:
+                # Show loading spinner
+                with st.spinner("🤔 AI is thinking..."):
+                    # Send message to backend
+                    response = send_message(
+                        user_input,
+                        selected_model,
+                        selected_provider,
+                        selected_role,
+                        search_enabled,
+                        temperature,
+                        st.session_state.auth_token
+                    )
+                    
+                    if response:
+                        st.session_state.session_id = str(response["session_id"])
+                        # Add AI response to chat
+                        st.session_state.messages.append({
+                            "role": "assistant",
+                            "content": response["ai_response"],
+                            "agent_role": response.get("role", "AI Assistant"),
+                            "model": response.get("model_name"),
+                            "provider": response.get("model_provider"),
+                            "search_used": response.get("search_enabled", False),
+                            "timestamp": datetime.now()
+                        })
             
             st.rerun()
     
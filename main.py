@@ -1,13 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.routes import auth, chat
+from fastapi.responses import JSONResponse
+from backend.routes import auth, chat, metrics
+from backend.interactors.chat import ChatInteractor
+from backend.services.container import service_container
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.chat_interactor = ChatInteractor()
+    service_container.startup(extra_warmups={"models_catalog": app.state.chat_interactor.get_models_catalog})
+    try:
+        yield
+    finally:
+        await service_container.shutdown()
 
 app = FastAPI(
     title="Agentic Chatbot API",
     description="An intelligent AI chatbot with multiple roles, web search capabilities, and support for multiple LLM providers (Gemini & Groq)",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -20,6 +34,7 @@ app.add_middleware(
 
 app.include_router(auth.router)
 app.include_router(chat.router)
+app.include_router(metrics.router)
 
 @app.get("/", tags=["🏠 Home"])
 def read_home():
@@ -46,3 +61,10 @@ def health_check():
         "status": "healthy",
         "message": "Agentic Chatbot API is running successfully! 🚀"
     }
+
+@app.get("/ready", tags=["🏥 Health"])
+def readiness_check():
+    status = service_container.stats()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming_up", **status})
+    return {"status": "ready", **status}
@@ -1,36 +1,113 @@
 #!/usr/bin/env python3
 """
 Backend Server Launcher
+
+Development (default): one auto-reloading worker.
+Production (--prod):   N workers with graceful drain and worker recycling.
 """
 
+import argparse
+import importlib.util
+import inspect
 import subprocess
 import sys
 import os
 
+def default_workers():
+    """WEB_CONCURRENCY if set, otherwise one worker per CPU."""
+    return int(os.environ.get("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+
+def available(module):
+    return importlib.util.find_spec(module) is not None
+
+def supports(option):
+    """Whether the installed uvicorn accepts ``option`` (e.g. limit_max_requests_jitter)."""
+    try:
+        import uvicorn
+    except ImportError:
+        return False
+    return option in inspect.signature(uvicorn.Config.__init__).parameters
+
+def build_command(prod=False, host="0.0.0.0", port=8000, workers=None, max_requests=None,
+                  max_requests_jitter=None, graceful_timeout=None):
+    """The uvicorn command line for the requested mode."""
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", str(port)]
+    if not prod:
+        return command + ["--reload"]
+
+    # In-flight agent calls may run up to REQUEST_TIMEOUT; let them finish before a worker exits.
+    if graceful_timeout is None:
+        graceful_timeout = int(float(os.environ.get("REQUEST_TIMEOUT", "120"))) + 10
+    if max_requests is None:
+        max_requests = int(os.environ.get("MAX_REQUESTS", "5000"))
+    if max_requests_jitter is None:
+        max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+    command += [
+        "--workers", str(workers or default_workers()),
+        "--loop", "uvloop" if available("uvloop") else "asyncio",
+        "--http", "httptools" if available("httptools") else "h11",
+        "--timeout-graceful-shutdown", str(graceful_timeout)
+    ]
+    if max_requests:
+        command += ["--limit-max-requests", str(max_requests)]
+        # Jitter keeps workers from reaching the limit and restarting together.
+        # The pinned uvicorn supports it; older ones simply recycle without it.
+        if max_requests_jitter and supports("limit_max_requests_jitter"):
+            command += ["--limit-max-requests-jitter", str(max_requests_jitter)]
+    return command
+
+def build_env(prod=False, workers=None):
+    """Environment for the server: tells each worker how many share the provider rate limits."""
+    return {**os.environ, "LIMIT_WORKERS": str((workers or default_workers()) if prod else 1)}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Launch the FastAPI backend server")
+    parser.add_argument("--prod", action="store_true", help="multi-worker production mode (no reload)")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="recycle a worker after this many requests, 0 to disable (default: MAX_REQUESTS or 5000)")
+    parser.add_argument("--max-requests-jitter", type=int, default=None,
+                        help="random extra requests per worker so they do not recycle together")
+    parser.add_argument("--graceful-timeout", type=int, default=None,
+                        help="seconds to drain in-flight requests on SIGTERM (default: REQUEST_TIMEOUT + 10)")
+    return parser.parse_args(argv)
+
 def main():
     """Launch the FastAPI backend server"""
-    
+    args = parse_args()
+
     # Get the project root directory
     project_root = os.path.dirname(os.path.abspath(__file__))
-    
+
+    command = build_command(
+        prod=args.prod, host=args.host, port=args.port, workers=args.workers,
+        max_requests=args.max_requests, max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout
+    )
+    env = build_env(prod=args.prod, workers=args.workers)
+
     print("🚀 Starting Agentic Chatbot Backend...")
-    print("🌐 Backend API will be available at: http://127.0.0.1:8000")
-    print("📚 API Documentation: http://127.0.0.1:8000/docs")
+    print(f"🌐 Backend API will be available at: http://127.0.0.1:{args.port}")
+    print(f"📚 API Documentation: http://127.0.0.1:{args.port}/docs")
+    if args.prod:
+        print(f"⚙️  Production mode: {command[command.index('--workers') + 1]} workers, "
+              f"loop={command[command.index('--loop') + 1]}, http={command[command.index('--http') + 1]}")
     print("🛑 Press Ctrl+C to stop the server")
     print("-" * 50)
-    
+
     # Change to project directory
     os.chdir(project_root)
-    
+
     # Launch FastAPI with uvicorn
     try:
-        subprocess.run([
-            sys.executable, "-m", "uvicorn", 
-            "backend.main:app",
-            "--reload",
-            "--host", "0.0.0.0",
-            "--port", "8000"
-        ])
+        # exec in production so SIGTERM from the process manager reaches uvicorn,
+        # which stops accepting, drains in-flight requests and runs the app shutdown.
+        if args.prod and os.name == "posix":
+            os.execve(command[0], command, env)
+        subprocess.run(command, env=env)
     except KeyboardInterrupt:
         print("\n👋 Backend server stopped!")
     except Exception as e:
@@ -39,4 +116,4 @@ def main():
         print("   pip install -r requirements.txt")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
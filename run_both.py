@@ -4,9 +4,11 @@ import os
 import time
 import signal
 import threading
+from run_backend import build_command, build_env
 
 class ServiceManager:
-    def __init__(self):
+    def __init__(self, prod=False):
+        self.prod = prod
         self.backend_process = None
         self.frontend_process = None
         self.project_root = os.path.dirname(os.path.abspath(__file__))
@@ -15,13 +17,7 @@ class ServiceManager:
         print("🚀 Starting Backend Server...")
         os.chdir(self.project_root)
         
-        self.backend_process = subprocess.Popen([
-            sys.executable, "-m", "uvicorn", 
-            "main:app",
-            "--reload",
-            "--host", "0.0.0.0",
-            "--port", "8000"
-        ])
+        self.backend_process = subprocess.Popen(build_command(prod=self.prod), env=build_env(prod=self.prod))
         
     def start_frontend(self):       
         print("🚀 Starting Frontend Server...")
@@ -50,7 +46,8 @@ class ServiceManager:
         if self.backend_process:
             self.backend_process.terminate()
             try:
-                self.backend_process.wait(timeout=5)
+                # Production workers drain in-flight requests before exiting.
+                self.backend_process.wait(timeout=150 if self.prod else 5)
             except subprocess.TimeoutExpired:
                 self.backend_process.kill()
             print("✅ Backend stopped")
@@ -106,7 +103,7 @@ def signal_handler(signum, frame):
 def main():
     signal.signal(signal.SIGINT, signal_handler)
     
-    manager = ServiceManager()
+    manager = ServiceManager(prod="--prod" in sys.argv[1:])
     manager.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import uuid
+
+# Tests never touch DATABASE_URL from the environment or a .env file: every
+# run gets its own SQLite file, set before the backend is first imported.
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='agentic_chatbot_tests_'), 'test.db')}"
+os.environ["ASYNC_DATABASE_URL"] = ""
+for _key in ("GEMINI_API_KEY", "GROQ_API_KEY", "TAVILY_API_KEY"):
+    os.environ.setdefault(_key, "test")
+
+import pytest
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables."""
+    from backend.database.db import Base, SessionLocal, engine
+    from backend.database.migrations import chat as _chat_tables, user as _user_tables
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    from backend.database.models.user import UserModel
+
+    return UserModel.create_user(db, f"user-{uuid.uuid4().hex[:8]}", "user@example.com", "not-a-real-hash")
+
+
+@pytest.fixture
+def queries():
+    """SQL statements run on the engine during the test."""
+    from sqlalchemy import event
+    from backend.database.db import engine
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
@@ -0,0 +1,66 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from backend.database.models.chat import ChatModel
+from backend.database.models.user import UserModel
+from backend.interactors.chat import ChatInteractor
+from backend.services.auth import AuthService
+
+
+def add_chats(db, user_id, session_id, count, created_at=None):
+    start = datetime(2026, 1, 1)
+    ids = []
+    for number in range(count):
+        chat = ChatModel.create_chat(db, user_id, session_id, "gemini-2.0-flash", "gemini", f"message {number}", "hi")
+        chat.created_at = created_at or start + timedelta(minutes=number)
+        ids.append(chat.id)
+    db.commit()
+    return ids
+
+
+def pages(db, session_id, limit, **filters):
+    result, before = [], None
+    while True:
+        page = ChatModel.get_chat_history(db, session_id, before=before, limit=limit, **filters)
+        if not page:
+            return result
+        result.append([chat.user_message for chat in page])
+        before = page[0].id
+
+
+def test_pages_walk_back_from_the_newest_chat(db, user):
+    session_id = uuid.uuid4()
+    add_chats(db, user.id, session_id, 5)
+    assert pages(db, session_id, 2) == [
+        ["message 3", "message 4"], ["message 1", "message 2"], ["message 0"]
+    ]
+
+
+def test_pages_do_not_skip_or_repeat_chats_with_the_same_timestamp(db, user):
+    session_id = uuid.uuid4()
+    add_chats(db, user.id, session_id, 7, created_at=datetime(2026, 1, 1))
+    seen = [message for page in pages(db, session_id, 3) for message in page]
+    assert sorted(seen) == [f"message {number}" for number in range(7)]
+
+
+def test_column_selection_returns_rows(db, user):
+    session_id = uuid.uuid4()
+    add_chats(db, user.id, session_id, 2)
+    rows = ChatModel.get_chat_history(db, session_id, columns=["id", "user_message"])
+    assert [row._asdict()["user_message"] for row in rows] == ["message 0", "message 1"]
+    assert set(rows[0]._fields) == {"id", "user_message"}
+
+
+def test_history_is_filtered_by_owner(db, user):
+    other = UserModel.create_user(db, "other-user", "other@example.com", "not-a-real-hash")
+    session_id = uuid.uuid4()
+    add_chats(db, user.id, session_id, 2)
+    interactor = ChatInteractor(agent_service=object(), session_service=object())
+
+    def history(owner):
+        token = AuthService.create_access_token({"sub": str(owner.id)})
+        return asyncio.run(interactor.get_chat_history(db, token, session_id, limit=10))
+
+    assert [chat.user_message for chat in history(user)] == ["message 0", "message 1"]
+    assert history(other) == []
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+import uuid
+
+import pytest
+
+from backend.database.db import SessionLocal
+from backend.database.migrations.chat import Chat
+from backend.services.chat_writer import ChatWriteBehind
+
+
+def chat_fields(user_id, session_id, message="hello"):
+    return {
+        "user_id": user_id,
+        "session_id": session_id,
+        "model_name": "gemini-2.0-flash",
+        "model_provider": "gemini",
+        "user_message": message,
+        "ai_response": "hi",
+        "role": "default",
+        "search_enabled": False
+    }
+
+
+def stored_messages():
+    db = SessionLocal()
+    try:
+        return sorted(message for (message,) in db.query(Chat.user_message))
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def spool_path(tmp_path):
+    return str(tmp_path / "chat_spool.jsonl")
+
+
+@pytest.fixture
+def stalled_writer(db, spool_path):
+    """A writer whose inserts never finish, as if the process died before storing anything."""
+    writer = ChatWriteBehind(spool_path=spool_path, flush_interval=0.05)
+    release = threading.Event()
+    writer._insert = lambda records: release.wait(10)
+    yield writer
+    release.set()
+
+
+def test_add_chat_returns_once_the_row_is_in_the_spool(stalled_writer, spool_path):
+    row = stalled_writer.add_chat(**chat_fields(uuid.uuid4(), uuid.uuid4()))
+    with open(spool_path, encoding="utf-8") as spool:
+        lines = [json.loads(line) for line in spool]
+    assert [line["row"]["id"] for line in lines] == [str(row["id"])]
+
+
+def test_async_add_chat_waits_for_the_spool(stalled_writer, spool_path):
+    row = asyncio.run(stalled_writer.aadd_chat(**chat_fields(uuid.uuid4(), uuid.uuid4())))
+    with open(spool_path, encoding="utf-8") as spool:
+        assert str(row["id"]) in spool.read()
+
+
+def test_spooled_rows_are_replayed_after_a_crash(stalled_writer, spool_path):
+    user_id, session_id = uuid.uuid4(), uuid.uuid4()
+    for message in ("first", "second"):
+        stalled_writer.add_chat(**chat_fields(user_id, session_id, message))
+    assert stored_messages() == []
+
+    # The OS drops the dead process's spool lock; the next worker replays its spool.
+    stalled_writer._spool_lock.close()
+    recovering = ChatWriteBehind(spool_path=spool_path, flush_interval=0.05)
+    recovering.start()
+    recovering.shutdown()
+    assert stored_messages() == ["first", "second"]
+    assert recovering.stats()["recovered"] == 2
+
+
+def test_replay_skips_rows_already_stored(db, spool_path):
+    writer = ChatWriteBehind(spool_path=spool_path, flush_interval=0.05)
+    row = writer.add_chat(**chat_fields(uuid.uuid4(), uuid.uuid4(), "stored"))
+    writer.shutdown()
+    # Crashed after the insert but before the spool was truncated.
+    with open(spool_path, "w", encoding="utf-8") as spool:
+        spool.write(json.dumps({"table": "chats", "row": row}, default=str) + "\n")
+
+    recovering = ChatWriteBehind(spool_path=spool_path, flush_interval=0.05)
+    recovering.start()
+    recovering.shutdown()
+    assert stored_messages() == ["stored"]
+    assert recovering.stats()["recovered"] == 0
+
+
+def test_unreplayable_rows_are_dead_lettered_at_start_up(db, spool_path):
+    with open(spool_path, "w", encoding="utf-8") as spool:
+        spool.write(json.dumps({"table": "chats", "row": {"id": str(uuid.uuid4())}}) + "\n")
+        spool.write('{"table": "chats", "row": {"id"')
+
+    recovering = ChatWriteBehind(spool_path=spool_path, flush_interval=0.05)
+    recovering.start()
+    recovering.shutdown()
+    assert stored_messages() == []
+    assert recovering.stats()["dead_lettered"] == 1
+
+
+def test_bad_rows_are_dead_lettered_and_the_rest_stored(db, spool_path):
+    writer = ChatWriteBehind(spool_path=spool_path, flush_interval=0.2)
+    user_id, session_id = uuid.uuid4(), uuid.uuid4()
+    writer.add_chat(**chat_fields(user_id, session_id, "good"))
+    duplicate = writer.add_chat(**chat_fields(user_id, session_id, "first copy"))
+    writer.add_chat(**{**chat_fields(user_id, session_id, "second copy"), "id": duplicate["id"]})
+    writer.shutdown()
+
+    assert "good" in stored_messages()
+    assert len(stored_messages()) == 2
+    with open(writer.dead_letter_path, encoding="utf-8") as dead:
+        dead_rows = [json.loads(line) for line in dead]
+    assert [row["row"]["id"] for row in dead_rows] == [str(duplicate["id"])]
+    assert "error" in dead_rows[0]
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.database.db import SessionLocal
+from backend.database.migrations.chat import Chat
+from backend.interactors.chat import ChatInteractor
+from backend.schemas.chat import ChatRequest
+from backend.services.auth import AuthService
+from backend.services.deadlines import (
+    CANCELLED, COMPLETED, TIMEOUT, DeadlineExceeded, RequestDeadline, iterate_with_deadline, run_with_deadline
+)
+from backend.services.rate_limit import user_quotas
+from backend.services.routing import UnsupportedProviderError
+
+
+class FakeProviderService:
+    request_timeout = None
+
+    def get_available_models(self):
+        return ["gemini-2.0-flash"]
+
+
+class FakeAgentService:
+    def __init__(self, delay=0.0, provider_error=None):
+        self.delay = delay
+        self.provider_error = provider_error
+
+    def get_provider_service(self, provider):
+        if self.provider_error is not None:
+            raise self.provider_error
+        return FakeProviderService()
+
+    async def astream_response_from_ai_agent(self, **kwargs):
+        yield {"type": "token", "content": "partial "}
+        await asyncio.sleep(self.delay)
+        yield {"type": "final", "content": "partial answer"}
+
+
+def chat_request(**overrides):
+    return ChatRequest(**{"message": "hello", "model_name": "gemini-2.0-flash", "model_provider": "gemini",
+                          "search_enabled": False, **overrides})
+
+
+def test_run_with_deadline_times_out_and_cancels_the_work():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    assert asyncio.run(run_with_deadline(slow(), RequestDeadline(0.02))) == (TIMEOUT, None)
+    assert cancelled == [True]
+
+
+def test_run_with_deadline_stops_when_the_client_disconnects():
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def is_disconnected():
+        return True
+
+    result = asyncio.run(run_with_deadline(slow(), RequestDeadline(10), is_disconnected, poll_interval=0.01))
+    assert result == (CANCELLED, None)
+
+
+def test_run_with_deadline_returns_the_result_in_time():
+    async def quick():
+        return "answer"
+
+    assert asyncio.run(run_with_deadline(quick(), RequestDeadline(1))) == (COMPLETED, "answer")
+
+
+def test_iterate_with_deadline_raises_once_the_deadline_passes():
+    async def events():
+        yield "first"
+        await asyncio.sleep(10)
+        yield "never"
+
+    async def scenario():
+        seen = []
+        with pytest.raises(DeadlineExceeded):
+            async for event in iterate_with_deadline(events(), RequestDeadline(0.05)):
+                seen.append(event)
+        return seen
+
+    assert asyncio.run(scenario()) == ["first"]
+
+
+def test_unsupported_provider_is_a_bad_request():
+    interactor = ChatInteractor(agent_service=FakeAgentService(provider_error=UnsupportedProviderError("not enabled")),
+                                session_service=object())
+    with pytest.raises(HTTPException) as exc:
+        interactor._request_deadline(chat_request(), "default")
+    assert exc.value.status_code == 400
+
+
+def test_provider_configuration_errors_are_server_errors(db, user):
+    token = AuthService.create_access_token({"sub": str(user.id)})
+    interactor = ChatInteractor(agent_service=FakeAgentService(provider_error=ValueError("GEMINI_API_KEY not found")))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(interactor.stream_chat(db, token, chat_request()))
+    assert exc.value.status_code == 500
+    assert user_quotas.stats()["users_in_flight"] == 0
+
+
+def test_stream_that_is_never_read_is_released_by_the_background_task(db, user):
+    user_id = user.id
+    token = AuthService.create_access_token({"sub": str(user_id)})
+    interactor = ChatInteractor(agent_service=FakeAgentService())
+
+    async def scenario():
+        events, release = await interactor.stream_chat(db, token, chat_request())
+        assert user_quotas.stats()["users_in_flight"] == 1
+        await release()
+        assert user_quotas.stats()["users_in_flight"] == 0
+        # A second release (e.g. the generator's own cleanup) must not free another request's slot.
+        user_quotas.acquire(user_id)
+        await release()
+        assert user_quotas.stats()["users_in_flight"] == 1
+        user_quotas.release(user_id)
+
+    asyncio.run(scenario())
+
+
+def test_stream_past_its_deadline_stores_the_partial_turn_and_releases(db, user):
+    token = AuthService.create_access_token({"sub": str(user.id)})
+    interactor = ChatInteractor(agent_service=FakeAgentService(delay=10))
+
+    async def scenario():
+        events, release = await interactor.stream_chat(db, token, chat_request(timeout_seconds=0.05))
+        received = [event.split("\n")[0] async for event in events]
+        await release()
+        return received
+
+    assert asyncio.run(scenario()) == ["event: session", "event: token", "event: timeout", "event: done"]
+    assert user_quotas.stats()["users_in_flight"] == 0
+    check = SessionLocal()
+    try:
+        stored = check.query(Chat.status, Chat.ai_response).one()
+    finally:
+        check.close()
+    assert stored.status == TIMEOUT
+    assert stored.ai_response.startswith("partial \n\n[Response incomplete")
@@ -0,0 +1,40 @@
+import pytest
+from fastapi import HTTPException
+
+from backend.database.models.user import UserModel
+from backend.interactors.auth import AuthInteractor
+from backend.services.auth import AuthService
+from backend.services.principal_cache import principal_cache
+
+
+@pytest.fixture
+def token(user):
+    principal_cache.clear()
+    yield AuthService.create_access_token({"sub": str(user.id)})
+    principal_cache.clear()
+
+
+def test_repeated_requests_skip_the_users_query(db, user, token, queries):
+    user_id = user.id
+    queries.clear()
+    for _ in range(3):
+        assert AuthInteractor.get_current_user(db, token).id == user_id
+    assert len(queries) == 1
+
+
+def test_deactivating_a_user_drops_their_cached_principal(db, user, token):
+    user_id = user.id
+    AuthInteractor.get_current_user(db, token)
+    UserModel.set_user_active(db, user_id, False)
+    with pytest.raises(HTTPException) as exc:
+        AuthInteractor.get_current_user(db, token)
+    assert exc.value.status_code == 401
+
+
+def test_other_updates_keep_the_cached_principal(db, user, token, queries):
+    AuthInteractor.get_current_user(db, token)
+    user.email = "changed@example.com"
+    db.commit()
+    queries.clear()
+    AuthInteractor.get_current_user(db, token)
+    assert queries == []
@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+
+import pytest
+
+from backend.services import rate_limit
+from backend.services.rate_limit import ProviderBusyError, ProviderLimits, QuotaExceededError, UserQuotas
+
+
+class FakeService:
+    model = "default-model"
+
+    def __init__(self, limits):
+        self.limits = limits
+
+    def get_available_models(self):
+        return [self.model]
+
+    def get_rate_limits(self, model=None):
+        return self.limits
+
+
+def test_provider_limits_are_split_across_workers():
+    limits = ProviderLimits(workers=4)
+    provider, model = limits.limiters_for("gemini", None, FakeService({"max_concurrency": 8, "requests_per_minute": 2}))
+    assert provider.concurrency.limit == 2
+    assert model.bucket.rate * 60 == 1
+
+
+def test_user_quotas_are_whole_per_worker():
+    quotas = UserQuotas(requests_per_minute=60, max_concurrent=2)
+    user_id = uuid.uuid4()
+    quotas.acquire(user_id)
+    quotas.acquire(user_id)
+    assert quotas.stats()["requests_per_minute"] == 60
+    assert quotas.stats()["max_concurrent"] == 2
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_requests_over_the_rate_quota_are_rejected_with_retry_after(clock):
+    quotas = UserQuotas(requests_per_minute=60, burst=2)
+    user_id = uuid.uuid4()
+    for _ in range(2):
+        quotas.acquire(user_id)
+        quotas.release(user_id)
+    with pytest.raises(QuotaExceededError) as exc:
+        quotas.acquire(user_id)
+    assert exc.value.retry_after == pytest.approx(1.0)
+    assert quotas.rejected == 1
+    # Other users have their own bucket.
+    quotas.acquire(uuid.uuid4())
+    clock[0] += 1
+    quotas.acquire(user_id)
+
+
+def test_concurrency_quota_is_freed_on_release():
+    quotas = UserQuotas(max_concurrent=1)
+    user_id = uuid.uuid4()
+    quotas.acquire(user_id)
+    with pytest.raises(QuotaExceededError):
+        quotas.acquire(user_id)
+    quotas.release(user_id)
+    quotas.acquire(user_id)
+    quotas.release(user_id)
+    assert quotas.stats()["users_in_flight"] == 0
+
+
+def test_provider_slot_is_released_after_the_run():
+    limits = ProviderLimits(queue_timeout=0.01)
+    service = FakeService({"max_concurrency": 1})
+
+    async def scenario():
+        async with limits.slot("gemini", None, service):
+            with pytest.raises(ProviderBusyError):
+                async with limits.slot("gemini", None, service):
+                    pass
+        async with limits.slot("gemini", None, service):
+            pass
+
+    asyncio.run(scenario())
+    assert limits.stats()["gemini"]["in_flight"] == 0
+    assert limits.stats()["gemini"]["rejected"] == 1
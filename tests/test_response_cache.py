@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from backend.services.response_cache import (
+    DiskResponseCacheBackend, InMemoryResponseCacheBackend, ResponseCache, normalize_query
+)
+
+QUERY = "What is the price of Bitcoin today?"
+ARGS = ("default", "gemini", "gemini-2.0-flash", True)
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    if request.param == "disk":
+        return DiskResponseCacheBackend(str(tmp_path / "response_cache.db"), max_entries=100, max_per_namespace=5)
+    return InMemoryResponseCacheBackend(max_entries=100, max_per_namespace=5)
+
+
+def test_normalize_query_ignores_case_punctuation_and_spacing():
+    assert normalize_query("  What's   the PRICE of BTC?? ") == "what s the price of btc"
+
+
+def test_exact_hit_after_store(backend):
+    cache = ResponseCache(backend)
+    assert cache.lookup(*ARGS, QUERY) is None
+    cache.store(*ARGS, QUERY, "About $60k.")
+    assert cache.lookup(*ARGS, "what is the price of bitcoin today") == "About $60k."
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_namespace_separates_role_provider_model_and_search(backend):
+    cache = ResponseCache(backend)
+    cache.store(*ARGS, QUERY, "About $60k.")
+    assert cache.lookup("news_analyst", "gemini", "gemini-2.0-flash", True, QUERY) is None
+    assert cache.lookup("default", "groq", "gemini-2.0-flash", True, QUERY) is None
+    assert cache.lookup("default", "gemini", "gemini-1.5-pro", True, QUERY) is None
+    assert cache.lookup("default", "gemini", "gemini-2.0-flash", False, QUERY) is None
+
+
+def test_errors_and_empty_answers_are_not_stored(backend):
+    cache = ResponseCache(backend)
+    cache.store(*ARGS, QUERY, "Error: provider unavailable")
+    cache.store(*ARGS, "another question", "")
+    assert backend.size() == 0
+
+
+def test_expired_entries_miss(backend):
+    cache = ResponseCache(backend, role_ttls={"default": 0})
+    cache.store(*ARGS, QUERY, "About $60k.")
+    assert cache.lookup(*ARGS, QUERY) is None
+
+
+def test_store_replaces_and_clear_empties(backend):
+    cache = ResponseCache(backend)
+    cache.store(*ARGS, QUERY, "About $60k.")
+    cache.store(*ARGS, QUERY, "About $61k.")
+    assert cache.lookup(*ARGS, QUERY) == "About $61k."
+    assert backend.size() == 1
+    cache.clear()
+    assert cache.lookup(*ARGS, QUERY) is None
+
+
+def test_semantic_hit_on_similar_query(backend):
+    cache = ResponseCache(backend, mode="semantic", similarity_threshold=0.8)
+    cache.store(*ARGS, "latest bitcoin price in usd today", "About $60k.")
+    assert cache.lookup(*ARGS, "bitcoin price today in usd latest please") == "About $60k."
+    assert cache.lookup(*ARGS, "summarize the ethereum roadmap") is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_namespace_is_capped_least_recently_used_first(backend):
+    cache = ResponseCache(backend)
+    for i in range(6):
+        cache.store(*ARGS, f"question {i}", f"answer {i}")
+        if i == 4:
+            # Keep question 0 recently used so question 1 is evicted instead.
+            assert cache.lookup(*ARGS, "question 0") == "answer 0"
+    assert cache.lookup(*ARGS, "question 1") is None
+    assert cache.lookup(*ARGS, "question 0") == "answer 0"
+    assert cache.lookup(*ARGS, "question 5") == "answer 5"
+    cache.store("news_analyst", "gemini", "gemini-2.0-flash", True, "question 0", "other namespace")
+    assert backend.size() == 6
+
+
+def test_semantic_candidates_are_bounded_by_the_namespace_cap(backend):
+    cache = ResponseCache(backend, mode="semantic")
+    for i in range(20):
+        cache.store(*ARGS, f"bitcoin question number {i}", f"answer {i}")
+    assert len(backend.candidates(cache._namespace(*ARGS))) == 5
+
+
+def test_disk_backend_sees_entries_written_by_another_worker(tmp_path):
+    path = str(tmp_path / "response_cache.db")
+    writer = ResponseCache(DiskResponseCacheBackend(path), mode="semantic", similarity_threshold=0.8)
+    reader = ResponseCache(DiskResponseCacheBackend(path), mode="semantic", similarity_threshold=0.8)
+    assert reader.lookup(*ARGS, "latest bitcoin price in usd today") is None
+    writer.store(*ARGS, "latest bitcoin price in usd today", "About $60k.")
+    assert reader.lookup(*ARGS, "bitcoin price today in usd latest please") == "About $60k."
+    writer.clear()
+    assert reader.lookup(*ARGS, "bitcoin price today in usd latest please") is None
+
+
+def test_async_lookup_and_store(backend):
+    cache = ResponseCache(backend, mode="semantic")
+
+    async def scenario():
+        await cache.astore(*ARGS, QUERY, "About $60k.")
+        return await cache.alookup(*ARGS, QUERY)
+
+    assert asyncio.run(scenario()) == "About $60k."
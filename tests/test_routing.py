@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from backend.services import routing
+from backend.services.rate_limit import ProviderBusyError
+from backend.services.routing import CircuitBreaker, ProviderRouter, ProviderUnavailableError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(routing.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.stats() == {"state": "open", "consecutive_failures": 3, "times_opened": 1}
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_trial_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 29
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one trial per reset_timeout.
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_half_open_trial_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.times_opened == 1
+    clock[0] += 30
+    assert breaker.allow()
+
+
+def test_candidates_keep_same_provider_fallbacks():
+    router = ProviderRouter(fallbacks={"gemini": [("gemini", "gemini-1.5-pro"), ("groq", None), ("gemini", None)]})
+    assert router.candidates("Gemini") == [("gemini", None), ("gemini", "gemini-1.5-pro"), ("groq", None)]
+    assert router.candidates("gemini", "gemini-1.5-pro") == [
+        ("gemini", "gemini-1.5-pro"), ("groq", None), ("gemini", None)
+    ]
+    assert router.candidates("groq", "llama") == [("groq", "llama")]
+
+
+def test_next_candidate_skips_open_circuits():
+    router = ProviderRouter(fallbacks={"gemini": [("groq", None)]}, failure_threshold=1)
+    router.record("gemini", False)
+    candidates = router.candidates("gemini")
+    assert router.next_candidate(candidates) == ("groq", None)
+    assert router.counters["short_circuited"] == 1
+    assert router.next_candidate(candidates) is None
+
+
+def test_run_fails_over_and_opens_the_circuit():
+    router = ProviderRouter(fallbacks={"gemini": [("groq", None)]}, failure_threshold=2)
+    calls = []
+
+    async def call(provider, model):
+        calls.append(provider)
+        if provider == "gemini":
+            raise RuntimeError("gemini down")
+        return f"answer from {provider}"
+
+    for _ in range(3):
+        assert asyncio.run(router.run("gemini", None, call)) == "answer from groq"
+    assert calls == ["gemini", "groq", "gemini", "groq", "groq"]
+    assert router.breaker("gemini").state == "open"
+    assert router.counters["failovers"] == 2
+    assert router.counters["short_circuited"] == 1
+
+
+def test_run_raises_the_last_error_when_every_candidate_fails():
+    router = ProviderRouter(fallbacks={"gemini": [("groq", None)]})
+
+    async def call(provider, model):
+        raise RuntimeError(f"{provider} down")
+
+    with pytest.raises(RuntimeError, match="groq down"):
+        asyncio.run(router.run("gemini", None, call))
+
+
+def test_run_reports_unavailable_when_every_circuit_is_open():
+    router = ProviderRouter(failure_threshold=1)
+    router.record("gemini", False)
+
+    async def call(provider, model):
+        return "unreachable"
+
+    with pytest.raises(ProviderUnavailableError):
+        asyncio.run(router.run("gemini", None, call))
+
+
+def test_timeouts_count_as_failures():
+    router = ProviderRouter(fallbacks={"gemini": [("groq", None)]}, timeout=0.01, failure_threshold=1)
+
+    async def call(provider, model):
+        if provider == "gemini":
+            await asyncio.sleep(1)
+        return provider
+
+    assert asyncio.run(router.run("gemini", None, call)) == "groq"
+    assert router.counters["timeouts"] == 1
+    assert router.breaker("gemini").state == "open"
+
+
+def test_rate_limited_calls_do_not_trip_the_breaker():
+    router = ProviderRouter(failure_threshold=1)
+
+    async def call(provider, model):
+        raise ProviderBusyError("busy")
+
+    with pytest.raises(ProviderBusyError):
+        asyncio.run(router.run("gemini", None, call))
+    assert router.breaker("gemini").state == "closed"
+
+
+def test_hedged_request_returns_the_faster_candidate():
+    router = ProviderRouter(fallbacks={"gemini": [("groq", None)]}, hedge_after=0.02)
+
+    async def call(provider, model):
+        await asyncio.sleep(1 if provider == "gemini" else 0.01)
+        return provider
+
+    assert asyncio.run(router.run("gemini", None, call)) == "groq"
+    assert router.counters["hedges"] == 1
+    assert router.counters["hedges_won"] == 1
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+from typing import Any, Optional
+
+import pytest
+from langchain_core.tools import BaseTool
+
+from backend.services import cache as cache_module
+from backend.services.search_cache import CachedSearchTool, SearchCache
+
+
+class CountingSearch(BaseTool):
+    name: str = "tavily_search_results_json"
+    description: str = "Fake search"
+    calls: int = 0
+    delay: float = 0.0
+    fail: bool = False
+
+    def _run(self, query: str, run_manager: Optional[Any] = None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("search down")
+        return [{"url": "https://example.com", "content": f"results for {query}"}]
+
+    async def _arun(self, query: str, run_manager: Optional[Any] = None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("search down")
+        return [{"url": "https://example.com", "content": f"results for {query}"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_repeated_query_is_served_from_cache():
+    search = CountingSearch()
+    tool = CachedSearchTool.wrap(search, SearchCache())
+    first = tool.invoke({"query": "Bitcoin price"})
+    assert tool.invoke({"query": "  bitcoin PRICE? "}) == first
+    assert search.calls == 1
+    assert tool.cache.stats()["upstream_calls_saved"] == 1
+
+
+def test_different_query_or_max_results_misses():
+    search = CountingSearch()
+    cache = SearchCache()
+    CachedSearchTool.wrap(search, cache).invoke({"query": "bitcoin price"})
+    CachedSearchTool.wrap(search, cache).invoke({"query": "ether price"})
+    CachedSearchTool.wrap(search, cache, max_results=5).invoke({"query": "bitcoin price"})
+    assert search.calls == 3
+
+
+def test_entries_expire_after_ttl(clock):
+    search = CountingSearch()
+    tool = CachedSearchTool.wrap(search, SearchCache(ttl=60))
+    tool.invoke({"query": "bitcoin price"})
+    clock[0] += 59
+    tool.invoke({"query": "bitcoin price"})
+    assert search.calls == 1
+    clock[0] += 2
+    tool.invoke({"query": "bitcoin price"})
+    assert search.calls == 2
+
+
+def test_clear_invalidates():
+    search = CountingSearch()
+    tool = CachedSearchTool.wrap(search, SearchCache())
+    tool.invoke({"query": "bitcoin price"})
+    tool.cache.clear()
+    tool.invoke({"query": "bitcoin price"})
+    assert search.calls == 2
+
+
+def test_failures_are_not_cached():
+    search = CountingSearch(fail=True)
+    tool = CachedSearchTool.wrap(search, SearchCache())
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            tool.invoke({"query": "bitcoin price"})
+    assert search.calls == 2
+
+
+def test_concurrent_async_searches_are_coalesced():
+    search = CountingSearch(delay=0.05)
+    tool = CachedSearchTool.wrap(search, SearchCache())
+
+    async def scenario():
+        return await asyncio.gather(*(tool.ainvoke({"query": "bitcoin price"}) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert search.calls == 1
+    assert all(result == results[0] for result in results)
+    assert tool.cache.stats()["coalesced"] == 4
+
+
+def test_coalesced_async_callers_share_the_failure_and_nothing_is_cached():
+    search = CountingSearch(delay=0.05, fail=True)
+    tool = CachedSearchTool.wrap(search, SearchCache())
+
+    async def scenario():
+        return await asyncio.gather(*(tool.ainvoke({"query": "bitcoin price"}) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+    assert search.calls == 1
+    assert tool.cache.stats()["size"] == 0
+
+
+def test_concurrent_sync_searches_are_coalesced():
+    cache = SearchCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return [{"content": "results"}]
+
+    results = []
+    key = cache.key("bitcoin price", 2)
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch(key, fetch))) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == [[{"content": "results"}]] * 3
+
+
+def test_coalesced_sync_callers_share_the_failure():
+    cache = SearchCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        raise RuntimeError("search down")
+
+    errors = []
+
+    def search():
+        try:
+            cache.get_or_fetch(cache.key("bitcoin price", 2), fetch)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert len(errors) == 3
+    assert cache.stats()["size"] == 0
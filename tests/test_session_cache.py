@@ -0,0 +1,69 @@
+import uuid
+
+import pytest
+
+from backend.services.session import SessionService
+from backend.services.session_cache import InMemorySessionCacheBackend, SessionCache, session_cache
+
+
+@pytest.fixture
+def sessions():
+    # The ORM listener invalidates the module-level cache, so use that one.
+    session_cache.clear()
+    yield SessionService(session_cache)
+    session_cache.clear()
+
+
+def test_local_entries_live_for_the_full_ttl_without_a_shared_backend():
+    assert SessionCache(ttl=3600, local_ttl=5).local_ttl == 3600
+    assert SessionCache(shared=InMemorySessionCacheBackend(), ttl=3600, local_ttl=5).local_ttl == 5
+
+
+def test_shared_backend_fills_the_local_level():
+    shared = InMemorySessionCacheBackend()
+    writer, reader = SessionCache(shared=shared), SessionCache(shared=shared)
+    session_id, user_id = uuid.uuid4(), uuid.uuid4()
+    writer.set_owner(session_id, user_id)
+    assert reader.get_owner(session_id) == user_id
+    assert reader.stats()["shared_hits"] == 1
+    writer.invalidate_session(session_id, user_id)
+    reader.clear()
+    assert reader.get_owner(session_id) is None
+
+
+def test_steady_state_turns_skip_the_database(db, user, sessions, queries):
+    user_id = user.id
+    session_id = sessions.get_or_create_session(db, user_id)
+    queries.clear()
+    for _ in range(3):
+        assert sessions.get_or_create_session(db, user_id) == session_id
+        assert sessions.get_or_create_session(db, user_id, session_id) == session_id
+    assert queries == []
+
+
+def test_cold_cache_verifies_ownership_once(db, user, sessions, queries):
+    user_id = user.id
+    session_id = sessions.get_or_create_session(db, user_id)
+    session_cache.clear()
+    queries.clear()
+    assert sessions.get_or_create_session(db, user_id, session_id) == session_id
+    assert sessions.get_or_create_session(db, user_id, session_id) == session_id
+    assert len(queries) == 1
+
+
+def test_another_users_session_is_not_reused(db, user, sessions):
+    from backend.database.models.user import UserModel
+
+    other = UserModel.create_user(db, "other-user", "other@example.com", "not-a-real-hash")
+    session_id = sessions.get_or_create_session(db, user.id)
+    assert sessions.get_or_create_session(db, other.id, session_id) != session_id
+
+
+def test_deleting_a_session_invalidates_the_cache(db, user, sessions):
+    session_id = sessions.get_or_create_session(db, user.id)
+    assert session_cache.get_owner(session_id) == user.id
+    assert sessions.deactivate_session(db, user.id, session_id)
+    assert session_cache.get_owner(session_id) is None
+    assert session_cache.get_active(user.id) is None
+    # Reusing the deleted session id starts a new session.
+    assert sessions.get_or_create_session(db, user.id, session_id) != session_id